@@ -0,0 +1,256 @@
+import asyncio
+from collections import OrderedDict
+
+import pygame
+from maze import TILE_SIZE
+
+# Largest number of rendered text surfaces kept around (least recently used are dropped)
+TEXT_CACHE_SIZE = 256
+
+# Files the game needs; preload() loads all of them up front
+IMAGES = (
+    ("public/player.png", TILE_SIZE),
+    ("public/ghost.png", TILE_SIZE),
+    ("public/title.png", 500),
+)
+SOUNDS = ("public/victory.mp3", "public/gameover.wav")
+FONTS = (("Arial", 24), ("Arial", 26), ("Arial", 30))
+
+_images = {}  # (path, size, alpha) -> Surface
+_fonts = {}  # (name, size) -> Font
+_sounds = {}  # path -> Sound
+_texts = OrderedDict()  # (message, color, size, font name) -> Surface, oldest first
+_current_music = None  # Track currently loaded into pygame.mixer.music
+
+# Hit/miss counters per cache, see stats()
+_counters = {name: {"hits": 0, "misses": 0} for name in ("images", "fonts", "sounds", "texts")}
+
+
+def _count(cache, hit):
+    _counters[cache]["hits" if hit else "misses"] += 1
+
+
+def load_image(path, size=None, alpha=True):
+    """
+    Load an image once and return the same Surface on every later call.
+
+    Args:
+        path (str): Image file path.
+        size (tuple): Optional (width, height) to scale to; each size is cached separately.
+        alpha (bool): Keep transparency (convert_alpha) instead of a plain convert.
+
+    Returns:
+        pygame.Surface: The loaded (and scaled) image. Do not draw onto it, it is shared.
+    """
+    key = (path, size, alpha)
+    image = _images.get(key)
+    _count("images", image is not None)
+    if image is None:
+        image = _prepare_image(key, pygame.image.load(path))
+    return image
+
+
+async def load_image_async(path, size=None, alpha=True):
+    """
+    Coroutine version of load_image: the file is read and decoded on a worker thread.
+
+    Converting to the display format and scaling still happen on the calling
+    (main) thread, since they touch the display.
+    """
+    key = (path, size, alpha)
+    image = _images.get(key)
+    _count("images", image is not None)
+    if image is None:
+        loaded = await asyncio.get_running_loop().run_in_executor(None, pygame.image.load, path)
+        # Another task may have finished the same image while this one waited
+        image = _images.get(key)
+        if image is None:
+            image = _prepare_image(key, loaded)
+    return image
+
+
+def _prepare_image(key, image):
+    #Convert and scale a freshly loaded image and store it in the cache.
+    path, size, alpha = key
+    # convert() needs a display; images loaded before the window exists stay as they are
+    if pygame.display.get_surface() is not None:
+        image = image.convert_alpha() if alpha else image.convert()
+    if size is not None:
+        image = pygame.transform.scale(image, size)
+    _images[key] = image
+    return image
+
+
+def has_font(name, size):
+    # True once get_font(name, size) has been loaded (drawing with it will not stall)
+    return (name, size) in _fonts
+
+
+def get_font(name, size):
+    """
+    Return a cached pygame SysFont (looking up a system font is slow).
+    """
+    key = (name, size)
+    font = _fonts.get(key)
+    _count("fonts", font is not None)
+    if font is None:
+        font = pygame.font.SysFont(name, size)
+        _fonts[key] = font
+    return font
+
+
+def render_text(message, color, size, font_name="Arial"):
+    """
+    Render text once and reuse the Surface while the same text is drawn again.
+
+    The cache holds at most TEXT_CACHE_SIZE surfaces and drops the least recently used.
+
+    Args:
+        message (str): Text to render.
+        color (tuple): RGB text color.
+        size (int): Font size.
+        font_name (str): System font name.
+
+    Returns:
+        pygame.Surface: The rendered text. Do not draw onto it, it is shared.
+    """
+    key = (message, color, size, font_name)
+    text = _texts.get(key)
+    _count("texts", text is not None)
+    if text is not None:
+        _texts.move_to_end(key)  # Mark as most recently used
+        return text
+
+    text = get_font(font_name, size).render(message, True, color)
+    _texts[key] = text
+    if len(_texts) > TEXT_CACHE_SIZE:
+        _texts.popitem(last=False)  # Drop the least recently used text
+    return text
+
+
+def load_sound(path):
+    """
+    Load a sound effect into memory once and return the cached pygame Sound.
+    """
+    sound = _sounds.get(path)
+    _count("sounds", sound is not None)
+    if sound is None:
+        sound = pygame.mixer.Sound(path)
+        _sounds[path] = sound
+    return sound
+
+
+async def load_sound_async(path):
+    """
+    Coroutine version of load_sound: the file is decoded on a worker thread.
+    """
+    sound = _sounds.get(path)
+    _count("sounds", sound is not None)
+    if sound is None:
+        sound = await asyncio.get_running_loop().run_in_executor(None, pygame.mixer.Sound, path)
+        sound = _sounds.setdefault(path, sound)
+    return sound
+
+
+def init_audio():
+    # Open the audio device on first use instead of at startup, so it never delays the window
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
+
+
+def play_music(path, loops=-1, volume=None):
+    """
+    Play a streamed music track, loading the file only if a different track is loaded.
+
+    Args:
+        path (str): Music file path.
+        loops (int): Number of repeats (-1 loops forever).
+        volume (float): Optional volume from 0.0 to 1.0.
+    """
+    global _current_music
+    init_audio()
+    if path != _current_music:
+        pygame.mixer.music.load(path)
+        _current_music = path
+    if volume is not None:
+        pygame.mixer.music.set_volume(volume)
+    pygame.mixer.music.play(loops)
+
+
+async def play_music_async(path, loops=-1, volume=None):
+    """
+    Coroutine version of play_music: a new track is opened on a worker thread.
+    """
+    global _current_music
+    init_audio()
+    if path != _current_music:
+        await asyncio.get_running_loop().run_in_executor(None, pygame.mixer.music.load, path)
+        _current_music = path
+    if volume is not None:
+        pygame.mixer.music.set_volume(volume)
+    pygame.mixer.music.play(loops)
+
+
+def play_effect(path):
+    """
+    Stop the music and play a preloaded sound effect (e.g. the win or lose jingle).
+    """
+    pygame.mixer.music.stop()
+    load_sound(path).play()
+
+
+def stop_effects():
+    # Silence any effect started with play_effect()
+    for sound in _sounds.values():
+        sound.stop()
+
+
+def preload():
+    """
+    Load every image, font and sound the game uses, so no state change loads from disk.
+
+    Call after the window is created so images can be converted to the display format.
+    """
+    for path, size in IMAGES:
+        load_image(path, (size, size))
+    for name, size in FONTS:
+        get_font(name, size)
+    if pygame.mixer.get_init():
+        for path in SOUNDS:
+            load_sound(path)
+
+
+async def preload_async():
+    """
+    Coroutine version of preload: files load on worker threads while frames keep drawing.
+    """
+    loop = asyncio.get_running_loop()
+    tasks = [load_image_async(path, (size, size)) for path, size in IMAGES]
+    # The first SysFont call scans the system fonts, which can take a while
+    tasks += [loop.run_in_executor(None, get_font, name, size) for name, size in FONTS]
+    init_audio()
+    tasks += [load_sound_async(path) for path in SOUNDS]
+    await asyncio.gather(*tasks)
+
+
+def stats():
+    """
+    Return hit/miss counts and current size for each cache.
+
+    Returns:
+        dict: {"images": {"hits": ..., "misses": ..., "size": ...}, ...}
+    """
+    sizes = {"images": len(_images), "fonts": len(_fonts), "sounds": len(_sounds), "texts": len(_texts)}
+    return {name: dict(counts, size=sizes[name]) for name, counts in _counters.items()}
+
+
+def clear():
+    """
+    Drop every cached asset (e.g. after the display mode changes).
+    """
+    global _current_music
+    _images.clear()
+    _fonts.clear()
+    _sounds.clear()
+    _texts.clear()
+    _current_music = None
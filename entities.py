@@ -0,0 +1,169 @@
+from array import array
+
+from maze import TILE_SIZE, get_grid
+from pathfinding import _a_star_ids
+from flowfield import FlowField
+from swarm import draw_circles
+
+
+class AgentTable:
+    def __init__(self, grid=None, image_path="public/ghost.png"):
+        """
+        Struct-of-arrays store for large numbers of agents (e.g. 10k ghosts).
+
+        Instead of one Python object per agent, every field is one array('i')
+        column indexed by the agent's slot: its cell id and the cell id of its
+        next hop. A route is never kept beyond that next hop, so an agent costs
+        a few bytes however long its path is, and all agents share one sprite.
+
+        Removed agents leave a free slot that the next add() reuses, so the
+        slot numbers handed out stay valid for the agent's lifetime.
+
+        Works without NumPy (see swarm.GhostSwarm for the vectorized version of
+        a crowd that only follows one shared flow field).
+
+        Args:
+            grid (Grid): The maze the agents move in (defaults to the current level).
+            image_path (str): Sprite shared by every agent, or None for a headless table.
+        """
+        if grid is None:
+            grid = get_grid()
+        self.grid = grid
+
+        # Columns, indexed by slot
+        self.cells = array("i")  # Cell id the agent stands on
+        self.hops = array("i")  # Cell id it moves to on the next step() (its own cell to stay)
+        self.alive = bytearray()  # 1 for slots in use
+
+        self.free = []  # Slots of removed agents, reused first
+        self.count = 0  # Live agents
+
+        # One BFS per target cell, shared by every agent in update()
+        self.flow_field = None
+
+        self.image = None
+        if image_path is not None:
+            import assets
+
+            # One scaled sprite for the whole table (shared with single ghosts too)
+            self.image = assets.load_image(image_path, (TILE_SIZE, TILE_SIZE))
+
+    def __len__(self):
+        return self.count
+
+    def add(self, row, col):
+        """
+        Add an agent on a cell.
+
+        Returns:
+            int: The agent's slot, used by the other methods.
+        """
+        cell_id = self.grid.cell_id(row, col)
+        self.count += 1
+        if self.free:
+            slot = self.free.pop()
+            self.cells[slot] = self.hops[slot] = cell_id
+            self.alive[slot] = 1
+            return slot
+        self.cells.append(cell_id)
+        self.hops.append(cell_id)
+        self.alive.append(1)
+        return len(self.cells) - 1
+
+    def remove(self, slot):
+        if not self.alive[slot]:
+            raise KeyError(f"No agent in slot {slot}")
+        self.alive[slot] = 0
+        self.free.append(slot)
+        self.count -= 1
+
+    def slots(self):
+        # Slots of the live agents, in slot order
+        alive = self.alive
+        return [slot for slot in range(len(alive)) if alive[slot]]
+
+    def position(self, slot):
+        # (row, col) of one agent
+        return self.grid.cell_pos(self.cells[slot])
+
+    @property
+    def positions(self):
+        # (row, col) of every live agent; meant for debugging and tests, not hot loops
+        cell_pos = self.grid.cell_pos
+        return [cell_pos(self.cells[slot]) for slot in self.slots()]
+
+    def plan(self, slot, goal, search=_a_star_ids):
+        """
+        Search a path for one agent and keep only its next hop.
+
+        Args:
+            slot (int): The agent.
+            goal (tuple): (row, col) to head for.
+            search (function): Search over cell ids with the _a_star_ids contract,
+                               (start_id, goal_id, grid) -> (path, expanded).
+
+        Returns:
+            tuple: (row, col) of the next hop (the agent's own cell if there is no path).
+        """
+        grid = self.grid
+        start_id = self.cells[slot]
+        path, expanded = search(start_id, grid.cell_id(*goal), grid)
+        self.hops[slot] = path[1] if len(path) > 1 else start_id
+        return grid.cell_pos(self.hops[slot])
+
+    def update(self, target):
+        """
+        Point every agent at the target through one shared flow field.
+
+        The field runs one BFS when the target changes cell; each agent's hop is
+        then a lookup. Call step() to move them.
+
+        Args:
+            target: An object with 'row' and 'col' attributes (e.g. the player).
+        """
+        if self.flow_field is None:
+            self.flow_field = FlowField(self.grid)
+        self.flow_field.update((target.row, target.col))
+        next_step_id = self.flow_field.next_step_id
+        cells, hops, alive = self.cells, self.hops, self.alive
+        for slot in range(len(cells)):
+            if alive[slot]:
+                hop = next_step_id(cells[slot])
+                hops[slot] = cells[slot] if hop is None else hop  # None: on the target or cut off
+
+    def step(self):
+        """
+        Move every agent to its next hop; it then stays there until the next plan.
+        """
+        # One copy of the whole column; dead slots move too, but nothing reads them
+        self.cells[:] = self.hops
+
+    def collides(self, target):
+        """
+        Return True if any agent is on the target's cell.
+        """
+        cell_id = self.grid.cell_id(target.row, target.col)
+        cells, alive = self.cells, self.alive
+        return any(alive[slot] for slot in range(len(cells)) if cells[slot] == cell_id)
+
+    def pixel_positions(self):
+        """
+        Return the top-left pixel of every live agent's tile as a list of (x, y).
+        """
+        stride = self.grid.stride
+        cells = self.cells
+        # -1 undoes the wall border
+        return [((cells[slot] % stride - 1) * TILE_SIZE, (cells[slot] // stride - 1) * TILE_SIZE)
+                for slot in self.slots()]
+
+    def draw(self, win):
+        """
+        Draw every agent with one Surface.blits call (a circle per agent for a headless table).
+
+        Returns:
+            list: The rectangles that were drawn (for dirty-rect rendering).
+        """
+        image = self.image
+        if image is None:
+            return draw_circles(win, self.pixel_positions())
+        return win.blits([(image, position) for position in self.pixel_positions()])
@@ -0,0 +1,312 @@
+from array import array
+from heapq import heappop, heappush
+
+from maze import get_grid
+from pathfinding import get_neighbor_table
+
+# Distance stored for cells that cannot reach the goal (and for walls)
+UNREACHABLE = -1
+
+# The all-pairs next-hop table needs one byte per (start, goal) pair of walkable
+# cells, so it is only built for mazes with at most this many walkable cells
+# (1024 cells -> 1 MB table)
+ALL_PAIRS_MAX_CELLS = 1024
+
+# Marker in the next-hop table for "no move" (start is the goal or unreachable)
+NO_HOP = 255
+
+
+def distance_field(goal, grid=None):
+    """
+    Run one breadth-first search outward from the goal cell.
+
+    Args:
+        goal (tuple): (row, col) of the cell every distance is measured to.
+        grid (Grid): The maze to search (defaults to the current level).
+
+    Returns:
+        array: array('i') indexed by cell id holding the number of steps from each
+               cell to the goal, or UNREACHABLE for walls and cut-off cells.
+    """
+    if grid is None:
+        grid = get_grid()
+    return _distance_field_ids(grid.cell_id(*goal), grid)
+
+
+def _distance_field_ids(goal_id, grid):
+    neighbor_table = get_neighbor_table(grid)
+    distances = array("i", [UNREACHABLE]) * grid.size
+    distances[goal_id] = 0
+
+    # Plain list used as a queue: cells are appended once and read in order,
+    # which avoids the per-item overhead of popping from a deque
+    queue = [goal_id]
+    for current in queue:
+        next_distance = distances[current] + 1
+        for neighbor in neighbor_table[current]:
+            if distances[neighbor] == UNREACHABLE:
+                distances[neighbor] = next_distance
+                queue.append(neighbor)
+    return distances
+
+
+def repair_distance_field(distances, goal_id, grid, changed):
+    """
+    Update a distance field in place after cells changed, instead of a new BFS.
+
+    Only the region whose distances actually change is touched:
+    1. Cells that became walls take away support: a cell at distance d keeps its
+       distance while a neighbor at d - 1 still does. Cells left without one are
+       cleared, nearest first, and the clearing spreads only through cells that
+       depended on them.
+    2. The cleared cells and any cells that opened get a distance from their
+       neighbors, and a Dijkstra wave from them lowers every distance that
+       improves. It stops where distances stay the same.
+
+    A door closing in a corridor near the goal can still clear everything
+    behind it; a door far from the goal touches a handful of cells.
+
+    Args:
+        distances (array): Field from distance_field for goal_id, updated in place.
+        goal_id (int): Cell id the field measures distances to.
+        grid (Grid): The maze after the edits.
+        changed (iterable): Ids of the edited cells, e.g. from grid.changed_since().
+
+    Returns:
+        int: Number of cells whose distance was recomputed.
+    """
+    cells = grid.cells
+    changed = set(changed)
+    if cells[goal_id] or goal_id in changed:
+        # A door closed or opened on the goal itself: every distance is new
+        distances[:] = _distance_field_ids(goal_id, grid)
+        return len(distances)
+    neighbor_table = get_neighbor_table(grid)
+
+    # Split by what changed compared with the field (a cell edited twice may not have)
+    walled = []
+    opened = []
+    for cell_id in changed:
+        if cells[cell_id]:
+            if distances[cell_id] != UNREACHABLE:
+                walled.append(cell_id)
+        elif distances[cell_id] == UNREACHABLE:
+            opened.append(cell_id)
+
+    # 1. Clear the cells that lost their only way to the goal, in distance order
+    cleared = []
+    heap = []
+    for cell_id in walled:
+        distances[cell_id] = UNREACHABLE
+        for neighbor in neighbor_table[cell_id]:
+            if distances[neighbor] > 0:
+                heappush(heap, (distances[neighbor], neighbor))
+    while heap:
+        distance, cell_id = heappop(heap)
+        if distances[cell_id] != distance:
+            continue  # Already cleared
+        neighbors = neighbor_table[cell_id]
+        if any(distances[neighbor] == distance - 1 for neighbor in neighbors):
+            continue  # Still one step from a cell that reaches the goal
+        distances[cell_id] = UNREACHABLE
+        cleared.append(cell_id)
+        for neighbor in neighbors:
+            if distances[neighbor] == distance + 1:
+                heappush(heap, (distance + 1, neighbor))
+
+    # 2. Seed the cleared and opened cells from their neighbors, then lower distances outward
+    for cell_id in cleared + opened:
+        reachable = [distances[neighbor] for neighbor in neighbor_table[cell_id]
+                     if distances[neighbor] != UNREACHABLE]
+        if reachable:
+            heappush(heap, (min(reachable) + 1, cell_id))
+    repaired = len(cleared)
+    while heap:
+        distance, cell_id = heappop(heap)
+        current = distances[cell_id]
+        if current != UNREACHABLE and current <= distance:
+            continue
+        distances[cell_id] = distance
+        repaired += 1
+        for neighbor in neighbor_table[cell_id]:
+            current = distances[neighbor]
+            if current == UNREACHABLE or current > distance + 1:
+                heappush(heap, (distance + 1, neighbor))
+    return repaired
+
+
+def _best_hop(cell_id, distances, neighbor_table):
+    #Return the index (into the neighbor tuple) of the neighbor closest to the goal,
+    #or None if the cell is the goal itself or cannot reach it.
+    current = distances[cell_id]
+    if current <= 0:
+        return None
+    for index, neighbor in enumerate(neighbor_table[cell_id]):
+        # Any neighbor one step closer is on a shortest path; take the first one
+        # (up, down, left, right) so both modes break ties the same way
+        if distances[neighbor] == current - 1:
+            return index
+    return None
+
+
+class NextHopTable:
+    def __init__(self, grid=None):
+        """
+        Precompute the first step of a shortest path between every pair of walkable cells.
+
+        Runs one BFS per walkable cell, so it costs O(cells^2) time and stores
+        one byte per pair. Meant to be built once at level load for small mazes.
+
+        Args:
+            grid (Grid): The maze to precompute (defaults to the current level).
+        """
+        if grid is None:
+            grid = get_grid()
+        self.grid = grid
+        neighbor_table = get_neighbor_table(grid)
+
+        # Dense index for every walkable cell so the table can be a flat bytearray
+        self.open_ids = grid.open_ids()
+        self.index_of = array("i", [-1]) * grid.size
+        for index, cell_id in enumerate(self.open_ids):
+            self.index_of[cell_id] = index
+        count = len(self.open_ids)
+
+        # hops[goal_index * count + start_index] = position of the best neighbor
+        # in neighbor_table[start], or NO_HOP
+        self.hops = bytearray([NO_HOP]) * (count * count)
+        for goal_index, goal_id in enumerate(self.open_ids):
+            distances = _distance_field_ids(goal_id, grid)
+            row = goal_index * count
+            for start_index, start_id in enumerate(self.open_ids):
+                hop = _best_hop(start_id, distances, neighbor_table)
+                if hop is not None:
+                    self.hops[row + start_index] = hop
+
+    def next_id(self, start_id, goal_id):
+        """
+        Return the id of the next cell from start toward goal, or None if there is no move.
+        """
+        start_index = self.index_of[start_id]
+        goal_index = self.index_of[goal_id]
+        if start_index < 0 or goal_index < 0:
+            return None
+        hop = self.hops[goal_index * len(self.open_ids) + start_index]
+        if hop == NO_HOP:
+            return None
+        return get_neighbor_table(self.grid)[start_id][hop]
+
+
+class FlowField:
+    def __init__(self, grid=None, precompute=False, max_cells=ALL_PAIRS_MAX_CELLS):
+        """
+        Shared guidance for any number of ghosts chasing the same target.
+
+        Instead of one A* search per ghost, the field runs a single BFS from the
+        target whenever the target changes cell, and every ghost then steps to its
+        neighbor with the lowest distance. With precompute=True (and a maze of at
+        most max_cells walkable cells) an all-pairs next-hop table is built up
+        front, and no search runs during play at all.
+
+        Args:
+            grid (Grid): The maze the ghosts move in (defaults to the current level).
+            precompute (bool): Build the all-pairs next-hop table at creation time.
+            max_cells (int): Largest number of walkable cells to build the table for.
+        """
+        if grid is None:
+            grid = get_grid()
+        self.grid = grid
+        self.goal_id = None  # Cell id the current distances lead to
+        self.distances = None
+        self.version = grid.version  # Grid version the field is up to date with
+
+        # Number of BFS runs so far (handy to check that N ghosts cost one search)
+        self.searches = 0
+        # Wall edits patched into the field without a BFS, and the cells that took
+        self.repairs = 0
+        self.repaired_cells = 0
+
+        self.next_hops = None
+        if precompute and len(grid.open_ids()) <= max_cells:
+            self.next_hops = NextHopTable(grid)
+
+    def update(self, goal):
+        """
+        Point the field at a new goal cell. Does nothing if the goal did not change.
+
+        Args:
+            goal (tuple): (row, col) of the target cell.
+        """
+        if self.grid.version != self.version:
+            self.sync()
+        goal_id = self.grid.cell_id(*goal)
+        if goal_id == self.goal_id:
+            return
+        self.goal_id = goal_id
+
+        # The precomputed table already knows every route; no search needed
+        if self.next_hops is None:
+            self.distances = _distance_field_ids(goal_id, self.grid)
+            self.searches += 1
+
+    def sync(self):
+        """
+        Bring the field up to date with wall edits (update() calls this).
+
+        The distances are repaired around the edited cells (see
+        repair_distance_field). A precomputed next-hop table cannot be patched
+        cheaply, so it is dropped and the field works by BFS from then on.
+        """
+        grid = self.grid
+        changed = grid.changed_since(self.version)
+        self.version = grid.version
+        if self.next_hops is not None:
+            self.next_hops = None
+            self.goal_id = None  # The next update() runs the BFS
+            return
+        if self.distances is None:
+            return
+        if changed is None:
+            self.distances = _distance_field_ids(self.goal_id, grid)
+            self.searches += 1
+        else:
+            self.repaired_cells += repair_distance_field(self.distances, self.goal_id, grid, changed)
+            self.repairs += 1
+
+    def next_step(self, cell):
+        """
+        Return the cell to move to from cell toward the goal.
+
+        Args:
+            cell (tuple): (row, col) of the moving agent.
+
+        Returns:
+            tuple: (row, col) of the next cell, or cell itself if it is already on the
+                   goal or the goal cannot be reached.
+        """
+        cell_id = self.grid.cell_id(*cell)
+        next_id = self.next_step_id(cell_id)
+        if next_id is None:
+            return cell
+        return self.grid.cell_pos(next_id)
+
+    def next_step_id(self, cell_id):
+        # Int-id version of next_step; returns None when there is no move
+        if self.goal_id is None:
+            return None
+        if self.next_hops is not None:
+            return self.next_hops.next_id(cell_id, self.goal_id)
+
+        neighbor_table = get_neighbor_table(self.grid)
+        hop = _best_hop(cell_id, self.distances, neighbor_table)
+        if hop is None:
+            return None
+        return neighbor_table[cell_id][hop]
+
+    def distance(self, cell):
+        """
+        Return the number of steps from cell to the goal, or UNREACHABLE.
+
+        Only available when the field is not using the precomputed table.
+        """
+        return self.distances[self.grid.cell_id(*cell)]
@@ -0,0 +1,134 @@
+import asyncio
+import math
+import time
+
+
+class FrameClock:
+    def __init__(self):
+        """
+        Frame limiter for coroutine-based loops (the asyncio version of pygame.time.Clock).
+
+        pygame's Clock.tick() sleeps the whole thread, so nothing else can run while
+        a frame waits for its turn. FrameClock.tick() awaits asyncio.sleep instead:
+        the time left in the frame goes to other tasks, such as assets finishing
+        loading on the executor.
+        """
+        self.last = None  # perf_counter() of the previous tick
+        self.frame_ms = 0  # Milliseconds between the last two ticks
+
+    async def tick(self, fps):
+        """
+        Wait until 1/fps seconds have passed since the previous tick.
+
+        Always yields to the event loop at least once, even when the frame ran late.
+
+        Returns:
+            int: Milliseconds since the previous tick (like pygame's Clock.tick).
+        """
+        now = time.perf_counter()
+        if self.last is None:
+            self.last = now
+        delay = self.last + 1 / fps - now
+        await asyncio.sleep(max(0.0, delay))
+
+        now = time.perf_counter()
+        self.frame_ms = int((now - self.last) * 1000)
+        self.last = now
+        return self.frame_ms
+
+    def get_time(self):
+        # Milliseconds the previous frame took (like pygame's Clock.get_time)
+        return self.frame_ms
+
+
+class FixedStep:
+    def __init__(self, rate, max_steps=5, adaptive=False, max_skipped=2, frame_rate=None):
+        """
+        Accumulator that runs game logic at a fixed rate, independent of the frame rate.
+
+        Every frame, advance() adds the real time since the previous frame to an
+        accumulator and returns how many whole logic steps fit into it; the
+        remainder carries over to the next frame. The logic therefore runs
+        'rate' steps per second whether frames come faster (several frames per
+        step, drawn with alpha for interpolation) or slower (several steps per
+        frame) than that.
+
+        Args:
+            rate (int): Logic steps per second.
+            max_steps (int): Most steps run in one frame. After a long stall the
+                             rest of the backlog is dropped (the game pauses
+                             instead of fast-forwarding through it).
+            adaptive (bool): Let should_render() skip drawing frames that had to
+                             catch up, so a slow renderer costs frames, not logic steps.
+            max_skipped (int): Most frames skipped in a row in adaptive mode.
+            frame_rate (int): Frame rate the loop aims for. A frame on time runs at
+                              most rate / frame_rate steps (rounded up); only frames
+                              running more than that count as behind.
+        """
+        self.step = 1 / rate  # Seconds of game time per logic step
+        self.max_steps = max_steps
+        self.adaptive = adaptive
+        self.max_skipped = max_skipped
+        self.frame_steps = math.ceil(rate / frame_rate) if frame_rate else 1  # Steps in a frame on time
+
+        self.accumulator = 0.0  # Real time not yet turned into logic steps
+        self.last = None  # perf_counter() of the previous advance()
+        self.due = 0  # Steps returned by the latest advance()
+        self.skipped = 0  # Frames skipped in a row so far
+
+        # Counters for tuning and tests
+        self.steps = 0
+        self.frames = 0
+        self.frames_skipped = 0
+        self.dropped = 0.0  # Seconds of backlog thrown away by max_steps
+
+    def advance(self, now=None):
+        """
+        Account for the time since the previous call.
+
+        Args:
+            now (float): Current time in seconds (defaults to time.perf_counter()).
+
+        Returns:
+            int: Number of logic steps to run this frame.
+        """
+        if now is None:
+            now = time.perf_counter()
+        if self.last is None:
+            self.last = now  # The first frame starts the clock; no time has passed yet
+        self.accumulator += now - self.last
+        self.last = now
+
+        # The small tolerance keeps float rounding from splitting a frame that is
+        # exactly one step long into a 0-step frame and a 2-step frame
+        due = int(self.accumulator / self.step + 1e-6)
+        if due > self.max_steps:
+            self.dropped += (due - self.max_steps) * self.step
+            self.accumulator -= (due - self.max_steps) * self.step
+            due = self.max_steps
+        self.accumulator -= due * self.step
+
+        self.due = due
+        self.steps += due
+        self.frames += 1
+        return due
+
+    @property
+    def alpha(self):
+        # How far (0..1) the current time is between the last logic step and the next one
+        return min(1.0, max(0.0, self.accumulator / self.step))
+
+    def should_render(self):
+        """
+        Return False if this frame should not be drawn (adaptive mode only).
+
+        A frame that had to run more steps than a frame on time is behind; skipping its
+        drawing gives the time back to the logic. At least every
+        (max_skipped + 1)-th frame is still drawn.
+        """
+        if self.adaptive and self.due > self.frame_steps and self.skipped < self.max_skipped:
+            self.skipped += 1
+            self.frames_skipped += 1
+            return False
+        self.skipped = 0
+        return True
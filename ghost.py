@@ -1,31 +1,81 @@
-import pygame
-from maze import TILE_SIZE
-from pathfinding import a_star
+from array import array
+
+from maze import TILE_SIZE, get_grid
+from pathfinding import a_star, IncrementalPlanner, split_changes
 
 class Ghost:
-    def __init__(self, row, col, image_path="public/ghost.png"):
+    # Fixed attributes instead of a per-instance __dict__; thousands of ghosts
+    # each save the dict (see entities.AgentTable for far larger crowds)
+    __slots__ = ("row", "col", "grid", "flow_field", "planner", "hierarchy", "search", "sight",
+                 "route", "version", "image")
+
+    def __init__(self, row, col, image_path="public/ghost.png", flow_field=None, incremental=False,
+                 grid=None, hierarchy=None, search=a_star, sight=None):
         """
         Initialize a Ghost object at a specific grid position.
 
         Args:
             row (int): The row index of the ghost in the grid.
             col (int): The column index of the ghost in the grid.
-            image_path (str): File path to the ghost image.
+            image_path (str): File path to the ghost image, or None for a ghost
+                              without a sprite (headless simulation).
+            flow_field (FlowField): Optional field shared by all ghosts chasing the
+                                    same target. When given, the ghost follows it
+                                    instead of running its own A* search.
+            incremental (bool): Keep the path between updates and repair it when the
+                                target moves instead of searching from scratch.
+            grid (Grid): The maze the ghost moves in (defaults to the current level).
+            hierarchy (HierarchicalPlanner): Optional HPA* planner shared by all ghosts
+                                             on a large level. When given, the ghost
+                                             asks it for the next hop instead of
+                                             running a full A* search.
+            search (function): Path search used when no other mode is chosen,
+                               a_star, jump_point_search, bidirectional_a_star or
+                               bidirectional_bfs (same arguments and result).
+            sight (Visibility): Optional line-of-sight tables for the level. When given,
+                                the ghost only plans toward the target while it can
+                                see it, and otherwise keeps walking to the cell where
+                                it last saw the target. If a wall appears on that
+                                route, only then does the ghost search again.
         """
         # Set initial grid position of the ghost
         self.row = row
         self.col = col
 
-        # List to store the current path to the player (each element is a (row, col) tuple)
-        self.path = []
+        # Maze the ghost searches in
+        self.grid = grid if grid is not None else get_grid()
+
+        # Shared flow field (None means "use A*")
+        self.flow_field = flow_field
+
+        # Per-ghost incremental planner; its counters show how much search was saved
+        self.planner = IncrementalPlanner(self.grid) if incremental else None
+
+        # Shared hierarchical planner (built once per level)
+        self.hierarchy = hierarchy
+
+        # Full search used by the default mode
+        self.search = search
+
+        # Line-of-sight tables (None means the ghost always knows where the target is)
+        self.sight = sight
 
-        # Load the ghost image from the given file path
-        # convert_alpha() is used to keep transparency if the image has any
-        self.image = pygame.image.load(image_path).convert_alpha()
+        # Current route to the player as cell ids, route[0] is the cell the ghost
+        # stepped from. Only sight mode walks an old route, so the other modes keep
+        # just the next hop instead of the whole path (see path for tuples)
+        self.route = array("i")
+        self.version = self.grid.version  # Grid version the route was planned on
 
-        # Scale the loaded image to match the tile size of the grid
-        # This ensures the image fits perfectly inside one grid tile
-        self.image = pygame.transform.scale(self.image, (TILE_SIZE, TILE_SIZE))
+        self.image = None
+        if image_path is None:
+            return
+
+        # pygame and the asset cache are only needed for the sprite, so headless ghosts never import them
+        import assets
+
+        # Load the ghost image scaled to the tile size of the grid.
+        # The asset cache loads it once; every ghost shares the same Surface
+        self.image = assets.load_image(image_path, (TILE_SIZE, TILE_SIZE))
 
     def update(self, target):
         """
@@ -33,7 +83,9 @@ class Ghost:
 
         Uses the A* pathfinding algorithm to find the shortest path from the ghost
         to the target's current grid position, then moves the ghost one step along
-        that path.
+        that path. If the ghost was given a flow field, the next step is read from
+        the shared field instead of searching, and in incremental mode the previous
+        path is repaired.
 
         Args:
             target: An object that has 'row' and 'col' attributes representing
@@ -45,16 +97,74 @@ class Ghost:
         # Target's position as a tuple (row, col)
         goal = (target.row, target.col)
 
-        # Use the A* algorithm to calculate the shortest path from ghost to target
-        # The returned path is a list of grid coordinates from start to goal
-        self.path = a_star(start, goal)
+        sight = self.sight
+        if sight is not None and sight.version != self.grid.version:
+            sight.sync()  # Walls changed; patch the line-of-sight tables first
+
+        if sight is not None and not sight.sees(start, goal):
+            # Out of sight: follow the rest of the last route, toward where the target was last seen
+            start_id = self.grid.cell_id(*start)
+            route = self.route
+            self.route = route[1:] if len(route) > 1 and route[1] == start_id else array("i", (start_id,))
+            if self.version != self.grid.version:
+                self._check_route()
+            if len(self.route) > 1:
+                self.row, self.col = self.grid.cell_pos(self.route[1])
+            return
+
+        if self.flow_field is not None:
+            # Flow field mode: the field runs at most one BFS when the target changes
+            # cell, then the next step is a lookup of the lowest-distance neighbor
+            self.flow_field.update(goal)
+            next_node = self.flow_field.next_step(start)
+            path = [start] if next_node == start else [start, next_node]
+        elif self.planner is not None:
+            # Incremental mode: repair the previous path where possible
+            path = self.planner.plan(start, goal)
+        elif self.hierarchy is not None:
+            # Hierarchical mode: only the first abstract hop is turned into cells
+            path = self.hierarchy.plan(start, goal)
+        else:
+            # Use the A* algorithm (or the chosen search) to calculate the shortest path from ghost to target
+            # The returned path is a list of grid coordinates from start to goal
+            path = self.search(start, goal, self.grid)
+
+        # Keep the route as cell ids: the whole path if sight mode may walk it
+        # later, otherwise only the cell the ghost is on and the next one
+        if self.sight is None:
+            path = path[:2]
+        cell_id = self.grid.cell_id
+        self.route = array("i", [cell_id(row, col) for row, col in path])
+        self.version = self.grid.version
 
         # If the path exists and is longer than 1 step (meaning the ghost is not
         # already on the target), move the ghost to the next node on the path
-        if len(self.path) > 1:
-            next_node = self.path[1]  # path[0] is current position, so path[1] is next step
+        if len(path) > 1:
+            next_node = path[1]  # path[0] is current position, so path[1] is next step
             self.row, self.col = next_node
 
+    def _check_route(self):
+        #Walls changed since the route was planned: search again only if a new wall
+        #blocks it. Ghosts whose routes miss the edited cells keep walking them.
+        grid = self.grid
+        changed = grid.changed_since(self.version)
+        self.version = grid.version
+        route = self.route
+        if len(route) < 2:
+            return
+        if changed is not None:
+            walled, opened = split_changes(grid, changed)
+            if walled.isdisjoint(route):
+                return
+        path = self.search(grid.cell_pos(route[0]), grid.cell_pos(route[-1]), grid)
+        cell_id = grid.cell_id
+        self.route = array("i", [cell_id(row, col) for row, col in path])
+
+    @property
+    def path(self):
+        # The current route as (row, col) tuples; meant for debugging and tests, not hot loops
+        return [self.grid.cell_pos(cell_id) for cell_id in self.route]
+
     def draw(self, win):
         #Draw the ghost's image on the game window at its current position.
         #Args:
@@ -0,0 +1,203 @@
+from array import array
+from bisect import bisect_right
+
+# Cell values stored in the grid
+OPEN = 0  # Walkable tile
+WALL = 1  # Impassable tile
+
+# Most single-cell edits remembered for incremental updates (see Grid.changed_since);
+# caches that fall further behind rebuild from scratch
+MAX_CHANGES = 1 << 16
+
+
+class Grid:
+    def __init__(self, rows, cols, cells=None):
+        """
+        Compact maze storage: every cell is one byte in a flat bytearray.
+
+        The grid is surrounded by a one-tile wall border, so looking one step
+        outside the maze always lands on a wall and callers never need bounds checks.
+        A cell can be addressed either by its (row, col) tuple or by its integer
+        cell id, which is the index of the cell in the padded bytearray:
+        cell_id = (row + 1) * stride + (col + 1).
+
+        Args:
+            rows (int): Number of rows in the maze (without the border).
+            cols (int): Number of columns in the maze (without the border).
+            cells (bytearray): Optional padded cell data of size (rows + 2) * (cols + 2).
+                               When omitted the grid starts as all walls.
+        """
+        self.rows = rows
+        self.cols = cols
+
+        # Width of one padded row; moving one row up or down is -stride / +stride
+        self.stride = cols + 2
+        self.size = (rows + 2) * self.stride
+
+        if cells is None:
+            cells = bytearray([WALL]) * self.size
+        elif len(cells) != self.size:
+            raise ValueError(f"Expected {self.size} cells for a {rows}x{cols} grid, got {len(cells)}")
+        self.cells = cells
+
+        # Id offsets to the up, down, left and right neighbor (same order as pathfinding uses)
+        self.offsets = (-self.stride, self.stride, -1, 1)
+
+        # Change counter for caches built from the cells. Edits through set_cell()
+        # or toggle() bump it and log the cell, so caches can update just around it;
+        # call bump_version() after other edits so caches throw their results away
+        self.version = 0
+
+        # Log of single-cell edits, oldest first: the version each edit produced
+        # and the edited cell id. Every edit after version log_start is in the log
+        self.change_versions = array("i")
+        self.change_ids = array("i")
+        self.log_start = 0
+
+    def bump_version(self):
+        # Mark the cells as changed without saying which; caches built before rebuild
+        self.version += 1
+        self.log_start = self.version
+        del self.change_versions[:]
+        del self.change_ids[:]
+
+    def set_cell(self, row, col, value):
+        """
+        Make a cell a wall or open it while the game runs (doors, destructible walls).
+
+        The edit is logged, so caches built from the grid (neighbor table, flow
+        fields, cached paths, line of sight) update only around the cell.
+
+        Args:
+            row (int): Row of the cell.
+            col (int): Column of the cell.
+            value (int): WALL or OPEN.
+
+        Returns:
+            bool: True if the cell changed.
+        """
+        if not self.in_bounds(row, col):
+            raise ValueError(f"({row}, {col}) is outside the {self.rows}x{self.cols} grid")
+        cell_id = self.cell_id(row, col)
+        if self.cells[cell_id] == value:
+            return False
+        self.cells[cell_id] = value
+        self.mark_changed((cell_id,))
+        return True
+
+    def toggle(self, row, col):
+        # Open a wall or close an open cell (e.g. a door); returns the new value
+        value = OPEN if self.is_wall(row, col) else WALL
+        self.set_cell(row, col, value)
+        return value
+
+    def mark_changed(self, cell_ids):
+        """
+        Log cells whose values were written into self.cells directly, as one new version.
+        """
+        self.version += 1
+        for cell_id in cell_ids:
+            self.change_versions.append(self.version)
+            self.change_ids.append(cell_id)
+
+        if len(self.change_ids) > MAX_CHANGES:
+            # Forget the older half (whole versions only); caches that far behind rebuild
+            cut = bisect_right(self.change_versions, self.change_versions[len(self.change_ids) // 2])
+            self.log_start = self.change_versions[cut - 1]
+            del self.change_versions[:cut]
+            del self.change_ids[:cut]
+
+    def changed_since(self, version):
+        """
+        Return the ids of the cells edited after a version.
+
+        Args:
+            version (int): The grid version a cache was built from.
+
+        Returns:
+            array: Cell ids in edit order (a cell edited twice is listed twice), or
+                   None if the log does not reach back that far and the cache has
+                   to rebuild.
+        """
+        if version < self.log_start:
+            return None
+        return self.change_ids[bisect_right(self.change_versions, version):]
+
+    @classmethod
+    def from_rows(cls, maze):
+        """
+        Build a Grid from a 2D list where 0 is a path and 1 is a wall.
+
+        Args:
+            maze (list): List of rows, each a list of 0/1 values.
+
+        Returns:
+            Grid: The packed grid.
+        """
+        rows = len(maze)
+        cols = len(maze[0]) if rows else 0
+        grid = cls(rows, cols)
+        for row, values in enumerate(maze):
+            start = grid.cell_id(row, 0)
+            grid.cells[start:start + cols] = bytes(WALL if value else OPEN for value in values)
+        return grid
+
+    def to_rows(self):
+        """
+        Return the maze as a 2D list of 0/1 values (without the border).
+        """
+        return [list(self.cells[self.cell_id(row, 0):self.cell_id(row, 0) + self.cols])
+                for row in range(self.rows)]
+
+    # ---- Tuple API -------------------------------------------------------
+
+    def cell_id(self, row, col):
+        # Convert a (row, col) position into its integer cell id
+        return (row + 1) * self.stride + col + 1
+
+    def cell_pos(self, cell_id):
+        # Convert an integer cell id back into its (row, col) position
+        row, col = divmod(cell_id, self.stride)
+        return row - 1, col - 1
+
+    def in_bounds(self, row, col):
+        # True if (row, col) is inside the maze (the border does not count)
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def is_wall(self, row, col):
+        # Positions one step outside the maze read the border, which is a wall
+        return self.cells[(row + 1) * self.stride + col + 1] != OPEN
+
+    def is_open(self, row, col):
+        return self.cells[(row + 1) * self.stride + col + 1] == OPEN
+
+    def neighbors(self, cell):
+        """
+        Return the walkable neighbors of a (row, col) cell as tuples.
+
+        Neighbors are listed up, down, left, right.
+        """
+        row, col = cell
+        cells = self.cells
+        cell_id = (row + 1) * self.stride + col + 1
+        return [self.cell_pos(cell_id + offset) for offset in self.offsets
+                if cells[cell_id + offset] == OPEN]
+
+    # ---- Integer id API (for hot loops) ------------------------------------
+
+    def is_open_id(self, cell_id):
+        return self.cells[cell_id] == OPEN
+
+    def neighbor_ids(self, cell_id):
+        """
+        Return the walkable neighbor ids of an interior cell id, up, down, left, right.
+        """
+        cells = self.cells
+        return [cell_id + offset for offset in self.offsets if cells[cell_id + offset] == OPEN]
+
+    def open_ids(self):
+        """
+        Return an array('i') with the id of every walkable cell, in row-major order.
+        """
+        cells = self.cells
+        return array("i", (cell_id for cell_id in range(self.size) if cells[cell_id] == OPEN))
@@ -0,0 +1,467 @@
+from array import array
+from heapq import heappop, heappush
+from operator import sub
+
+from maze import get_grid
+from pathfinding import get_neighbor_table, _a_star_ids
+
+# Distance stored for cluster cells an entrance cannot reach
+UNREACHED = 0xFFFF
+
+# Border openings at least this wide get an entrance at both ends instead of one
+# in the middle, so routes along a wide opening do not detour through its center
+WIDE_ENTRANCE = 6
+
+# Distance to a landmark from nodes it cannot reach
+FAR = 2 ** 30
+
+# Markers for the start and goal of a query in the abstract search
+_START = -1
+_GOAL = -2
+
+
+class HierarchicalPlanner:
+    def __init__(self, grid=None, cluster_size=16, tolerance=0.0, landmarks=8):
+        """
+        HPA* path planner for large mazes.
+
+        The grid is split into square clusters. At creation time every opening
+        between two neighboring clusters gets one or two entrance cells, and a
+        breadth-first search inside each cluster measures the distance from every
+        entrance to every cell of its cluster. The entrances and those distances
+        form a small abstract graph.
+
+        A query connects the start and goal to the entrances of their clusters
+        (a table lookup, no search), runs A* on the abstract graph, and turns only
+        the first abstract hop back into cells by walking down the stored distances.
+        Ghosts only ever move to path[1], so the rest of the route stays abstract.
+
+        The abstract search is guided by landmarks: a few far-apart entrances whose
+        distance to every other entrance is stored at creation time. By the triangle
+        inequality |d(L, node) - d(L, goal)| never overestimates, and in mazes it is
+        a much tighter estimate than the Manhattan distance.
+
+        Queries within the same or a neighboring cluster first try a direct A*
+        capped at one cluster's worth of cells; when it reaches the goal the
+        path is exact. Other routes must pass through entrance cells and can be
+        longer than the shortest path. Measured at tolerance 0: about 5% of
+        long queries on loopy mazes, at most 1.2x the shortest length. On
+        rooms levels it is about half of the long queries, up to 1.9x, because
+        a wide room border gets only one or two entrances. Nearby queries that
+        the capped A* does not settle can reach 1.75x.
+
+        The abstract graph is built for fixed walls; build a new planner after
+        walls change (doors are better served by FlowField or PathCache, which
+        update incrementally).
+
+        Args:
+            grid (Grid): The maze to plan in (defaults to the current level).
+            cluster_size (int): Width and height of a cluster in cells (at most 255).
+            tolerance (float): Let the abstract search return a route up to
+                               (1 + tolerance) times the best one through the
+                               entrances; larger values expand fewer nodes.
+            landmarks (int): Number of landmarks for the search heuristic (0 uses
+                             the Manhattan distance only).
+        """
+        if grid is None:
+            grid = get_grid()
+        if not 1 < cluster_size <= 255:
+            raise ValueError(f"cluster_size must be between 2 and 255, got {cluster_size}")
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.tolerance = tolerance
+        self.neighbor_table = get_neighbor_table(grid)
+
+        self.cluster_cols = -(-grid.cols // cluster_size)
+        self.cluster_rows = -(-grid.rows // cluster_size)
+        self._index_cells()
+
+        # Abstract graph: node index -> cell id, edges and distance array
+        self.node_cells = []
+        self.node_edges = []  # Tuple of (node, cost) pairs per node
+        self.node_distances = None  # array('H') over the node's cluster, UNREACHED if cut off
+        self.cluster_nodes = [[] for _ in range(self.cluster_rows * self.cluster_cols)]
+        self._node_of = {}  # cell id -> node index
+        self._build_graph()
+
+        # Per node, a tuple with its distance to every landmark
+        self.landmarks = []
+        self.landmark_distances = [()] * len(self.node_cells)
+        if landmarks and self.node_cells:
+            self._pick_landmarks(landmarks)
+
+        # Cells a direct A* may expand for a nearby query: one cluster's worth
+        self.local_limit = cluster_size * cluster_size
+
+        # Counters, see stats()
+        self.queries = 0
+        self.direct_queries = 0  # Nearby queries answered by the direct A*
+        # Nodes expanded: abstract nodes, plus the cells a direct A* expanded
+        self.expansions = 0  # Over all queries
+        self.last_expansions = 0  # By the latest query
+        self.direct_expansions = 0  # Cells expanded by direct A* searches, found or not
+
+    def _index_cells(self):
+        #Precompute, for every cell id, its cluster index and its index inside the cluster.
+        grid = self.grid
+        size = self.cluster_size
+        # Border cells get cluster -1, so searches never step onto them
+        self.cluster_of = array("i", [-1]) * grid.size
+        self.local_of = array("H", [0]) * grid.size
+
+        # The pattern along a row only depends on the column, so build it once
+        column_clusters = [col // size for col in range(grid.cols)]
+        column_locals = [col % size for col in range(grid.cols)]
+        for row in range(grid.rows):
+            start = grid.cell_id(row, 0)
+            first_cluster = (row // size) * self.cluster_cols
+            first_local = (row % size) * size
+            self.cluster_of[start:start + grid.cols] = array(
+                "i", [first_cluster + cluster for cluster in column_clusters])
+            self.local_of[start:start + grid.cols] = array(
+                "H", [first_local + local for local in column_locals])
+
+    def _add_node(self, cell_id):
+        node = self._node_of.get(cell_id)
+        if node is None:
+            node = len(self.node_cells)
+            self._node_of[cell_id] = node
+            self.node_cells.append(cell_id)
+            self.node_edges.append([])
+            self.cluster_nodes[self.cluster_of[cell_id]].append(node)
+        return node
+
+    def _add_entrances(self, pairs):
+        #pairs: (cell, cell across the border) ids of one opening, in order along the border.
+        if len(pairs) < WIDE_ENTRANCE:
+            chosen = (pairs[len(pairs) // 2],)
+        else:
+            chosen = (pairs[0], pairs[-1])
+        for inside, outside in chosen:
+            node_a = self._add_node(inside)
+            node_b = self._add_node(outside)
+            self.node_edges[node_a].append((node_b, 1))
+            self.node_edges[node_b].append((node_a, 1))
+
+    def _find_entrances(self):
+        #Scan every border between neighboring clusters for runs of cells open on both sides.
+        grid = self.grid
+        cells = grid.cells
+        size = self.cluster_size
+        stride = grid.stride
+
+        # Horizontal borders: (row - 1, col) above, (row, col) below
+        for row in range(size, grid.rows, size):
+            run = []
+            for col in range(grid.cols):
+                upper = grid.cell_id(row - 1, col)
+                if col % size == 0 and run:
+                    self._add_entrances(run)  # Openings never span two clusters
+                    run = []
+                if cells[upper] == 0 and cells[upper + stride] == 0:
+                    run.append((upper, upper + stride))
+                elif run:
+                    self._add_entrances(run)
+                    run = []
+            if run:
+                self._add_entrances(run)
+
+        # Vertical borders: (row, col - 1) to the left, (row, col) to the right
+        for col in range(size, grid.cols, size):
+            run = []
+            for row in range(grid.rows):
+                left = grid.cell_id(row, col - 1)
+                if row % size == 0 and run:
+                    self._add_entrances(run)
+                    run = []
+                if cells[left] == 0 and cells[left + 1] == 0:
+                    run.append((left, left + 1))
+                elif run:
+                    self._add_entrances(run)
+                    run = []
+            if run:
+                self._add_entrances(run)
+
+    def _build_graph(self):
+        self._find_entrances()
+
+        # Intra-cluster edges: one BFS per entrance, kept for refining paths later
+        self.node_distances = [None] * len(self.node_cells)
+        for cluster, nodes in enumerate(self.cluster_nodes):
+            for node in nodes:
+                distances = self._cluster_bfs(self.node_cells[node], cluster)
+                self.node_distances[node] = distances
+                for other in nodes:
+                    if other != node:
+                        distance = distances[self.local_of[self.node_cells[other]]]
+                        if distance != UNREACHED:
+                            self.node_edges[node].append((other, distance))
+
+        # Tuples are smaller than lists and never change after loading
+        self.node_edges = [tuple(edges) for edges in self.node_edges]
+
+    def _pick_landmarks(self, count):
+        #Choose landmarks far from each other: each new one is the node farthest
+        #from every landmark picked so far.
+        columns = []
+        nearest = self._dijkstra(0)  # Start from an arbitrary node; it is not kept
+        for _ in range(count):
+            landmark = max(range(len(nearest)), key=lambda node: nearest[node] if nearest[node] < FAR else -1)
+            if landmark in self.landmarks:
+                break  # Fewer reachable nodes than landmarks
+            distances = self._dijkstra(landmark)
+            self.landmarks.append(landmark)
+            columns.append(distances)
+            nearest = distances if len(columns) == 1 else list(map(min, nearest, distances))
+        self.landmark_distances = list(zip(*columns))
+
+    def _dijkstra(self, source):
+        #Distance from source to every node of the abstract graph (FAR if unreachable).
+        node_edges = self.node_edges
+        distances = [FAR] * len(self.node_cells)
+        distances[source] = 0
+        frontier = [(0, source)]
+        while frontier:
+            cost, current = heappop(frontier)
+            if cost > distances[current]:
+                continue
+            for neighbor, step in node_edges[current]:
+                new_cost = cost + step
+                if new_cost < distances[neighbor]:
+                    distances[neighbor] = new_cost
+                    heappush(frontier, (new_cost, neighbor))
+        return distances
+
+    def _cluster_bfs(self, source, cluster):
+        #Breadth-first search from source that never leaves the cluster.
+        #Returns:
+            #array: array('H') indexed by local cell index with the number of steps
+                   #from source, or UNREACHED
+        neighbor_table = self.neighbor_table
+        cluster_of = self.cluster_of
+        local_of = self.local_of
+        distances = array("H", [UNREACHED]) * (self.cluster_size * self.cluster_size)
+        distances[local_of[source]] = 0
+
+        queue = [source]
+        for current in queue:
+            next_distance = distances[local_of[current]] + 1
+            for neighbor in neighbor_table[current]:
+                if cluster_of[neighbor] == cluster:
+                    local = local_of[neighbor]
+                    if distances[local] == UNREACHED:
+                        distances[local] = next_distance
+                        queue.append(neighbor)
+        return distances
+
+    def stats(self):
+        """
+        Return the size of the abstract graph and the query counters as a dict.
+        """
+        return {
+            "clusters": len(self.cluster_nodes),
+            "nodes": len(self.node_cells),
+            "edges": sum(len(edges) for edges in self.node_edges),
+            "landmarks": len(self.landmarks),
+            "queries": self.queries,
+            "direct_queries": self.direct_queries,
+            "direct_expansions": self.direct_expansions,
+            "expansions": self.expansions,
+            "expansions_per_query": self.expansions / self.queries if self.queries else 0.0,
+        }
+
+    def plan(self, start, goal, full=False):
+        """
+        Return the start of a path from start to goal.
+
+        Args:
+            start (tuple): (row, col) of the agent.
+            goal (tuple): (row, col) of the target.
+            full (bool): Refine the whole route instead of only its first hop.
+
+        Returns:
+            list of tuples: Cells from start up to the first abstract waypoint (or the
+                            whole route with full=True), or [] if the goal is unreachable.
+                            path[1] is always the next step on the route.
+        """
+        grid = self.grid
+        path = self.plan_ids(grid.cell_id(*start), grid.cell_id(*goal), full)
+        return [grid.cell_pos(cell_id) for cell_id in path]
+
+    def plan_ids(self, start, goal, full=False):
+        # Int-id version of plan()
+        self.queries += 1
+        self.last_expansions = 0
+        if start == goal:
+            return [start] if self.grid.is_open_id(start) else []
+        if not (self.grid.is_open_id(start) and self.grid.is_open_id(goal)):
+            return []
+
+        # Ghosts chase at short range, and there routes forced through entrance
+        # cells are worst (a 1-step move across a cluster border can come back as
+        # 5 steps). In the same or a neighboring cluster, first try a plain A*
+        # capped at local_limit expansions: if it finds the goal, the path is exact
+        if self._nearby(start, goal):
+            path, expanded = _a_star_ids(start, goal, self.grid, self.local_limit)
+            self.last_expansions += expanded
+            self.expansions += expanded
+            self.direct_expansions += expanded
+            if path:
+                self.direct_queries += 1
+                return path
+
+        waypoints, goal_distances = self._search(start, goal)
+        if not waypoints:
+            return []
+
+        # A start on an entrance cell gives a zero-length first hop, so keep
+        # refining until the path has a next step
+        path = [start]
+        for index in range(len(waypoints) - 1):
+            if len(path) > 1 and not full:
+                break
+            path.extend(self._refine(waypoints[index], waypoints[index + 1], goal_distances)[1:])
+        return path
+
+    def _nearby(self, start, goal):
+        # True if the two cells are in the same cluster or in touching clusters
+        cluster_cols = self.cluster_cols
+        start_row, start_col = divmod(self.cluster_of[start], cluster_cols)
+        goal_row, goal_col = divmod(self.cluster_of[goal], cluster_cols)
+        return abs(start_row - goal_row) <= 1 and abs(start_col - goal_col) <= 1
+
+    def _search(self, start, goal):
+        #A* over the entrances, with start and goal linked in through the distance tables.
+        #Returns:
+            #tuple: (waypoints, goal_distances) where waypoints are the cell ids of the
+                   #route from start to goal ([] if there is none), and goal_distances
+                   #is the in-cluster BFS from goal if start and goal share a cluster
+        cluster_of = self.cluster_of
+        local_of = self.local_of
+        node_cells = self.node_cells
+        node_edges = self.node_edges
+        node_distances = self.node_distances
+        stride = self.grid.stride
+        weight = 1.0 + self.tolerance
+        goal_row, goal_col = divmod(goal, stride)
+
+        # Entrances of the goal's cluster and their distance to the goal
+        goal_cluster = cluster_of[goal]
+        goal_local = local_of[goal]
+        goal_links = {}
+        for node in self.cluster_nodes[goal_cluster]:
+            distance = node_distances[node][goal_local]
+            if distance != UNREACHED:
+                goal_links[node] = distance
+
+        # Landmark distances of the goal, through its best entrance
+        landmark_distances = self.landmark_distances
+        goal_landmarks = None
+        if goal_links and self.landmarks:
+            goal_landmarks = [min(landmark_distances[node][index] + distance for node, distance in goal_links.items())
+                              for index in range(len(self.landmarks))]
+
+        estimates = {}
+
+        def estimate(node):
+            #Weighted lower bound on the distance from node to the goal (memoized per query).
+            value = estimates.get(node)
+            if value is None:
+                node_row, node_col = divmod(node_cells[node], stride)
+                value = abs(node_row - goal_row) + abs(node_col - goal_col)
+                if goal_landmarks is not None:
+                    value = max(value, max(map(abs, map(sub, landmark_distances[node], goal_landmarks))))
+                value *= weight
+                estimates[node] = value
+            return value
+
+        frontier = []
+        cost_so_far = {}
+        came_from = {}
+
+        # Same cluster: the route that never leaves the cluster is a candidate too
+        goal_distances = None
+        if cluster_of[start] == goal_cluster:
+            goal_distances = self._cluster_bfs(goal, goal_cluster)
+            distance = goal_distances[local_of[start]]
+            if distance != UNREACHED:
+                cost_so_far[_GOAL] = distance
+                came_from[_GOAL] = _START
+                heappush(frontier, (distance, distance, _GOAL))
+
+        # Seed the search with every entrance the start can reach inside its cluster
+        start_local = local_of[start]
+        for node in self.cluster_nodes[cluster_of[start]]:
+            distance = node_distances[node][start_local]
+            if distance != UNREACHED:
+                cost_so_far[node] = distance
+                came_from[node] = _START
+                heappush(frontier, (distance + estimate(node), distance, node))
+
+        explored = set()
+        while frontier:
+            x, cost, current = heappop(frontier)
+            if current in explored:
+                continue  # Stale entry, a cheaper route was already expanded
+            explored.add(current)
+
+            if current == _GOAL:
+                self.last_expansions += len(explored)
+                self.expansions += len(explored)
+                route = []
+                while current != _START:
+                    route.append(goal if current == _GOAL else node_cells[current])
+                    current = came_from[current]
+                route.append(start)
+                return route[::-1], goal_distances
+
+            for neighbor, step in node_edges[current]:
+                new_cost = cost + step
+                if new_cost < cost_so_far.get(neighbor, new_cost + 1):
+                    cost_so_far[neighbor] = new_cost
+                    came_from[neighbor] = current
+                    heappush(frontier, (new_cost + estimate(neighbor), new_cost, neighbor))
+
+            # Entrances of the goal's cluster lead straight to the goal
+            distance = goal_links.get(current)
+            if distance is not None:
+                new_cost = cost + distance
+                if new_cost < cost_so_far.get(_GOAL, new_cost + 1):
+                    cost_so_far[_GOAL] = new_cost
+                    came_from[_GOAL] = current
+                    heappush(frontier, (new_cost, new_cost, _GOAL))
+
+        self.last_expansions += len(explored)
+        self.expansions += len(explored)
+        return [], None
+
+    def _refine(self, source, target, goal_distances):
+        #Turn one abstract hop into cells (source and target included).
+        if self.cluster_of[source] != self.cluster_of[target]:
+            return [source, target]  # Entrance pair across a cluster border
+        node = self._node_of.get(target)
+        if node is not None:
+            return self._descend(source, self.node_distances[node])
+        node = self._node_of.get(source)
+        if node is not None:
+            # Last hop into the goal: walk from the goal to the entrance and turn it around
+            return self._descend(target, self.node_distances[node])[::-1]
+        return self._descend(source, goal_distances)
+
+    def _descend(self, cell_id, distances):
+        #Follow decreasing distances from cell_id down to the cell where they are 0.
+        neighbor_table = self.neighbor_table
+        cluster_of = self.cluster_of
+        local_of = self.local_of
+        cluster = cluster_of[cell_id]
+        path = [cell_id]
+        distance = distances[local_of[cell_id]]
+        while distance:
+            distance -= 1
+            # Up, down, left, right order, the same tie-break as the flow field
+            for neighbor in neighbor_table[cell_id]:
+                if cluster_of[neighbor] == cluster and distances[local_of[neighbor]] == distance:
+                    cell_id = neighbor
+                    break
+            path.append(cell_id)
+        return path
@@ -0,0 +1,397 @@
+import mmap
+import random
+import struct
+
+from grid import Grid, OPEN, WALL
+
+# ---- On-disk format -------------------------------------------------------------
+#
+# Header (little endian, 24 bytes):
+#   magic   4 bytes  b"GCLV"
+#   version uint16   FORMAT_VERSION
+#   kind    uint16   Index into ALGORITHMS of the generator (0xFFFF if hand-made)
+#   rows    uint32
+#   cols    uint32
+#   seed    uint64   Seed the level was generated from (0 if hand-made)
+#
+# Body: one bit per cell (1 = wall), row by row, most significant bit first.
+# Every row starts on a byte boundary, so row r begins at HEADER.size + r * row_bytes.
+
+MAGIC = b"GCLV"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHIIQ")
+HAND_MADE = 0xFFFF
+
+ALGORITHMS = ("backtracker", "prim", "rooms")
+
+# bytes.translate tables between grid cells (0/1 bytes) and ASCII "0"/"1"
+_CELLS_TO_ASCII = bytes.maketrans(bytes([OPEN, WALL]), b"01")
+_ASCII_TO_CELLS = bytes.maketrans(b"01", bytes([OPEN, WALL]))
+
+
+# ---- Generators -------------------------------------------------------------------
+
+def generate_backtracker(rows, cols, rng, loop_ratio=0.0):
+    """
+    Maze with long winding corridors (randomized depth-first search).
+
+    Args:
+        rows (int): Number of rows (including the outer wall).
+        cols (int): Number of columns (including the outer wall).
+        rng (random.Random): Source of randomness.
+        loop_ratio (float): Share of the remaining inner walls to open afterwards,
+                            so there is more than one route between cells.
+
+    Returns:
+        Grid: The generated maze.
+    """
+    grid = Grid(rows, cols)
+    cells = grid.cells
+    stride = grid.stride
+
+    start = grid.cell_id(1, 1)
+    cells[start] = OPEN
+    stack = [start]
+    steps = (-2 * stride, 2 * stride, -2, 2)
+    while stack:
+        current = stack[-1]
+        options = []
+        for step in steps:
+            next_row, next_col = grid.cell_pos(current + step)
+            if 1 <= next_row < rows - 1 and 1 <= next_col < cols - 1 and cells[current + step] != OPEN:
+                options.append(step)
+        if not options:
+            stack.pop()
+            continue
+        step = rng.choice(options)
+        cells[current + step // 2] = OPEN  # Knock down the wall in between
+        cells[current + step] = OPEN
+        stack.append(current + step)
+
+    if loop_ratio:
+        _add_loops(grid, rng, loop_ratio)
+    return grid
+
+
+def generate_prim(rows, cols, rng, loop_ratio=0.0):
+    """
+    Maze with many short dead ends (randomized Prim's algorithm).
+
+    Args are the same as generate_backtracker.
+    """
+    grid = Grid(rows, cols)
+    cells = grid.cells
+    stride = grid.stride
+    steps = (-2 * stride, 2 * stride, -2, 2)
+
+    def inside(cell_id):
+        row, col = grid.cell_pos(cell_id)
+        return 1 <= row < rows - 1 and 1 <= col < cols - 1
+
+    start = grid.cell_id(1, 1)
+    cells[start] = OPEN
+    frontier = [start + step for step in steps if inside(start + step)]
+    queued = set(frontier)
+    while frontier:
+        # Take a random frontier cell (swap with the last one so removal is O(1))
+        index = rng.randrange(len(frontier))
+        frontier[index], frontier[-1] = frontier[-1], frontier[index]
+        current = frontier.pop()
+
+        # Connect it to a random cell that is already part of the maze
+        carved = [step for step in steps if inside(current + step) and cells[current + step] == OPEN]
+        step = rng.choice(carved)
+        cells[current + step // 2] = OPEN
+        cells[current] = OPEN
+
+        for step in steps:
+            neighbor = current + step
+            if inside(neighbor) and cells[neighbor] != OPEN and neighbor not in queued:
+                queued.add(neighbor)
+                frontier.append(neighbor)
+
+    if loop_ratio:
+        _add_loops(grid, rng, loop_ratio)
+    return grid
+
+
+def generate_rooms(rows, cols, rng, room_count=None, min_size=3, max_size=12):
+    """
+    Open rectangular rooms joined by L-shaped corridors.
+
+    Args:
+        rows (int): Number of rows (including the outer wall).
+        cols (int): Number of columns (including the outer wall).
+        rng (random.Random): Source of randomness.
+        room_count (int): Rooms to try to place; defaults to one per ~150 cells.
+        min_size (int): Smallest room side.
+        max_size (int): Largest room side.
+
+    Returns:
+        Grid: The generated level. Every room is reachable from every other.
+    """
+    grid = Grid(rows, cols)
+    cells = grid.cells
+    max_size = max(min_size, min(max_size, rows - 2, cols - 2))
+    if room_count is None:
+        room_count = max(2, rows * cols // 150)
+
+    def carve(row, col):
+        cells[grid.cell_id(row, col)] = OPEN
+
+    rooms = []
+    for _ in range(room_count * 4):  # A few attempts per room; overlapping ones are dropped
+        if len(rooms) == room_count:
+            break
+        height = rng.randint(min_size, max_size)
+        width = rng.randint(min_size, max_size)
+        top = rng.randint(1, max(1, rows - 1 - height))
+        left = rng.randint(1, max(1, cols - 1 - width))
+        bottom = min(rows - 1, top + height)
+        right = min(cols - 1, left + width)
+        # Keep one wall tile between rooms: the room plus a one tile margin must
+        # still be solid (a C-level scan per row, so this stays fast with many rooms)
+        if any(OPEN in cells[grid.cell_id(row, left - 1):grid.cell_id(row, right + 1)]
+               for row in range(top - 1, bottom + 1)):
+            continue
+        rooms.append((top, left, bottom, right))
+        for row in range(top, bottom):
+            start = grid.cell_id(row, left)
+            cells[start:start + right - left] = bytes(right - left)
+
+    # Join each room to the next one so the whole level is connected. Rooms are
+    # visited in bands of rows, alternating left-to-right and right-to-left, so
+    # consecutive rooms are close together and the corridors stay short
+    band = 2 * max_size
+    centers = sorted(
+        (((top + bottom - 1) // 2, (left + right - 1) // 2) for top, left, bottom, right in rooms),
+        key=lambda center: (center[0] // band, center[1] if center[0] // band % 2 == 0 else -center[1]),
+    )
+    for (row_a, col_a), (row_b, col_b) in zip(centers, centers[1:]):
+        # L-shaped corridor: first along one axis, then the other
+        if rng.random() < 0.5:
+            corner = (row_a, col_b)
+        else:
+            corner = (row_b, col_a)
+        for (row_from, col_from), (row_to, col_to) in (((row_a, col_a), corner), (corner, (row_b, col_b))):
+            for row in range(min(row_from, row_to), max(row_from, row_to) + 1):
+                carve(row, col_from)
+            start = grid.cell_id(row_to, min(col_from, col_to))
+            length = abs(col_to - col_from) + 1
+            cells[start:start + length] = bytes(length)
+    return grid
+
+
+def _add_loops(grid, rng, loop_ratio):
+    #Open inner walls that sit between two corridors, adding alternative routes.
+    cells = grid.cells
+    stride = grid.stride
+    for row in range(1, grid.rows - 1):
+        for col in range(1, grid.cols - 1):
+            cell_id = grid.cell_id(row, col)
+            if cells[cell_id] == OPEN or rng.random() >= loop_ratio:
+                continue
+            vertical = cells[cell_id - stride] == OPEN and cells[cell_id + stride] == OPEN
+            horizontal = cells[cell_id - 1] == OPEN and cells[cell_id + 1] == OPEN
+            if vertical != horizontal:
+                cells[cell_id] = OPEN
+
+
+_GENERATORS = {
+    "backtracker": generate_backtracker,
+    "prim": generate_prim,
+    "rooms": generate_rooms,
+}
+
+
+def generate(rows, cols, seed=0, algorithm="backtracker", **options):
+    """
+    Generate a level deterministically: the same arguments always give the same maze.
+
+    Args:
+        rows (int): Number of rows (including the outer wall).
+        cols (int): Number of columns (including the outer wall).
+        seed (int): Random seed.
+        algorithm (str): One of ALGORITHMS.
+        **options: Extra arguments for the generator (e.g. loop_ratio).
+
+    Returns:
+        Level: The generated level (held in memory).
+    """
+    if algorithm not in _GENERATORS:
+        raise ValueError(f"Unknown maze algorithm {algorithm!r}, expected one of {ALGORITHMS}")
+    if rows < 3 or cols < 3:
+        raise ValueError(f"A level needs at least 3x3 cells, got {rows}x{cols}")
+    grid = _GENERATORS[algorithm](rows, cols, random.Random(seed), **options)
+    return Level.from_grid(grid, seed=seed, algorithm=algorithm)
+
+
+# ---- Levels -----------------------------------------------------------------------
+
+class Level:
+    def __init__(self, rows, cols, data, offset=0, seed=0, algorithm=None, file=None, mapping=None):
+        """
+        A maze stored as packed wall bits (one bit per cell).
+
+        Levels loaded with load_level() keep the bits in a read-only mmap, so
+        opening even a 4096x4096 level only reads the header; is_wall() reads
+        single bits straight from the mapping. The byte-per-cell Grid that the
+        game and the pathfinding use is unpacked the first time .grid is read.
+
+        Args:
+            rows (int): Number of rows.
+            cols (int): Number of columns.
+            data: Buffer holding the packed rows (bytes or mmap).
+            offset (int): Position of the first packed row inside data.
+            seed (int): Seed the level was generated from.
+            algorithm (str): Generator name, or None for hand-made levels.
+            file: Open file backing the mmap (closed by close()).
+            mapping (mmap.mmap): The mmap itself (closed by close()).
+        """
+        self.rows = rows
+        self.cols = cols
+        self.row_bytes = (cols + 7) // 8
+        self.data = data
+        self.offset = offset
+        self.seed = seed
+        self.algorithm = algorithm
+        self._file = file
+        self._mapping = mapping
+        self._grid = None
+
+    @classmethod
+    def from_grid(cls, grid, seed=0, algorithm=None):
+        """
+        Pack a Grid into a Level (the Grid is kept as the level's .grid).
+        """
+        level = cls(grid.rows, grid.cols, pack_rows(grid), seed=seed, algorithm=algorithm)
+        level._grid = grid
+        return level
+
+    @property
+    def grid(self):
+        # Byte-per-cell, wall-padded Grid for the game; unpacked on first use
+        if self._grid is None:
+            self._grid = unpack_grid(self.rows, self.cols, self.data, self.offset)
+        return self._grid
+
+    def is_wall(self, row, col):
+        """
+        Read one cell straight from the packed bits. Outside the level counts as wall.
+        """
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return True
+        byte = self.data[self.offset + row * self.row_bytes + (col >> 3)]
+        return (byte >> (7 - (col & 7))) & 1 == 1
+
+    def save(self, path):
+        """
+        Write the level in the binary level format.
+        """
+        kind = ALGORITHMS.index(self.algorithm) if self.algorithm in ALGORITHMS else HAND_MADE
+        body_size = self.rows * self.row_bytes
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, FORMAT_VERSION, kind, self.rows, self.cols, self.seed))
+            file.write(self.data[self.offset:self.offset + body_size])
+
+    def close(self):
+        """
+        Release the mmap and file of a loaded level (the unpacked grid stays usable).
+        """
+        self.data = b""
+        if self._mapping is not None:
+            self._mapping.close()
+            self._mapping = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def pack_rows(grid):
+    """
+    Pack a Grid's cells into wall bits, each row padded to a whole byte.
+
+    Returns:
+        bytes: rows * ceil(cols / 8) bytes.
+    """
+    row_bytes = (grid.cols + 7) // 8
+    padding = b"0" * (row_bytes * 8 - grid.cols)
+    packed = []
+    for row in range(grid.rows):
+        start = grid.cell_id(row, 0)
+        # b"\x00\x01..." -> b"01..." -> one big int -> packed bytes
+        bits = bytes(grid.cells[start:start + grid.cols]).translate(_CELLS_TO_ASCII) + padding
+        packed.append(int(bits, 2).to_bytes(row_bytes, "big"))
+    return b"".join(packed)
+
+
+def unpack_grid(rows, cols, data, offset=0):
+    """
+    Expand packed wall bits into a wall-padded Grid.
+
+    Args:
+        rows (int): Number of rows.
+        cols (int): Number of columns.
+        data: Buffer with the packed rows.
+        offset (int): Position of the first packed row inside data.
+
+    Returns:
+        Grid: The unpacked grid.
+    """
+    row_bytes = (cols + 7) // 8
+    grid = Grid(rows, cols)
+
+    # Each row goes through int/str/bytes conversions that all run in C,
+    # so a 4096x4096 level unpacks in a fraction of a second
+    width = row_bytes * 8
+    for row in range(rows):
+        start = offset + row * row_bytes
+        value = int.from_bytes(data[start:start + row_bytes], "big")
+        # One big int -> b"0101..." -> b"\x00\x01\x00\x01..."
+        bits = format(value, f"0{width}b").encode("ascii")[:cols]
+        first = grid.cell_id(row, 0)
+        grid.cells[first:first + cols] = bits.translate(_ASCII_TO_CELLS)
+    return grid
+
+
+def load_level(path):
+    """
+    Open a level file through mmap. Only the header is read up front.
+
+    Args:
+        path (str): Path to a file written by Level.save().
+
+    Returns:
+        Level: The level; call close() (or use it in a with block) when done with the file.
+    """
+    file = open(path, "rb")
+    try:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:  # Empty file: mmap refuses to map zero bytes
+        file.close()
+        raise ValueError(f"{path} is not a level file (empty)")
+
+    try:
+        if len(mapping) < HEADER.size:
+            raise ValueError(f"{path} is not a level file (too short)")
+        magic, version, kind, rows, cols, seed = HEADER.unpack_from(mapping, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a level file (bad magic {magic!r})")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} uses level format version {version}, expected {FORMAT_VERSION}")
+        if len(mapping) < HEADER.size + rows * ((cols + 7) // 8):
+            raise ValueError(f"{path} is truncated")
+    except ValueError:
+        mapping.close()
+        file.close()
+        raise
+
+    algorithm = ALGORITHMS[kind] if kind < len(ALGORITHMS) else None
+    return Level(rows, cols, mapping, offset=HEADER.size, seed=seed, algorithm=algorithm,
+                 file=file, mapping=mapping)
@@ -1,164 +1,343 @@
+import argparse
+import os
+
 import pygame
-from maze import TILE_SIZE, draw_maze, ROWS, COLS
+import level
+from maze import TILE_SIZE, build_maze_surface, get_grid, set_grid, spawn_points
 from player import Player
 from ghost import Ghost
-from menu import show_menu, show_game_over
+from simulation import Simulation, TICKS_PER_SECOND, UP, DOWN, LEFT, RIGHT, ESCAPED, CAUGHT
+
+# The rest of the frontend (asyncio, assets, menus, renderer, profiler, replays)
+# is imported inside the functions that use it, after the window is on screen
 
-# Frames per second (FPS) controls game speed and update rate
-FPS = 30
+# Frames drawn per second. Game speed does not depend on it: the logic runs
+# TICKS_PER_SECOND fixed steps per second (see frames.FixedStep) and sprites
+# slide between tiles on the frames in between
+FPS = 60
 
 # Define possible game states as constants
 MENU = "menu"
 GAME = "game"
+GAME_OVER = "game_over"
+QUIT = "quit"
 
-def game_loop(win):
-    #Main game loop where all the game logic runs:
-        #Handles player input (arrow keys)
-        #Updates ghost movement using A* pathfinding
-        #Detects collisions between player and ghost or time running out
-        #Draws the maze, player, ghost, timer, and UI elements
-        #Handles the game over screen and restart/quit options
+def read_pressed(keys):
+    #Convert pygame's key state into the simulation's direction bits.
+    #Args:
+        #keys: Result of pygame.key.get_pressed()
+    #Returns:
+        #int: Bit set of simulation.UP, DOWN, LEFT, RIGHT
+    pressed = 0
+    if keys[pygame.K_UP]:
+        pressed |= UP
+    if keys[pygame.K_DOWN]:
+        pressed |= DOWN
+    if keys[pygame.K_LEFT]:
+        pressed |= LEFT
+    if keys[pygame.K_RIGHT]:
+        pressed |= RIGHT
+    return pressed
+
+
+async def game_loop(win, clock, profile=None, record_path=None, background=None, atlas=None,
+                    fps=FPS, frame_skip=True):
+    #Pygame frontend for one game, as a coroutine. The rules live in
+    #simulation.Simulation; this loop only:
+        #Runs the simulation at TICKS_PER_SECOND fixed steps per second of real
+        #time, however fast frames are drawn, feeding it the arrow key state
+        #Plays the win/lose music when the simulation reports the game ended
+        #Draws the maze, player, ghost, timer, and UI elements, with the sprites
+        #interpolated between their tiles
+        #Times each phase of the frame when profiling is on (F3 shows the overlay)
     #Args:
         #win (pygame.Surface): The pygame window surface to draw on
+        #clock (FrameClock): Frame limiter shared by all screens
+        #profile (Profiler): Frame profiler; a disabled one is used if omitted
+        #record_path (str): Save a replay of the game here when it ends (or is quit)
+        #background (pygame.Surface): Maze surface to reuse instead of drawing it again
+        #atlas (SpriteAtlas): Sprite atlas to reuse instead of packing it again
+        #fps (int): Frames drawn per second
+        #frame_skip (bool): Skip drawing frames that fall behind instead of
+                           #slowing the game down (FixedStep adaptive mode)
 
     #Returns:
-        #str: Next game state ("game" to restart, or "menu" to quit)
+        #Simulation: The finished game (game_over is set), or None if the window was closed
+    import assets
+    from frames import FixedStep
+    from profiler import Profiler
+    from renderer import Renderer
+    from replay import Replay
+    from sprites import Label
 
-    clock = pygame.time.Clock()  # Clock to control FPS
-    player = Player(1, 1)  # Initialize player position
-    ghost = Ghost(ROWS - 2, COLS - 2)  # Initialize ghost position
-    frame_count = 0
-    ghost_move_delay = 5  #  delay to slow down ghost movement
-    player_move_delay = 2  #  delay for slowing down player movement
-    last_player_move_frame = 0
-    game_over = False
-    escaped = False  # Flag to track if player escaped
+    player_start, ghost_start = spawn_points()  # Corners of the current level
+    if profile is None:
+        profile = Profiler()
 
-    # Timer setup: 20 seconds countdown
-    total_time = 5  # seconds
-    start_ticks = pygame.time.get_ticks()  # Start time in milliseconds
+    # Game logic: player, ghost, move delays, collision check and a 5 second timer
+    simulation = Simulation(
+        player=Player(*player_start),  # Initialize player position
+        ghost=Ghost(*ghost_start, search=profile.a_star),  # Initialize ghost position; searches are profiled
+        ghost_move_delay=5,  # delay to slow down ghost movement
+        player_move_delay=2,  # delay for slowing down player movement
+        total_time=5,  # seconds
+        ticks_per_second=TICKS_PER_SECOND,  # fixed logic steps per second
+    )
+    player, ghost = simulation.player, simulation.ghost
 
-    font = pygame.font.SysFont("Arial", 24)  # Font for displaying timer
+    # Turns real time into logic steps; the first frame starts its clock
+    scheduler = FixedStep(TICKS_PER_SECOND, adaptive=frame_skip, frame_rate=fps)
+    # Tiles the sprites stood on before the latest step, for interpolation
+    player_before = (player.row, player.col)
+    ghost_before = (ghost.row, ghost.col)
+    latched = 0  # Keys pressed since the last step, so a short tap between steps still counts
 
-    while True:
-        clock.tick(FPS)
-        frame_count += 1
+    # Draws the maze once and then only updates the tiles that change each frame
+    renderer = Renderer(win, background, atlas, simulation.grid)
 
-        # Calculate remaining time
-        seconds_passed = (pygame.time.get_ticks() - start_ticks) // 1000
-        time_left = max(0, total_time - seconds_passed)
+    # Countdown text, rendered again only when the number of seconds changes
+    timer = Label("Time Left: {}s", (255, 255, 0), 24)
 
-        # Game over if time runs out
-        if time_left == 0 and not game_over:
-            game_over = True
-            escaped = True  # Set escaped flag to True
-            pygame.mixer.music.stop()
-            pygame.mixer.music.load("public/victory.mp3")  # Optional: use a win sound
-            pygame.mixer.music.play()
+    # Input log for replays: one byte per tick, saved run-length encoded
+    replay = Replay.start(simulation) if record_path else None
+
+    while True:
+        start = profile.mark()
+        await clock.tick(fps)  # Awaiting lets asset loads and other tasks use the spare time
+        frame_start = start = profile.lap("wait", start)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                return MENU
-
-        keys = pygame.key.get_pressed()
-        if not game_over:
-            # Slow down player movement
-            if frame_count - last_player_move_frame >= player_move_delay:
-                if keys[pygame.K_UP]:
-                    player.move(-1, 0)
-                    last_player_move_frame = frame_count
-                elif keys[pygame.K_DOWN]:
-                    player.move(1, 0)
-                    last_player_move_frame = frame_count
-                elif keys[pygame.K_LEFT]:
-                    player.move(0, -1)
-                    last_player_move_frame = frame_count
-                elif keys[pygame.K_RIGHT]:
-                    player.move(0, 1)
-                    last_player_move_frame = frame_count
-
-            # Slow down ghost movement
-            if frame_count % ghost_move_delay == 0:
-                ghost.update(player)
-
-            if ghost.row == player.row and ghost.col == player.col:
-                game_over = True
-                escaped = False  # Set escaped flag to False
-                pygame.mixer.music.stop()
-                pygame.mixer.music.load("public/gameover.wav")
-                pygame.mixer.music.play()
-
-        win.fill((0, 0, 0))
-        draw_maze(win)
-        player.draw(win)
-        ghost.draw(win)
+                if replay is not None:
+                    replay.save(record_path)  # Keep unfinished games too, e.g. to reproduce a stall
+                return None
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profile.toggle()
+                frame_start = start = profile.mark()  # Recording may have just started
+                if not profile.show_overlay:
+                    renderer.invalidate()  # Wipe the overlay text
+        held = read_pressed(pygame.key.get_pressed())
+        latched |= held
+        start = profile.lap("input", start)
+
+        # Run the logic steps that are due by now (zero, one or a few), each
+        # with the keys pressed since the step before
+        for _ in range(scheduler.advance()):
+            player_before = (player.row, player.col)
+            ghost_before = (ghost.row, ghost.col)
+            outcome = simulation.step(latched)
+            if replay is not None:
+                replay.record(latched, outcome)
+            latched = held
+
+            # The jingles are preloaded sounds, so ending the game does not read from disk
+            if outcome == ESCAPED:
+                assets.play_effect("public/victory.mp3")  # Optional: use a win sound
+            elif outcome == CAUGHT:
+                assets.play_effect("public/gameover.wav")
+            if simulation.game_over:
+                break
+        start = profile.lap("update", start)
+
+        # If the game is over, hand over to the game over screen
+        if simulation.game_over:
+            if replay is not None:
+                replay.save(record_path)
+            return simulation
+
+        # Under load, drop this frame's drawing; the logic above already kept pace
+        if not scheduler.should_render():
+            profile.lap("frame", frame_start)
+            profile.end_frame()
+            continue
+
+        renderer.begin_frame()  # Erase last frame's sprites with the cached maze
+        start = profile.lap("draw_maze", start)
+        alpha = scheduler.alpha
+        renderer.draw_entity(player, player_before, alpha)
+        renderer.draw_entity(ghost, ghost_before, alpha)
+        start = profile.lap("sprites", start)
 
         # Draw countdown timer at top-left
-        timer_text = font.render(f"Time Left: {time_left}s", True, (255, 255, 0))
-        win.blit(timer_text, (10, 10))
+        renderer.blit(timer.render(simulation.time_left), (10, 10))
+        start = profile.lap("text", start)
+        profile.draw_overlay(renderer)
 
-        # If the game is over, show game over screen with reason
-        if game_over:
-            choice = show_game_over(win, escaped)  # Pass reason to determine message
-            pygame.mixer.music.stop()
-            pygame.mixer.music.load("public/bgMusic.mp3")
-            pygame.mixer.music.play(-1)
+        renderer.end_frame()  # Push only the changed rectangles to the screen
+        start = profile.lap("display", start)
+        profile.lap("frame", frame_start)  # Everything except waiting for the next tick
+        profile.end_frame()
 
-            if choice == "Retry":
-                return GAME
-            elif choice == "Quit to Menu":
-                return MENU
 
-        pygame.display.update()
+def parse_args(argv=None):
+    #Read the optional level selection and profiling options from the command line.
+    #Returns:
+        #argparse.Namespace: level (file path), generate ([rows, cols]), seed, algorithm,
+                            #profile, profile_out, record
+    parser = argparse.ArgumentParser(description="GHOST CHASE!!")
+    parser.add_argument("--level", help="Play a level file saved with level.Level.save()")
+    parser.add_argument("--generate", type=int, nargs=2, metavar=("ROWS", "COLS"),
+                        help="Play a freshly generated level of this size")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for --generate")
+    parser.add_argument("--algorithm", choices=level.ALGORITHMS, default="backtracker",
+                        help="Maze generator for --generate")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record frame timings from the start (F3 toggles the overlay anyway)")
+    parser.add_argument("--profile-out", metavar="PATH",
+                        help="On exit, write the timings as CSV (.csv) or a Chrome trace (.json)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="Save a replay of each game, numbered: session.gcrp writes "
+                             "session-1.gcrp, session-2.gcrp, ... (play them back with replay.py)")
+    parser.add_argument("--fps", type=int, default=FPS,
+                        help=f"Frames drawn per second (game speed stays at {TICKS_PER_SECOND} steps/s)")
+    parser.add_argument("--no-frame-skip", action="store_true",
+                        help="Draw every frame even when behind (the game may then stutter)")
+    return parser.parse_args(argv)
 
 
-def main():
-    """
-    Entry point of the game:
-    - Initializes pygame and window
-    - Sets game window icon and title
-    - Controls game state flow between menu and gameplay
-    """
-    pygame.init()  # Initialize all pygame modules
+def replay_path(path, game):
+    #Number the replay file of each game, so a retry does not overwrite the last one.
+    #Args:
+        #path (str): The --record path, e.g. "runs/chase.gcrp"
+        #game (int): 1 for the first game of the session, 2 for the next, ...
+    #Returns:
+        #str: The path with the number before the extension, e.g. "runs/chase-2.gcrp"
+    root, extension = os.path.splitext(path)
+    return f"{root}-{game}{extension}"
+
 
-    pygame.mixer.init()
-    pygame.mixer.music.load("public/bgMusic.mp3")
-    pygame.mixer.music.set_volume(0.5)
-    pygame.mixer.music.play(-1)
+async def run(win, args, profile):
+    #Application state machine. Every state is a coroutine that draws its own
+    #frames and awaits the shared FrameClock, so files loading on worker threads
+    #never freeze the window.
+    #Args:
+        #win (pygame.Surface): The game window
+        #args (argparse.Namespace): Command line options from parse_args
+        #profile (Profiler): Frame profiler shared by every game
+    import asyncio
+    import assets
+    from frames import FrameClock
+    from menu import show_menu, show_game_over
+    from pathfinding import get_neighbor_table
+    from sprites import build_game_atlas
 
-    # Load and set game window icon (small image displayed on the window)
-    icon = pygame.image.load("public/ghostChaseLogo.png")
-    pygame.display.set_icon(icon)
+    loop = asyncio.get_running_loop()
+    clock = FrameClock()
+    pygame.font.init()  # Fonts are needed from the first menu frame; this does not load any yet
 
-    # Create the game window with size based on maze grid dimensions
-    Window = pygame.display.set_mode((COLS * TILE_SIZE, ROWS * TILE_SIZE))
-    pygame.display.set_caption("GHOST CHASE!!")  # Set window title
+    # Music, sprites, fonts and sounds load on worker threads while the menu is already up.
+    # Tasks only start once the menu awaits its first tick, so the mixer is opened
+    # and the music streams in after the first frame is on screen
+    music = asyncio.ensure_future(assets.play_music_async("public/bgMusic.mp3", volume=0.5))
+    preload = asyncio.ensure_future(assets.preload_async())
+
+    # Pathfinding tables for big levels are built off the frame, during the menu
+    neighbor_table = loop.run_in_executor(None, get_neighbor_table, get_grid())
 
+    background = None  # Maze surface, drawn once and reused by every game
+    atlas = None  # Sprites and wall tile packed into one surface, also reused
+    simulation = None  # Last finished game, for the game over screen
+    games = 0  # Games started so far, numbers the --record files
     state = MENU  # Start in the menu state
 
     # Main application loop controlling state transitions
-    while True:
+    while state != QUIT:
         if state == MENU:
-            show_menu(Window)  # Show the start menu screen
-
-            # Menu input loop - waits for player to start or quit
-            while True:
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        pygame.quit()  # Cleanly exit pygame
-                        return          # Quit the program
-
-                    # If space-bar pressed, start the game
-                    if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                        state = GAME
-                        break  # Exit menu loop and start gameplay
-                if state == GAME:
-                    break
+            started = await show_menu(win, clock)  # Show the start menu screen
+            state = GAME if started else QUIT
 
         elif state == GAME:
-            # Run the game loop and update the game state based on return value
-            state = game_loop(Window)
+            # The first game needs the background loads (usually long done by now);
+            # keep the window responsive instead of blocking until they finish
+            while not (preload.done() and neighbor_table.done()):
+                pygame.event.pump()
+                await clock.tick(FPS)
+            await asyncio.gather(preload, neighbor_table)  # Re-raises a failed load
+            if background is None:
+                atlas = build_game_atlas()
+                background = build_maze_surface(win.get_size(), atlas=atlas)
+            games += 1
+            record_path = replay_path(args.record, games) if args.record else None
+            simulation = await game_loop(win, clock, profile, record_path, background, atlas,
+                                         fps=args.fps, frame_skip=not args.no_frame_skip)
+            # Closing the window during a game goes back to the menu
+            state = GAME_OVER if simulation is not None else MENU
+
+        elif state == GAME_OVER:
+            choice = await show_game_over(win, clock, simulation.escaped)  # Pass reason to determine message
+            assets.stop_effects()
+            await music  # Make sure the first track is loaded before restarting it
+            music = asyncio.ensure_future(assets.play_music_async("public/bgMusic.mp3"))
+
+            if choice == "Retry":
+                state = GAME
+            elif choice == "Quit to Menu":
+                state = MENU
+            else:
+                state = QUIT
+
+    await music
+
+
+def open_window(grid):
+    """
+    Show the game window as early as possible.
+
+    Only the display subsystem is started here. pygame.init() would also open the
+    audio device, joysticks and so on before anything is visible; fonts and the
+    mixer are started later, once the first frame is up (see run()).
+
+    Args:
+        grid (Grid): The level; the window is sized to fit it.
+
+    Returns:
+        pygame.Surface: The window surface.
+    """
+    pygame.display.init()
+
+    # Set game window icon (small image displayed on the window). Some systems
+    # only accept an icon before the window is shown, and the asset cache would
+    # pull in asyncio, so it is read directly
+    pygame.display.set_icon(pygame.image.load("public/ghostChaseLogo.png"))
+
+    # Create the game window with size based on the loaded level's dimensions
+    window = pygame.display.set_mode((grid.cols * TILE_SIZE, grid.rows * TILE_SIZE))
+    pygame.display.set_caption("GHOST CHASE!!")  # Set window title
+    pygame.display.flip()  # First frame: an empty window until the menu draws
+    return window
+
+
+def main(argv=None):
+    """
+    Entry point of the game:
+    - Picks the level (built-in maze, a level file or a generated one)
+    - Opens the window (display subsystem only)
+    - Loads the rest of the game and runs the menu, game and game over states
+      on an asyncio event loop
+    """
+    args = parse_args(argv)
+    if args.level:
+        with level.load_level(args.level) as loaded:
+            set_grid(loaded.grid)
+    elif args.generate:
+        rows, cols = args.generate
+        set_grid(level.generate(rows, cols, seed=args.seed, algorithm=args.algorithm).grid)
+
+    Window = open_window(get_grid())
+
+    # Everything from here on loads while the window is already visible
+    import asyncio
+    from profiler import Profiler
+
+    # Frame profiler shared by every game; recording from the start only when asked
+    profile = Profiler(enabled=args.profile or bool(args.profile_out))
+
+    asyncio.run(run(Window, args, profile))
+
+    if args.profile_out:
+        profile.export(args.profile_out)
+    pygame.quit()  # Cleanly exit pygame
 
 
 if __name__ == "__main__":
-    main()  # Run the main function when script is executed
\ No newline at end of file
+    main()  # Run the main function when script is executed
@@ -1,4 +1,4 @@
-import pygame
+from grid import Grid
 
 # Size of each tile in pixels (width and height of each maze cell)
 TILE_SIZE = 40
@@ -70,7 +70,48 @@ MAZE = [
 #     [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
 # ]
 
-def draw_maze(win):
+# Packed version of MAZE: one byte per cell with a wall border around it,
+# so neighbor lookups need no bounds checks. This is the built-in level.
+GRID = Grid.from_rows(MAZE)
+
+# Level the game is currently played on. Starts as the built-in maze; main()
+# switches it to a generated or loaded level with set_grid(). Modules read the
+# maze size from here instead of importing ROWS/COLS.
+_current_grid = GRID
+
+
+def get_grid():
+    # Return the Grid of the level that is currently loaded
+    return _current_grid
+
+
+def set_grid(grid):
+    """
+    Make grid the current level for every module that does not get a grid passed in.
+
+    Parameters:
+    - grid: the Grid to play on (e.g. level.load_level(path).grid)
+    """
+    global _current_grid
+    _current_grid = grid
+
+
+def spawn_points(grid=None):
+    """
+    Return the default (player, ghost) start cells for a level.
+
+    The player starts on the first walkable cell and the ghost on the last one
+    (top-left and bottom-right corners; (1, 1) and (18, 18) on the built-in maze).
+    """
+    if grid is None:
+        grid = get_grid()
+    open_ids = grid.open_ids()
+    if not open_ids:
+        raise ValueError("The level has no walkable cells")
+    return grid.cell_pos(open_ids[0]), grid.cell_pos(open_ids[-1])
+
+
+def draw_maze(win, grid=None):
     """
     Draw the maze grid on the pygame window.
     Each cell is drawn as a rectangle:
@@ -79,12 +120,20 @@ def draw_maze(win):
 
     Parameters:
     - win: pygame Surface on which to draw the maze
+    - grid: the maze to draw (defaults to the current level)
     """
-    for row in range(ROWS):  # Iterate over every row in the maze
-        for col in range(COLS):  # Iterate over every column in the maze
+    # pygame is imported here so the maze data can be used without it (headless simulation)
+    import pygame
+
+    if grid is None:
+        grid = get_grid()
+    cells = grid.cells
+    for row in range(grid.rows):  # Iterate over every row in the maze
+        row_start = grid.cell_id(row, 0)  # Id of the first cell of this row
+        for col in range(grid.cols):  # Iterate over every column in the maze
             # Choose the color for the tile:
-            # WALL_COLOR if tile is 1 (wall), else BG_COLOR (empty space)
-            color = WALL_COLOR if MAZE[row][col] == 1 else BG_COLOR
+            # WALL_COLOR if tile is a wall, else BG_COLOR (empty space)
+            color = WALL_COLOR if cells[row_start + col] else BG_COLOR
 
             # Calculate the position and size of the rectangle to draw
             # X position is column index times tile width
@@ -97,4 +146,110 @@ def draw_maze(win):
             )
 
             # Draw the rectangle (tile) with the chosen color onto the window
-            pygame.draw.rect(win, color, rectangle)
\ No newline at end of file
+            pygame.draw.rect(win, color, rectangle)
+
+
+def draw_maze_tiles(win, atlas, grid=None):
+    """
+    Draw every wall as the atlas's "wall" tile, all in one Surface.blits call.
+
+    Open cells are not drawn; fill the surface with BG_COLOR first.
+
+    Parameters:
+    - win: pygame Surface to draw on
+    - atlas: SpriteAtlas with a "wall" region (see sprites.build_game_atlas)
+    - grid: the maze to draw (defaults to the current level)
+    """
+    if grid is None:
+        grid = get_grid()
+    cells = grid.cells
+    source = atlas.surface
+    wall = atlas.regions["wall"]
+    tiles = []
+    for row in range(grid.rows):
+        row_start = grid.cell_id(row, 0)
+        y = row * TILE_SIZE
+        for col in range(grid.cols):
+            if cells[row_start + col]:
+                tiles.append((source, (col * TILE_SIZE, y), wall))
+    win.blits(tiles, doreturn=False)
+
+
+def draw_maze_cells(win, cell_ids, grid=None, atlas=None):
+    """
+    Draw a few cells of the maze again, e.g. the ones grid.set_cell() changed.
+
+    Parameters:
+    - win: pygame Surface to draw on (usually the surface from build_maze_surface)
+    - cell_ids: ids of the cells to draw (see grid.changed_since)
+    - grid: the maze to draw (defaults to the current level)
+    - atlas: SpriteAtlas to take the wall tile from; plain rectangles without one
+
+    Returns:
+    - list of the pygame Rects that were drawn, one per cell
+    """
+    import pygame
+
+    if grid is None:
+        grid = get_grid()
+    cells = grid.cells
+    rects = []
+    for cell_id in set(cell_ids):
+        row, col = grid.cell_pos(cell_id)
+        rectangle = pygame.Rect(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+        if atlas is None:
+            win.fill(WALL_COLOR if cells[cell_id] else BG_COLOR, rectangle)
+        else:
+            win.fill(BG_COLOR, rectangle)
+            if cells[cell_id]:
+                win.blit(atlas.surface, rectangle, atlas.regions["wall"])
+        rects.append(rectangle)
+    return rects
+
+
+def redraw_maze(surface, grid=None, atlas=None):
+    """
+    Clear a surface and draw the whole maze on it.
+
+    Parameters:
+    - surface: pygame Surface to draw on
+    - grid: the maze to draw (defaults to the current level)
+    - atlas: SpriteAtlas to take the wall tile from; plain rectangles without one
+    """
+    surface.fill(BG_COLOR)
+    if atlas is not None:
+        draw_maze_tiles(surface, atlas, grid)
+    else:
+        draw_maze(surface, grid)
+
+
+def build_maze_surface(size=None, grid=None, atlas=None):
+    """
+    Draw the maze once onto an off-screen surface.
+
+    The renderer blits this surface instead of drawing every tile again each
+    frame. Walls can change during a game (grid.set_cell(), grid.toggle());
+    the renderer then draws only the edited cells again with draw_maze_cells()
+    (see Renderer.sync).
+
+    Parameters:
+    - size: (width, height) of the surface; defaults to the full maze size
+    - grid: the maze to draw (defaults to the current level)
+    - atlas: SpriteAtlas to take the wall tile from; plain rectangles without one
+
+    Returns:
+    - pygame Surface with the maze drawn on it
+    """
+    import pygame
+
+    if grid is None:
+        grid = get_grid()
+    if size is None:
+        size = (grid.cols * TILE_SIZE, grid.rows * TILE_SIZE)
+    surface = pygame.Surface(size)
+    redraw_maze(surface, grid, atlas)
+
+    # Match the display's pixel format (if a window exists) so blits are a plain copy
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert()
+    return surface
@@ -1,75 +1,86 @@
+import asyncio
+
 import pygame
-from maze import COLS, ROWS, TILE_SIZE
+import assets
 
 BG_COLOR = (6, 7, 15)
 
+# Menu screens redraw at this rate
+MENU_FPS = 60
+
 def draw_text(win, message, color, size, y_offset=0):
-    font = pygame.font.SysFont("Arial", size)
-    text = font.render(message, True, color)
-    rect = text.get_rect(center=(COLS * TILE_SIZE // 2, ROWS * TILE_SIZE // 2 + y_offset))
+    # Fonts and rendered text come from the asset cache, so redrawing the same
+    # message every frame does not look up the font or render it again
+    text = assets.render_text(message, color, size)
+    # Center on the window, which is sized to whatever level is loaded
+    rect = text.get_rect(center=(win.get_width() // 2, win.get_height() // 2 + y_offset))
     win.blit(text, rect)
 
-def show_menu(win):
-    clock = pygame.time.Clock()
+async def show_menu(win, clock):
+    """
+    Displays the start menu until SPACE is pressed.
+
+    The title image and the font load in the background; the menu draws without
+    them until they are ready, so the first frame never waits on a file.
+
+    Args:
+        win (pygame.Surface): The pygame window surface to draw on
+        clock (FrameClock): Frame limiter shared by all screens
+
+    Returns:
+        bool: True to start a game, False if the window was closed
+    """
     blink = True
     blink_timer = 0
 
-    # Load title image
-    title_img = pygame.image.load("public/title.png").convert_alpha()
-    title_img = pygame.transform.scale(title_img, (500, 500))
-    img_rect = title_img.get_rect(center=(COLS * TILE_SIZE // 2, ROWS * TILE_SIZE // 2 - 60))
+    # Title image, loaded and scaled on a worker thread the first time the menu opens
+    title_task = asyncio.ensure_future(assets.load_image_async("public/title.png", (500, 500)))
 
-    running = True
-    while running:
-        win.fill(BG_COLOR)
-        win.blit(title_img, img_rect)
+    try:
+        while True:
+            win.fill(BG_COLOR)
+            if title_task.done():
+                title_img = title_task.result()
+                win.blit(title_img, title_img.get_rect(center=(win.get_width() // 2, win.get_height() // 2 - 60)))
 
-        # Blink logic: toggle every 500ms
-        blink_timer += clock.get_time()
-        if blink_timer >= 500:
-            blink = not blink
-            blink_timer = 0
+            # Blink logic: toggle every 500ms
+            blink_timer += clock.get_time()
+            if blink_timer >= 500:
+                blink = not blink
+                blink_timer = 0
 
-        if blink:
-            draw_text(win, "Press SPACE twice to Start", (255, 255, 255), 30, 100)
+            if blink and assets.has_font("Arial", 30):
+                draw_text(win, "Press SPACE to Start", (255, 255, 255), 30, 100)
 
-        pygame.display.update()
-        clock.tick(60)
+            pygame.display.update()
+            await clock.tick(MENU_FPS)
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                running = False  # Exit the menu loop
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return False
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                    return True
+    finally:
+        # Leaving early must not leave the load running unobserved
+        if not title_task.done():
+            title_task.cancel()
 
 
-def show_game_over(win, escaped=False):
+async def show_game_over(win, clock, escaped=False):
     """
     Displays the game over screen with selectable options.
     Allows the player to choose between retrying the game or quitting to the menu.
 
     Args:
         win (pygame.Surface): The pygame window surface to draw on
+        clock (FrameClock): Frame limiter shared by all screens
         escaped (bool): Whether the player escaped or was caught
 
     Returns:
-        str: The selected option ("Retry" or "Quit to Menu")
+        str: The selected option ("Retry" or "Quit to Menu"), or None if the window was closed
     """
-    from maze import TILE_SIZE, COLS, ROWS
-    BG_COLOR = (6, 7, 15)  # Background color
     options = ["Retry", "Quit to Menu"]  # Menu options
     selected = 0  # Currently selected option index
-    clock = pygame.time.Clock()
-
-    def draw_text(win, message, color, size, y_offset=0):
-        """
-        Helper function to draw centered text with vertical offset
-        """
-        font = pygame.font.SysFont("Arial", size)
-        text = font.render(message, True, color)
-        rect = text.get_rect(center=(COLS * TILE_SIZE // 2, ROWS * TILE_SIZE // 2 + y_offset))
-        win.blit(text, rect)
 
     # Game over menu loop
     while True:
@@ -87,17 +98,16 @@ def show_game_over(win, escaped=False):
             draw_text(win, option, color, 26, 20 + i * 40)
 
         pygame.display.update()  # Refresh display
-        clock.tick(60)  # Cap at 60 FPS
+        await clock.tick(MENU_FPS)  # Cap at 60 FPS; the wait lets background tasks run
 
         # Handle user input for navigating and selecting options
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
+                return None
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_UP:
                     selected = (selected - 1) % len(options)  # Move selection up
                 elif event.key == pygame.K_DOWN:
                     selected = (selected + 1) % len(options)  # Move selection down
                 elif event.key == pygame.K_RETURN or event.key == pygame.K_SPACE:
-                    return options[selected]  # Return selected option
\ No newline at end of file
+                    return options[selected]  # Return selected option
@@ -1,4 +1,10 @@
-from maze import MAZE, ROWS, COLS
+import sys
+from array import array
+from collections import OrderedDict
+from heapq import heappop, heappush
+from weakref import WeakKeyDictionary
+
+from maze import get_grid
 
 
 # Heuristic function to estimate cost from current position to the goal
@@ -15,79 +21,859 @@ def manhattan_distance(point_a, point_b):
 
 
 # Function to get all walkable neighbor cells (up, down, left, right)
-def get_walkable_neighbors(current_cell):
+def get_walkable_neighbors(current_cell, grid=None):
     #Find all neighboring cells of current_cell that can be walked on.
     #Args:
         #current_cell (tuple): (row, col) of the current position
+        #grid (Grid): The maze to look in (defaults to the current level)
     #Returns:
         #list of tuples: Each tuple is a walkable neighboring cell (row, col)
-                                # 2,1
-    current_row, current_col = current_cell
-    neighbors_list = []
+    if grid is None:
+        grid = get_grid()
+    # The grid is wall-padded, so cells on the edge need no bounds check
+    return grid.neighbors(current_cell)
+
+
+# Cache of neighbor tables, one per grid, as [table, grid version]. Weak keys,
+# so the table of a level that is no longer used is freed together with its grid.
+_neighbor_tables = WeakKeyDictionary()
 
-    # Possible directions to move: left, right, down, rup
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-           #-1           #0           #-1,0
-    for row_offset, col_offset in directions:
-             #1            #2           #-1
-        neighbor_row = current_row + row_offset
-             #1             #1           #0
-        neighbor_col = current_col + col_offset
 
-        # Check if neighbor is inside the maze boundaries
-        if 0 <= neighbor_row < ROWS and 0 <= neighbor_col < COLS:
-            # Check if the neighbor cell/Actual value is 0 then it is an empty path
-            if MAZE[neighbor_row][neighbor_col] == 0:
-                neighbors_list.append((neighbor_row, neighbor_col))
+def build_neighbor_table(grid=None):
+    #Precompute the walkable neighbors of every cell in the grid.
+    #Args:
+        #grid (Grid): The maze to precompute (defaults to the current level)
+    #Returns:
+        #list: Indexed by cell id; each entry is a tuple of walkable neighbor ids
+              #in the same order as get_walkable_neighbors returns them.
+              #Border cells get an empty tuple.
+    if grid is None:
+        grid = get_grid()
+    cells = grid.cells
+    offsets = grid.offsets
+    table = [()] * grid.size
 
-    return neighbors_list
+    for row in range(grid.rows):
+        row_start = grid.cell_id(row, 0)
+        for cell_id in range(row_start, row_start + grid.cols):
+            # Tuples are smaller than lists and are never modified by the search
+            table[cell_id] = tuple(cell_id + offset for offset in offsets
+                                   if cells[cell_id + offset] == 0)
 
+    return table
+
+
+def get_neighbor_table(grid=None):
+    #Return the neighbor table for the grid, patched or rebuilt after grid.version changes.
+    #Args:
+        #grid (Grid): The maze to precompute (defaults to the current level)
+    #Returns:
+        #list: The cached table from build_neighbor_table
+    if grid is None:
+        grid = get_grid()
+    entry = _neighbor_tables.get(grid)
+    if entry is None:
+        entry = _neighbor_tables[grid] = [build_neighbor_table(grid), grid.version]
+    elif entry[1] != grid.version:
+        # Walls changed: fix the entries around the edited cells, or rebuild if unknown
+        changed = grid.changed_since(entry[1])
+        if changed is None:
+            entry[0] = build_neighbor_table(grid)
+        else:
+            update_neighbor_table(entry[0], grid, changed)
+        entry[1] = grid.version
+    return entry[0]
 
-# A* algorithm to find the shortest path from start to goal in a maze
-def a_star(start, goal):
-    # Frontier: list of cells to explore, each as (priority = cost + heuristic, cost so far, cell)
-    toBeExplored = [(manhattan_distance(start, goal), 0, start)]
+
+def update_neighbor_table(table, grid, changed):
+    #Recompute the neighbor table entries of edited cells and of their four neighbors.
+    #Args:
+        #table (list): Table from build_neighbor_table, updated in place
+        #grid (Grid): The maze after the edits
+        #changed (iterable): Ids of the edited cells
+    cells = grid.cells
+    offsets = grid.offsets
+    stride = grid.stride
+    for cell_id in set(changed):
+        for affected in (cell_id, cell_id - stride, cell_id + stride, cell_id - 1, cell_id + 1):
+            row, col = divmod(affected, stride)
+            # Border cells keep their empty tuple
+            if 0 < row <= grid.rows and 0 < col <= grid.cols:
+                table[affected] = tuple(affected + offset for offset in offsets
+                                        if cells[affected + offset] == 0)
+
+
+def split_changes(grid, changed):
+    #Sort edited cells by what they are now.
+    #Args:
+        #grid (Grid): The maze after the edits
+        #changed (iterable): Ids of the edited cells, e.g. from grid.changed_since()
+    #Returns:
+        #tuple: (walled, opened) where walled is the set of ids that are walls now
+               #and opened a list of the (padded row, padded col) of those open now
+    cells = grid.cells
+    stride = grid.stride
+    walled = set()
+    opened = []
+    for cell_id in set(changed):
+        if cells[cell_id]:
+            walled.add(cell_id)
+        else:
+            opened.append(divmod(cell_id, stride))
+    return walled, opened
+
+
+def path_outdated(path, start, goal, stride, walled, opened):
+    #Check a cached path (cell ids) against wall edits.
+    #Args:
+        #path: Cell ids from start to goal, or empty if the goal was unreachable
+        #start (int): Cell id the path starts from
+        #goal (int): Cell id the path leads to
+        #stride (int): grid.stride
+        #walled (set), opened (list): From split_changes
+    #Returns:
+        #bool: True if the path crosses a new wall, or if a newly opened cell is
+              #close enough to both ends that a route through it could be shorter
+    if not path:
+        return bool(opened)  # An opened cell may have connected the two
+    if walled and not walled.isdisjoint(path):
+        return True
+    if opened:
+        start_row, start_col = divmod(start, stride)
+        goal_row, goal_col = divmod(goal, stride)
+        length = len(path) - 1
+        for row, col in opened:
+            # Manhattan distances never overestimate, so this bounds any route through the cell
+            if (abs(row - start_row) + abs(col - start_col)
+                    + abs(row - goal_row) + abs(col - goal_col)) < length:
+                return True
+    return False
+
+
+# A* algorithm to find the shortest path from start to goal in a maze.
+# A start inside a wall (e.g. a door that closed on a ghost) is left through its
+# open neighbors; a goal inside a wall is never reached, so the result is []
+# unless start == goal. The other searches below behave the same way.
+def a_star(start, goal, grid=None):
+    if grid is None:
+        grid = get_grid()  # Search the level that is currently loaded
+
+    # The search runs on integer cell ids; only the final path is turned back into tuples
+    start_id = grid.cell_id(*start)
+    goal_id = grid.cell_id(*goal)
+    path, expanded = _a_star_ids(start_id, goal_id, grid)
+    return [grid.cell_pos(cell_id) for cell_id in path]
+
+
+def _a_star_ids(start, goal, grid, limit=None, stats=None):
+    #A* search over cell ids.
+    #Args:
+        #limit (int): Optional maximum number of cells to expand before giving up
+        #stats (dict): Optional dict that receives "expanded" and "frontier_peak"
+                      #(largest heap size seen, stale entries included) for profiling
+    #Returns:
+        #tuple: (path, expanded) where path is the list of cell ids from start to goal
+               #(inclusive), or [] if the goal is unreachable or the limit was hit,
+               #and expanded is the number of cells taken off the frontier
+    if stats is not None:
+        # Measuring the frontier costs a compare per pop; only profiling runs pay it
+        return _a_star_ids_stats(start, goal, grid, limit, stats)
+
+    # Walkable neighbors of every cell, computed once per grid
+    neighbor_table = get_neighbor_table(grid)
+    stride = grid.stride
+    goal_row, goal_col = divmod(goal, stride)
+    start_row, start_col = divmod(start, stride)
+
+    # Frontier: binary heap of cells to explore, each as (priority = cost + heuristic, cost so far, cell).
+    # The heap always pops the smallest tuple, which is the same entry the old
+    # "sort the whole list and pop(0)" approach picked. Cell ids grow in row-major
+    # order just like (row, col) tuples compare, so ties still break the same way.
+    toBeExplored = [(abs(start_row - goal_row) + abs(start_col - goal_col), 0, start)]
 
     # Dictionary to track the path: which cell each visited cell came from
     # For the start cell, no previous cell, so value is None
     came_from = {start: None}
-    # (1,0) = (0,0)
 
     # Dictionary to track the cost (distance) to reach each visited cell from start
     # Cost to reach start is zero
     cost_so_far = {start: 0}
 
+    # Cells that were already expanded. With the Manhattan heuristic the first
+    # time a cell is popped its cost is final, so it never has to be expanded again
+    explored = set()
+
     while toBeExplored:
-        # Sort frontier by priority (lowest first), then pick the best candidate
-        toBeExplored.sort()
-        x, cost, current = toBeExplored.pop(0)
+        x, cost, current = heappop(toBeExplored)
+
+        # Lazy deletion: when a cheaper route to a cell is found the old heap entry
+        # is left in place and simply skipped here once it comes up
+        if current in explored:
+            continue
+        explored.add(current)
+        if limit is not None and len(explored) > limit:
+            break
 
         # If current cell is the goal, reconstruct and return the path
         if current == goal:
             path = []
-            while current:
+            while current is not None:
                 path.append(current)           # Add current cell to path
                 current = came_from[current]   # Move to previous cell
-            return path[::-1]  # Reverse path to get start -> goal order
+            return path[::-1], len(explored)  # Reverse path to get start -> goal order
 
-        # Explore each walkable neighbor of the current cell
-        for neighbor in get_walkable_neighbors(current):
-            new_cost = cost + 1  # Cost to move to neighbor (assumed to be 1)
+        new_cost = cost + 1  # Cost to move to a neighbor (assumed to be 1)
 
+        # Explore each walkable neighbor of the current cell
+        for neighbor in neighbor_table[current]:
             # If neighbor is not visited or a cheaper path is found
-            if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
+            if new_cost < cost_so_far.get(neighbor, new_cost + 1):
                 cost_so_far[neighbor] = new_cost  # Update cost to reach neighbor
 
                 # Calculate priority = cost so far + heuristic estimate to goal
-                priority = new_cost + manhattan_distance(neighbor, goal)
+                neighbor_row, neighbor_col = divmod(neighbor, stride)
+                priority = new_cost + abs(neighbor_row - goal_row) + abs(neighbor_col - goal_col)
 
                 # Add neighbor to frontier to be explored later
-                toBeExplored.append((priority, new_cost, neighbor))
+                heappush(toBeExplored, (priority, new_cost, neighbor))
 
                 # Record that we reached neighbor from current
                 came_from[neighbor] = current
 
+    # No path found (or the expansion limit was hit)
+    return [], len(explored)
+
+
+def _a_star_ids_stats(start, goal, grid, limit, stats):
+    #The search of _a_star_ids, also tracking the largest heap size for stats.
+    #Args and Returns: as _a_star_ids
+    neighbor_table = get_neighbor_table(grid)
+    stride = grid.stride
+    goal_row, goal_col = divmod(goal, stride)
+    start_row, start_col = divmod(start, stride)
+
+    toBeExplored = [(abs(start_row - goal_row) + abs(start_col - goal_col), 0, start)]
+    came_from = {start: None}
+    cost_so_far = {start: 0}
+    explored = set()
+    frontier_peak = 0  # Largest heap size seen, stale entries included
+    path = []
+
+    while toBeExplored:
+        if len(toBeExplored) > frontier_peak:
+            frontier_peak = len(toBeExplored)
+        x, cost, current = heappop(toBeExplored)
+        if current in explored:
+            continue
+        explored.add(current)
+        if limit is not None and len(explored) > limit:
+            break
+
+        if current == goal:
+            while current is not None:
+                path.append(current)
+                current = came_from[current]
+            path.reverse()
+            break
+
+        new_cost = cost + 1
+        for neighbor in neighbor_table[current]:
+            if new_cost < cost_so_far.get(neighbor, new_cost + 1):
+                cost_so_far[neighbor] = new_cost
+                neighbor_row, neighbor_col = divmod(neighbor, stride)
+                priority = new_cost + abs(neighbor_row - goal_row) + abs(neighbor_col - goal_col)
+                heappush(toBeExplored, (priority, new_cost, neighbor))
+                came_from[neighbor] = current
+
+    stats["expanded"] = len(explored)
+    stats["frontier_peak"] = frontier_peak
+    return path, len(explored)
+
+
+# Jump Point Search: same contract as a_star, fewer frontier entries in open areas
+def jump_point_search(start, goal, grid=None):
+    #Find a shortest path like a_star, but only put "jump points" on the frontier.
+    #In a 4-connected grid many shortest paths are the same length and differ only
+    #in the order of their moves. JPS keeps one of them: from each frontier cell it
+    #walks straight in every allowed direction and only stops at the goal or at a
+    #cell where a wall ends next to the line (a "forced" turn). The cells skipped
+    #over are never pushed onto the heap.
+    #Args:
+        #start (tuple): (row, col) of the start cell
+        #goal (tuple): (row, col) of the goal cell
+        #grid (Grid): The maze to search (defaults to the current level)
+    #Returns:
+        #list of tuples: A path from start to goal with the same length as the
+                        #a_star path (the cells can differ where several are
+                        #equally short), or [] if the goal is unreachable.
+                        #Walls at either end are handled as in a_star: a walled
+                        #start is left through its open neighbors, a walled goal gives []
+    if grid is None:
+        grid = get_grid()
+    start_id = grid.cell_id(*start)
+    goal_id = grid.cell_id(*goal)
+    path, expanded = _jump_point_search_ids(start_id, goal_id, grid)
+    return [grid.cell_pos(cell_id) for cell_id in path]
+
+
+def _jump_horizontal(cell, step, goal, cells, stride):
+    #Walk from cell along its row (step is +1 or -1) until a jump point.
+    #Returns the jump point id, or None if a wall is hit first.
+    while cells[cell] == 0:
+        if cell == goal:
+            return cell
+        # Forced neighbor: the cell above/below is open but was walled off one step back,
+        # so a shortest path may have to turn here
+        if ((cells[cell - stride] == 0 and cells[cell - step - stride] != 0)
+                or (cells[cell + stride] == 0 and cells[cell - step + stride] != 0)):
+            return cell
+        cell += step
+    return None
+
+
+def _jump_vertical(cell, step, goal, cells, stride):
+    #Walk from cell along its column (step is +stride or -stride) until a jump point.
+    #Moving vertically also stops wherever a horizontal scan from the cell finds a
+    #jump point, because the path may have to turn there. The scans are loops, not
+    #recursive calls, so long corridors cannot hit the recursion limit.
+    while cells[cell] == 0:
+        if cell == goal:
+            return cell
+        if ((cells[cell - 1] == 0 and cells[cell - step - 1] != 0)
+                or (cells[cell + 1] == 0 and cells[cell - step + 1] != 0)):
+            return cell
+        if (_jump_horizontal(cell + 1, 1, goal, cells, stride) is not None
+                or _jump_horizontal(cell - 1, -1, goal, cells, stride) is not None):
+            return cell
+        cell += step
+    return None
+
+
+def _jump_point_search_ids(start, goal, grid):
+    #Jump Point Search over cell ids.
+    #Returns:
+        #tuple: (path, expanded) like _a_star_ids; expanded counts jump points
+               #taken off the frontier, not the cells scanned between them
+    cells = grid.cells
+    stride = grid.stride
+    if cells[goal] != 0 and start != goal:
+        return [], 0  # Jumps only stop on open cells; a walled start is fine, as in a_star
+    goal_row, goal_col = divmod(goal, stride)
+    start_row, start_col = divmod(start, stride)
+
+    toBeExplored = [(abs(start_row - goal_row) + abs(start_col - goal_col), 0, start)]
+    came_from = {start: None}
+    cost_so_far = {start: 0}
+    explored = set()
+
+    while toBeExplored:
+        x, cost, current = heappop(toBeExplored)
+        if current in explored:
+            continue
+        explored.add(current)
+
+        if current == goal:
+            jump_points = []
+            while current is not None:
+                jump_points.append(current)
+                current = came_from[current]
+            jump_points.reverse()
+
+            # Jump points are joined by straight lines; fill in the cells between them
+            path = [start]
+            for target in jump_points[1:]:
+                current = path[-1]
+                step = stride if abs(target - current) >= stride else 1
+                if target < current:
+                    step = -step
+                path.extend(range(current + step, target + step, step))
+            return path, len(explored)
+
+        # Pruned directions: keep going straight or turn; never step back to the parent
+        parent = came_from[current]
+        if parent is None:
+            directions = (-stride, stride, -1, 1)
+        elif (current - parent) % stride == 0:
+            directions = (stride if current > parent else -stride, -1, 1)
+        else:
+            directions = (1 if current > parent else -1, -stride, stride)
+
+        for step in directions:
+            if step == 1 or step == -1:
+                jump_point = _jump_horizontal(current + step, step, goal, cells, stride)
+            else:
+                jump_point = _jump_vertical(current + step, step, goal, cells, stride)
+            if jump_point is None:
+                continue
+
+            # Jump points lie on a straight line from current, so the cost is the distance
+            new_cost = cost + (abs(jump_point - current) // stride or abs(jump_point - current))
+            if new_cost < cost_so_far.get(jump_point, new_cost + 1):
+                cost_so_far[jump_point] = new_cost
+                jump_row, jump_col = divmod(jump_point, stride)
+                priority = new_cost + abs(jump_row - goal_row) + abs(jump_col - goal_col)
+                heappush(toBeExplored, (priority, new_cost, jump_point))
+                came_from[jump_point] = current
 
     # No path found
-    return []
+    return [], len(explored)
+
+
+# Bidirectional search: same contract as a_star, two smaller searches that meet in the middle
+def bidirectional_a_star(start, goal, grid=None):
+    #Find a shortest path by searching from the start and from the goal at the
+    #same time. Each side is an A* search toward the other end; the side with
+    #the smaller frontier is expanded next. In a maze the Manhattan heuristic is
+    #weak, so one search from the start fills most of the region around the
+    #route; two searches that meet halfway each fill a much smaller one.
+    #Args:
+        #start (tuple): (row, col) of the start cell
+        #goal (tuple): (row, col) of the goal cell
+        #grid (Grid): The maze to search (defaults to the current level)
+    #Returns:
+        #list of tuples: A path from start to goal with the same length as the
+                        #a_star path (the cells can differ where several are
+                        #equally short), or [] if the goal is unreachable.
+                        #As in a_star, a walled start is left through its open
+                        #neighbors and a walled goal gives []
+    if grid is None:
+        grid = get_grid()
+    path, expanded = _bidirectional_ids(grid.cell_id(*start), grid.cell_id(*goal), grid)
+    return [grid.cell_pos(cell_id) for cell_id in path]
+
+
+def bidirectional_bfs(start, goal, grid=None):
+    #Like bidirectional_a_star, but without the heuristic: two breadth-first
+    #searches that grow around each end. Same arguments and result as a_star,
+    #walls at either end included.
+    if grid is None:
+        grid = get_grid()
+    path, expanded = _bidirectional_ids(grid.cell_id(*start), grid.cell_id(*goal), grid, heuristic=False)
+    return [grid.cell_pos(cell_id) for cell_id in path]
+
+
+def _bidirectional_ids(start, goal, grid, heuristic=True, stats=None):
+    #Bidirectional A* (or BFS) over cell ids.
+    #Side 0 searches from start toward goal, side 1 from goal toward start. Every
+    #time a side reaches a cell the other side has already reached, the two halves
+    #form a path and the shortest one so far is kept ("best").
+    #Both sides use the same "balanced" heuristic, half the difference of the
+    #distances to the two ends: p(cell) = (h_goal(cell) - h_start(cell)) / 2 going
+    #forward and -p(cell) going backward. With it, a cell's forward and backward
+    #priorities add up to the length of the best path through that cell, so the
+    #search can stop as soon as the two smallest priorities add up to >= best.
+    #(Giving each side its own heuristic instead lets the two searches run past
+    #each other and expand more cells than plain A*.) Priorities are doubled to
+    #stay integers. Without the heuristic this is a bidirectional BFS with the
+    #usual "smallest costs add up to >= best" stop.
+    #Args:
+        #heuristic (bool): Use the Manhattan heuristic (A*) or plain costs (BFS)
+        #stats (dict): Optional dict that receives "expanded" and "frontier_peak"
+                      #(both sides together), like _a_star_ids
+    #Returns:
+        #tuple: (path, expanded) like _a_star_ids; expanded counts both sides
+    if start == goal:
+        return [start], 0
+    if grid.cells[goal] != 0:
+        return [], 0  # The backward search would otherwise start inside a wall
+    # A walled start is fine: the forward side leaves it through its open neighbors
+    neighbor_table = get_neighbor_table(grid)
+    stride = grid.stride
+    goal_row, goal_col = divmod(goal, stride)
+    start_row, start_col = divmod(start, stride)
+    span = abs(start_row - goal_row) + abs(start_col - goal_col) if heuristic else 0
+    signs = (1, -1)  # The backward side uses the negated heuristic
+
+    # Per side: heap of (2 * cost + 2 * heuristic, cost, cell), cost so far, parent links, expanded cells
+    heaps = ([(span, 0, start)], [(span, 0, goal)])
+    costs = ({start: 0}, {goal: 0})
+    came_from = ({start: None}, {goal: None})
+    explored = (set(), set())
+
+    best = sys.maxsize  # Length of the shortest path found so far
+    meeting = None  # (side, cell on that side, neighbor reached from the other side)
+    frontier_peak = 0
+
+    while heaps[0] and heaps[1]:
+        if len(heaps[0]) + len(heaps[1]) > frontier_peak:
+            frontier_peak = len(heaps[0]) + len(heaps[1])
+
+        # Stale heap entries only make this bound smaller, so it stays safe to use
+        if heaps[0][0][0] + heaps[1][0][0] >= 2 * best:
+            break
+
+        # Expand the side with the smaller frontier; it is the cheaper one to grow
+        side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+        x, cost, current = heappop(heaps[side])
+        if current in explored[side]:
+            continue  # Lazy deletion, as in _a_star_ids
+        explored[side].add(current)
+
+        side_costs = costs[side]
+        other_costs = costs[1 - side]
+        parents = came_from[side]
+        heap = heaps[side]
+        sign = signs[side]
+        new_cost = cost + 1
+
+        for neighbor in neighbor_table[current]:
+            if new_cost < side_costs.get(neighbor, new_cost + 1):
+                side_costs[neighbor] = new_cost
+                parents[neighbor] = current
+                priority = 2 * new_cost
+                if heuristic:
+                    neighbor_row, neighbor_col = divmod(neighbor, stride)
+                    priority += sign * (abs(neighbor_row - goal_row) + abs(neighbor_col - goal_col)
+                                        - abs(neighbor_row - start_row) - abs(neighbor_col - start_col))
+                heappush(heap, (priority, new_cost, neighbor))
+
+            # The other side got here already: current -> neighbor joins the two halves
+            other = other_costs.get(neighbor)
+            if other is not None and new_cost + other < best:
+                best = new_cost + other
+                meeting = (side, current, neighbor)
+
+    if stats is not None:
+        stats["expanded"] = len(explored[0]) + len(explored[1])
+        stats["frontier_peak"] = frontier_peak
+    if meeting is None:
+        return [], len(explored[0]) + len(explored[1])
+
+    # Walk the parent links back from both ends of the joining step
+    side, current, neighbor = meeting
+    near = []
+    while current is not None:
+        near.append(current)
+        current = came_from[side][current]
+    far = []
+    while neighbor is not None:
+        far.append(neighbor)
+        neighbor = came_from[1 - side][neighbor]
+    near.reverse()
+    path = near + far  # From this side's end to the other side's end
+    if side == 1:
+        path.reverse()
+    return path, len(explored[0]) + len(explored[1])
+
+
+class IncrementalPlanner:
+    def __init__(self, grid=None, max_excess=4, repair_limit=64):
+        """
+        Keeps one agent's path between calls and repairs it instead of searching again.
+
+        Each call to plan() first tries cheap fixes on the cached path:
+        - drop cells the agent already walked past,
+        - reuse the path unchanged if the goal did not move,
+        - cut the path short if the goal moved back onto it,
+        - otherwise run a small A* from the old goal to the new goal and append it.
+        If none of those apply, a full A* search replaces the path.
+
+        Repairs keep the path valid but can make it longer than the shortest path.
+        Every appended step can add at most 2 steps of detour, and once the
+        detour bound would exceed max_excess a full search runs instead.
+
+        Args:
+            grid (Grid): The maze to plan in (defaults to the current level).
+            max_excess (int): Largest number of extra steps (compared to the shortest
+                              path) a repaired path may have.
+            repair_limit (int): Most cells a repair search may expand before falling
+                                back to a full search.
+        """
+        self.grid = grid if grid is not None else get_grid()
+        self.max_excess = max_excess
+        self.repair_limit = repair_limit
+
+        self.path = []  # Cached path as cell ids, path[0] is the agent's cell
+        self.excess = 0  # Upper bound on how many steps longer than optimal self.path is
+        self.version = self.grid.version  # Grid version self.path was planned on
+
+        # Counters to check how often the cheap cases win
+        self.calls = 0
+        self.full_searches = 0
+        self.repairs = 0  # Calls answered by a small repair search
+        self.reuses = 0  # Calls answered without expanding any cell
+        self.expansions = 0  # Cells expanded over all calls
+        self.last_expansions = 0  # Cells expanded by the latest call
+
+    def stats(self):
+        """
+        Return the counters as a dict.
+        """
+        return {
+            "calls": self.calls,
+            "full_searches": self.full_searches,
+            "repairs": self.repairs,
+            "reuses": self.reuses,
+            "expansions": self.expansions,
+            "expansions_per_call": self.expansions / self.calls if self.calls else 0.0,
+        }
+
+    def plan(self, start, goal):
+        """
+        Return a path from start to goal, reusing the previous one where possible.
+
+        Args:
+            start (tuple): (row, col) of the agent.
+            goal (tuple): (row, col) of the target.
+
+        Returns:
+            list of tuples: Cells from start to goal (inclusive), or [] if unreachable.
+        """
+        grid = self.grid
+        path = self.plan_ids(grid.cell_id(*start), grid.cell_id(*goal))
+        return [grid.cell_pos(cell_id) for cell_id in path]
+
+    def plan_ids(self, start, goal):
+        # Int-id version of plan(); returns the cached list, do not modify it
+        self.calls += 1
+        self.last_expansions = 0
+        if self.grid.version != self.version:
+            self._check_walls()
+        path = self.path
+
+        # The agent usually moved one step along the path since the last call
+        if len(path) > 1 and path[1] == start:
+            del path[0]
+
+        if path and path[0] == start:
+            if path[-1] == goal:
+                self.reuses += 1
+                return path
+
+            # Goal stepped back onto the path: the prefix up to it is still valid
+            # and a prefix is never worse than the whole path
+            tail = min(len(path), 8)
+            for index in range(len(path) - 1, len(path) - 1 - tail, -1):
+                if path[index] == goal:
+                    del path[index + 1:]
+                    self.reuses += 1
+                    return path
+
+            if self._repair(goal):
+                return self.path
+
+        # Nothing to reuse: full search from scratch
+        self.path, expanded = _a_star_ids(start, goal, self.grid)
+        self.excess = 0
+        self.full_searches += 1
+        self._count(expanded)
+        return self.path
+
+    def _check_walls(self):
+        #Forget the cached path if wall edits since it was planned made it wrong.
+        grid = self.grid
+        changed = grid.changed_since(self.version)
+        self.version = grid.version
+        path = self.path
+        if not path:
+            return
+        if changed is None:
+            self.path = []
+            return
+        walled, opened = split_changes(grid, changed)
+        # The excess allowance covers detours; a new wall or shortcut means a fresh search
+        if path_outdated(path, path[0], path[-1], grid.stride, walled, opened):
+            self.path = []
+
+    def _repair(self, goal):
+        #Append a short path from the old goal to the new goal.
+        #Returns:
+            #bool: True if the cached path was repaired
+        path = self.path
+
+        # Skip the search when even a straight segment would break the detour bound
+        old_row, old_col = divmod(path[-1], self.grid.stride)
+        goal_row, goal_col = divmod(goal, self.grid.stride)
+        if self.excess + 2 * (abs(old_row - goal_row) + abs(old_col - goal_col)) > self.max_excess:
+            return False
+
+        segment, expanded = _a_star_ids(path[-1], goal, self.grid, self.repair_limit)
+        self._count(expanded)
+        if not segment:
+            return False
+
+        # The path to the new goal can be at most 2 steps worse per appended step
+        excess = self.excess + 2 * (len(segment) - 1)
+        if excess > self.max_excess:
+            return False
+
+        # Appending can walk back over cells already on the path; cut such loops out
+        positions = {cell_id: index for index, cell_id in enumerate(path)}
+        for cell_id in segment[1:]:
+            index = positions.get(cell_id)
+            if index is not None:
+                for removed in path[index + 1:]:
+                    del positions[removed]
+                del path[index + 1:]
+            else:
+                positions[cell_id] = len(path)
+                path.append(cell_id)
+
+        self.excess = excess
+        self.repairs += 1
+        return True
+
+    def _count(self, expanded):
+        self.expansions += expanded
+        self.last_expansions += expanded
+
+
+class PathCache:
+    def __init__(self, grid=None, max_entries=1024, max_cells=1 << 16, search=None):
+        """
+        Bounded LRU memo of search results, keyed by (start, goal) cell ids.
+
+        During play the same (ghost cell, player cell) pairs come up over and over.
+        A repeated query is answered from the cache, and so is any query whose
+        start lies on a cached path to the same goal: every suffix of a shortest
+        path is a shortest path too. Paths are stored as array('i') of cell ids.
+
+        The cache remembers grid.version. After walls change through
+        grid.set_cell() it drops only the paths the edits could have made wrong
+        (see sync()); after grid.bump_version() it empties itself.
+
+        Args:
+            grid (Grid): The maze to plan in (defaults to the current level).
+            max_entries (int): Most paths kept; the least recently used go first.
+            max_cells (int): Most path cells kept over all entries, so memory stays
+                             bounded on large levels where paths are long.
+            search (function): Id-level search to memoize, returning (path, expanded)
+                               like _a_star_ids (the default) or _jump_point_search_ids.
+        """
+        self.grid = grid if grid is not None else get_grid()
+        self.max_entries = max_entries
+        self.max_cells = max_cells
+        self.search = search if search is not None else _a_star_ids
+        self.version = self.grid.version
+
+        self.paths = OrderedDict()  # (start, goal) -> array('i') path, oldest first
+        self.through = {}  # goal -> {cell on a cached path: (start, goal) key of that path}
+        self.cells = 0  # Path cells stored over all entries
+
+        # Counters, see stats()
+        self.hits = 0  # Exact (start, goal) matches
+        self.suffix_hits = 0  # Answered from a longer cached path through start
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0  # Paths dropped because walls changed
+
+    def stats(self):
+        """
+        Return the hit/miss counters and the current size as a dict.
+        """
+        queries = self.hits + self.suffix_hits + self.misses
+        return {
+            "hits": self.hits,
+            "suffix_hits": self.suffix_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.suffix_hits) / queries if queries else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self.paths),
+            "cells": self.cells,
+            "path_bytes": self.cells * array("i").itemsize,
+            "index_bytes": sum(sys.getsizeof(cells) for cells in self.through.values()),
+        }
+
+    def clear(self):
+        """
+        Drop every cached path (the counters are kept).
+        """
+        self.paths.clear()
+        self.through.clear()
+        self.cells = 0
+        self.version = self.grid.version
+
+    def find_path(self, start, goal, grid=None):
+        """
+        Drop-in replacement for a_star that answers from the cache when it can.
+
+        Pass it where a search function is expected, e.g. Ghost(search=cache.find_path).
+        Queries for a different grid than the cache's are passed straight to a_star.
+
+        Returns:
+            list of tuples: Cells from start to goal (inclusive), or [] if unreachable.
+        """
+        if grid is not None and grid is not self.grid:
+            return a_star(start, goal, grid)
+        grid = self.grid
+        path = self.find_path_ids(grid.cell_id(*start), grid.cell_id(*goal))
+        return [grid.cell_pos(cell_id) for cell_id in path]
+
+    def find_path_ids(self, start, goal):
+        # Int-id version of find_path(); returns an array('i'), do not modify it
+        if self.grid.version != self.version:
+            self.sync()  # Walls changed since these paths were found
+
+        key = (start, goal)
+        path = self.paths.get(key)
+        if path is not None:
+            self.paths.move_to_end(key)
+            self.hits += 1
+            return path
+
+        # The start may be on a cached path to the same goal; its tail is the answer
+        owner = self.through.get(goal, {}).get(start)
+        if owner is not None:
+            path = self.paths[owner]
+            self.paths.move_to_end(owner)
+            self.suffix_hits += 1
+            return path[path.index(start):]
+
+        self.misses += 1
+        path, expanded = self.search(start, goal, self.grid)
+        path = array("i", path)
+        self._store(key, path)
+        return path
+
+    def sync(self):
+        """
+        Drop the cached paths that wall edits since the last call made wrong.
+
+        A path goes if it crosses a cell that became a wall, or if a cell that
+        opened is close enough to both of its ends that a route through it could
+        be shorter. Every other path is still a shortest path and stays.
+        """
+        grid = self.grid
+        changed = grid.changed_since(self.version)
+        if changed is None:
+            self.clear()
+            return
+        self.version = grid.version
+        walled, opened = split_changes(grid, changed)
+        stride = grid.stride
+        outdated = [key for key, path in self.paths.items()
+                    if path_outdated(path, key[0], key[1], stride, walled, opened)]
+        for key in outdated:
+            self._drop(key)
+        self.invalidations += len(outdated)
+
+    def _store(self, key, path):
+        # Paths longer than the whole cell budget are returned but not kept
+        if len(path) > self.max_cells:
+            return
+        self.paths[key] = path
+        self.cells += len(path)
+        cells_to_goal = self.through.setdefault(key[1], {})
+        for cell_id in path:
+            cells_to_goal[cell_id] = key  # Newer paths take over shared cells
+
+        while len(self.paths) > self.max_entries or self.cells > self.max_cells:
+            self._evict()
+
+    def _evict(self):
+        # Drop the least recently used path
+        self._drop(next(iter(self.paths)))
+        self.evictions += 1
 
+    def _drop(self, key):
+        # Remove one path and its entries in the through index
+        path = self.paths.pop(key)
+        self.cells -= len(path)
+        # Unreachable results have no cells, so their goal may have no index left
+        cells_to_goal = self.through.get(key[1], {})
+        for cell_id in path:
+            if cells_to_goal.get(cell_id) == key:
+                del cells_to_goal[cell_id]
+        if not cells_to_goal:
+            self.through.pop(key[1], None)
@@ -0,0 +1,177 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from grid import Grid
+from maze import get_grid
+from pathfinding import a_star
+
+# Grid the worker process plans on; a zero-copy view of the parent's shared memory
+_worker_grid = None
+_worker_memory = None
+# Parent grid version the worker's caches (neighbor table) are up to date with
+_worker_version = 0
+
+
+def _init_worker(name, rows, cols, version):
+    #Runs once in every worker process: map the parent's grid into this process.
+    global _worker_grid, _worker_memory, _worker_version
+    # Workers share the parent's resource tracker, so attaching here does not add a
+    # second owner; the parent unlinks the block in ParallelPlanner.close()
+    _worker_memory = shared_memory.SharedMemory(name=name)
+    size = (rows + 2) * (cols + 2)
+    _worker_grid = Grid(rows, cols, cells=_worker_memory.buf[:size])
+    _worker_version = version
+
+
+def _apply_changes(changes):
+    #Runs in a worker: the shared cells already hold the edits, but the worker's
+    #grid has its own version and change log, so tell it which cells changed.
+    global _worker_version
+    base, version, cell_ids = changes
+    if version == _worker_version:
+        return
+    if base == _worker_version and cell_ids is not None:
+        _worker_grid.mark_changed(cell_ids)  # Caches patch around these cells
+    else:
+        _worker_grid.bump_version()  # Missed a sync; caches rebuild
+    _worker_version = version
+
+
+def _plan_chunk(queries, changes):
+    #Runs in a worker: solve a list of (start, goal) queries with the serial A*.
+    _apply_changes(changes)
+    return [a_star(start, goal, _worker_grid) for start, goal in queries]
+
+
+class PlanBatch:
+    def __init__(self, futures):
+        """
+        Handle for a batch of path queries that is being solved in the background.
+
+        Args:
+            futures (list): One Future per chunk of queries, in query order.
+        """
+        self.futures = futures
+
+    def done(self):
+        # True once every path is ready; poll this from the game loop instead of blocking
+        return all(future.done() for future in self.futures)
+
+    async def wait(self):
+        """
+        Coroutine version of result(): await the paths without blocking the event loop.
+        """
+        chunks = await asyncio.gather(*(asyncio.wrap_future(future) for future in self.futures))
+        return [path for chunk in chunks for path in chunk]
+
+    def result(self, timeout=None):
+        """
+        Return the paths in the same order as the queries (waits if not done yet).
+        """
+        paths = []
+        for future in self.futures:
+            paths.extend(future.result(timeout))
+        return paths
+
+
+class ParallelPlanner:
+    def __init__(self, grid=None, workers=None, chunk_size=None):
+        """
+        Solve many path queries at once on a pool of worker processes.
+
+        The grid is copied once into a multiprocessing.shared_memory block and every
+        worker maps it directly, so only the small (start, goal) queries and the
+        resulting paths cross process boundaries. Each worker runs the normal
+        a_star, so the paths are exactly the ones the serial search returns.
+
+        Args:
+            grid (Grid): The maze to plan in (defaults to the current level).
+            workers (int): Number of worker processes (defaults to the CPU count).
+            chunk_size (int): Queries sent to a worker at a time; defaults to spreading
+                              each batch evenly over the workers.
+        """
+        if grid is None:
+            grid = get_grid()
+        self.grid = grid
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+        self.memory = shared_memory.SharedMemory(create=True, size=grid.size)
+        self.memory.buf[:grid.size] = grid.cells
+        # Grid version in shared memory, and (previous version, version, edited
+        # cell ids or None) of the latest sync, sent along with every batch
+        self.version = grid.version
+        self.changes = (self.version, self.version, ())
+
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.memory.name, grid.rows, grid.cols, self.version),
+        )
+
+    def sync(self):
+        """
+        Copy wall edits into shared memory (submit() does this when walls changed).
+
+        Only the edited cells are copied when the grid's change log has them,
+        and the workers patch their neighbor tables around those cells instead
+        of rebuilding them. Cells written into grid.cells without a version bump
+        are found by comparing with shared memory; the grid's version is then
+        bumped, so the workers (and any other cache) rebuild. Only affects
+        batches submitted afterwards.
+        """
+        grid = self.grid
+        if grid.version == self.version:
+            if self.memory.buf[:grid.size] == grid.cells:
+                return
+            grid.bump_version()  # Edited in place without telling the grid
+        changed = grid.changed_since(self.version)
+        if changed is None:
+            self.memory.buf[:grid.size] = grid.cells
+        else:
+            changed = tuple(set(changed))
+            buf, cells = self.memory.buf, grid.cells
+            for cell_id in changed:
+                buf[cell_id] = cells[cell_id]
+        self.changes = (self.version, grid.version, changed)
+        self.version = grid.version
+
+    def submit(self, queries):
+        """
+        Start solving a batch of queries without waiting for the answers.
+
+        Args:
+            queries (list): (start, goal) pairs of (row, col) tuples.
+
+        Returns:
+            PlanBatch: Poll done() each frame and read result() once it is ready.
+        """
+        if self.grid.version != self.version:
+            self.sync()  # Walls changed since the last batch
+        queries = list(queries)
+        chunk_size = self.chunk_size or max(1, -(-len(queries) // self.workers))
+        futures = [self.executor.submit(_plan_chunk, queries[index:index + chunk_size], self.changes)
+                   for index in range(0, len(queries), chunk_size)]
+        return PlanBatch(futures)
+
+    def plan(self, queries):
+        """
+        Solve a batch of queries and wait for the result.
+        """
+        return self.submit(queries).result()
+
+    def close(self):
+        """
+        Stop the workers and free the shared memory.
+        """
+        self.executor.shutdown(wait=True)
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
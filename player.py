@@ -1,27 +1,42 @@
-import pygame
-from maze import TILE_SIZE, MAZE, ROWS, COLS
+from maze import TILE_SIZE, get_grid
 
 PLAYER_COLOR = (255, 255, 0)  # Bright yellow for player (used only if fallback drawing needed)
 
 class Player:
-    def __init__(self, row, col, image_path="public/player.png"):
+    # Fixed attributes instead of a per-instance __dict__
+    __slots__ = ("row", "col", "grid", "image")
+
+    def __init__(self, row, col, image_path="public/player.png", grid=None):
         """
         Initialize the Player at the specified grid position.
 
         Args:
             row (int): The row index on the grid.
             col (int): The column index on the grid.
-            image_path (str): Path to the player sprite image file.
+            image_path (str): Path to the player sprite image file, or None for a
+                              player without a sprite (headless simulation).
+            grid (Grid): The maze the player walks in (defaults to the current level).
         """
         # Player's position on the grid (row, col)
         self.row = row
         self.col = col
 
-        # Load the player image and scale it to the tile size for proper fit
+        # Maze used for the wall checks in move()
+        self.grid = grid if grid is not None else get_grid()
+
+        self.image = None
+        if image_path is None:
+            return
+
+        # pygame and the asset cache are only needed for the sprite, so headless players never import them
+        import pygame
+        import assets
+
+        # Load the player image scaled to the tile size; the asset cache loads it
+        # from disk only once, so a retry reuses the same Surface
         try:
-            self.image = pygame.image.load(image_path).convert_alpha()
-            self.image = pygame.transform.scale(self.image, (TILE_SIZE, TILE_SIZE))
-        except pygame.error:
+            self.image = assets.load_image(image_path, (TILE_SIZE, TILE_SIZE))
+        except (pygame.error, FileNotFoundError):
             # In case the image file is missing or can't be loaded,
             # set image to None and fallback to drawing a circle
             print(f"Warning: Could not load image at path: {image_path}")
@@ -41,12 +56,11 @@ class Player:
         new_row = self.row + dr
         new_col = self.col + dc
 
-        # Check if new position is inside maze bounds
-        if 0 <= new_row < ROWS and 0 <= new_col < COLS:
-            # Check if new position is not a wall (assuming 0 is empty space)
-            if MAZE[new_row][new_col] == 0:
-                self.row = new_row
-                self.col = new_col
+        # Check if new position is not a wall. The grid has a wall border,
+        # so a step off the edge of the maze is rejected by the same check
+        if self.grid.is_open(new_row, new_col):
+            self.row = new_row
+            self.col = new_col
 
     def draw(self, win):
         """
@@ -55,6 +69,8 @@ class Player:
         If an image is loaded, draw the image aligned to the tile.
         Otherwise, fallback to drawing a yellow circle.
         """
+        import pygame
+
         # Calculate pixel position for the top-left corner of the tile
         px = self.col * TILE_SIZE
         py = self.row * TILE_SIZE
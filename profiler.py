@@ -0,0 +1,192 @@
+import csv
+import json
+from collections import deque
+from time import perf_counter_ns
+
+from pathfinding import a_star, _a_star_ids
+from maze import get_grid
+
+# Samples kept per phase for the rolling percentiles (5 seconds at 60 FPS)
+WINDOW = 300
+
+# Most timing events kept for export; older ones are dropped
+TRACE_LIMIT = 100_000
+
+# The overlay text is rebuilt every this many frames, not every frame
+OVERLAY_REFRESH = 10
+
+OVERLAY_COLOR = (0, 255, 0)
+OVERLAY_SIZE = 18
+
+
+def percentile(ordered, fraction):
+    #Nearest-rank percentile of an already sorted sequence.
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Profiler:
+    def __init__(self, enabled=False, window=WINDOW, trace_limit=TRACE_LIMIT):
+        """
+        Opt-in frame profiler: per-phase timers, search counters and trace export.
+
+        The game loop brackets each phase with lap():
+
+            start = profile.mark()
+            ...handle input...
+            start = profile.lap("input", start)
+
+        While disabled, mark() and lap() only check a flag and return 0, so the
+        instrumented loop costs about the same as an uninstrumented one.
+
+        Args:
+            enabled (bool): Start recording right away.
+            window (int): Samples per phase kept for the rolling p50/p95/p99.
+            trace_limit (int): Most events kept for export_csv / export_trace.
+        """
+        self.enabled = enabled
+        self.show_overlay = False
+        self.window = window
+
+        self.samples = {}  # Phase or counter name -> deque of the latest values
+        self.timed = set()  # Names recorded by lap() (nanoseconds) rather than count()
+        self.trace = deque(maxlen=trace_limit)  # (name, start ns, duration ns, frame)
+        self.frame = 0
+        self.search_stats = {}  # Filled by _a_star_ids on every profiled search
+
+        self._overlay_lines = []
+
+    def toggle(self):
+        """
+        Show or hide the overlay. Showing it also turns recording on.
+        """
+        self.show_overlay = not self.show_overlay
+        if self.show_overlay:
+            self.enabled = True
+
+    def mark(self):
+        # Start time for the next lap(), or 0 while disabled
+        return perf_counter_ns() if self.enabled else 0
+
+    def lap(self, phase, start):
+        """
+        Record the time since start under phase and return the current time.
+
+        Returns:
+            int: perf_counter_ns() now (start of the next phase), or 0 while disabled.
+        """
+        if not self.enabled:
+            return 0
+        now = perf_counter_ns()
+        self.timed.add(phase)
+        self._add(phase, now - start)
+        self.trace.append((phase, start, now - start, self.frame))
+        return now
+
+    def count(self, name, value):
+        # Record a plain number (e.g. cells expanded) under name
+        if self.enabled:
+            self._add(name, value)
+
+    def end_frame(self):
+        # Advance the frame number used to group trace events
+        self.frame += 1
+
+    def _add(self, name, value):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append(value)
+
+    def a_star(self, start, goal, grid=None):
+        """
+        Drop-in replacement for pathfinding.a_star that records the search.
+
+        Records the search time under "a_star" and the counters "a_star_expanded"
+        and "a_star_frontier_peak". Pass it as Ghost(search=profile.a_star).
+        """
+        if not self.enabled:
+            return a_star(start, goal, grid)
+        if grid is None:
+            grid = get_grid()
+
+        begin = perf_counter_ns()
+        stats = self.search_stats
+        path, expanded = _a_star_ids(grid.cell_id(*start), grid.cell_id(*goal), grid, stats=stats)
+        self.lap("a_star", begin)
+        self._add("a_star_expanded", stats["expanded"])
+        self._add("a_star_frontier_peak", stats["frontier_peak"])
+        return [grid.cell_pos(cell_id) for cell_id in path]
+
+    def summary(self):
+        """
+        Return rolling percentiles for every phase and counter.
+
+        Returns:
+            dict: {name: {"p50": ..., "p95": ..., "p99": ..., "count": ...}}. Phase
+                  times are in milliseconds, counters in their own unit.
+        """
+        result = {}
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            # Phase timings are stored in ns; counters are stored as they are
+            scale = 1e-6 if name in self.timed else 1
+            result[name] = {
+                "p50": percentile(ordered, 0.50) * scale,
+                "p95": percentile(ordered, 0.95) * scale,
+                "p99": percentile(ordered, 0.99) * scale,
+                "count": len(ordered),
+            }
+        return result
+
+    def export_csv(self, path):
+        """
+        Write every recorded event as CSV: frame, phase, start_us, duration_us.
+        """
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(("frame", "phase", "start_us", "duration_us"))
+            for name, start, duration, frame in self.trace:
+                writer.writerow((frame, name, start / 1000, duration / 1000))
+
+    def export_trace(self, path):
+        """
+        Write every recorded event in the Chrome trace event format.
+
+        The file opens in chrome://tracing, Perfetto or speedscope as a timeline.
+        """
+        events = [{"name": name, "ph": "X", "ts": start / 1000, "dur": duration / 1000,
+                   "pid": 1, "tid": 1, "args": {"frame": frame}}
+                  for name, start, duration, frame in self.trace]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    def export(self, path):
+        # CSV for a .csv path, Chrome trace JSON for anything else
+        if str(path).endswith(".csv"):
+            self.export_csv(path)
+        else:
+            self.export_trace(path)
+
+    def draw_overlay(self, renderer):
+        """
+        Draw the p50/p95/p99 table in the top-right corner while the overlay is shown.
+
+        Args:
+            renderer (Renderer): Frame renderer; the text is marked as dirty.
+        """
+        if not self.show_overlay:
+            return
+        import assets
+
+        if self.frame % OVERLAY_REFRESH == 0 or not self._overlay_lines:
+            self._overlay_lines = [
+                f"{name}: {values['p50']:.2f} / {values['p95']:.2f} / {values['p99']:.2f}"
+                for name, values in sorted(self.summary().items())
+            ]
+
+        width = renderer.win.get_width()
+        y = 10
+        for line in ["p50 / p95 / p99"] + self._overlay_lines:
+            text = assets.render_text(line, OVERLAY_COLOR, OVERLAY_SIZE)
+            renderer.blit(text, (width - text.get_width() - 10, y))
+            y += text.get_height()
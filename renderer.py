@@ -0,0 +1,159 @@
+import pygame
+from maze import TILE_SIZE, build_maze_surface, draw_maze_cells, redraw_maze, get_grid
+from sprites import SpriteBatch, build_game_atlas
+
+
+class Renderer:
+    def __init__(self, win, background=None, atlas=None, grid=None):
+        """
+        Draw frames by only touching the parts of the window that changed.
+
+        The maze is drawn once to an off-screen surface. Each frame the renderer
+        copies the maze back over whatever was drawn the frame before (sprites,
+        timer text), draws the new sprites, and pushes only those rectangles to
+        the screen with pygame.display.update(rects). When walls change
+        (grid.version moves), only the edited tiles are drawn again.
+
+        Sprites found in the atlas and text are not drawn right away: they are
+        collected in a SpriteBatch and drawn in one Surface.blits call at
+        end_frame(), so the cost per sprite is a list append instead of a
+        Python-level blit call.
+
+        Args:
+            win (pygame.Surface): The pygame window surface to draw on.
+            background (pygame.Surface): Maze surface from an earlier Renderer to
+                                         reuse (e.g. on retry); built when omitted.
+                                         It must show the walls as they are now.
+            atlas (SpriteAtlas): Sprites and wall tile to draw from; the game's
+                                 atlas (sprites.build_game_atlas) when omitted.
+            grid (Grid): The maze on screen (defaults to the current level).
+        """
+        if grid is None:
+            grid = get_grid()
+        self.win = win
+        self.grid = grid
+        self.atlas = atlas if atlas is not None else build_game_atlas()
+        if background is None:
+            background = build_maze_surface(win.get_size(), grid, self.atlas)
+        self.background = background
+        self.version = grid.version  # Grid version the background shows
+        self.batch = SpriteBatch()  # This frame's sprite and text draws, in order
+        self.bounds = win.get_rect()
+
+        # Rectangles drawn during the previous frame (restored at the next frame)
+        self.previous_rects = []
+        # Rectangles that changed during the current frame (pushed to the screen)
+        self.dirty_rects = []
+
+        # The first frame (and any frame after invalidate()) pushes the whole window
+        self.full_redraw = True
+
+    def invalidate(self):
+        # Force the next frame to redraw and push the whole window,
+        # e.g. after a menu or game over screen painted over it
+        self.full_redraw = True
+
+    def begin_frame(self):
+        """
+        Start a frame: erase last frame's sprites by copying the maze over them.
+        """
+        if self.grid.version != self.version:
+            self.sync()  # Walls changed since the last frame
+        if self.full_redraw:
+            self.win.blit(self.background, (0, 0))
+            self.dirty_rects = []
+        else:
+            # Copy only the areas the old sprites covered; they must be pushed
+            # to the screen too, or the old sprite would stay visible
+            background = self.background
+            self.win.blits([(background, rect, rect) for rect in self.previous_rects], doreturn=False)
+            self.dirty_rects = self.previous_rects
+        self.previous_rects = []
+
+    def sync(self):
+        """
+        Draw the maze tiles whose walls changed again (begin_frame() calls this).
+
+        The edited cells come from the grid's change log and are drawn on the
+        background in place, so a background shared with a later Renderer stays
+        current. Without a log (grid.bump_version()) the whole maze is drawn
+        again and the next frame pushes the whole window.
+        """
+        grid = self.grid
+        changed = grid.changed_since(self.version)
+        self.version = grid.version
+        if changed is None:
+            redraw_maze(self.background, grid, self.atlas)
+            self.full_redraw = True
+            return
+        # Restored from the background and pushed like last frame's sprites
+        self.previous_rects.extend(draw_maze_cells(self.background, changed, grid, self.atlas))
+
+    def draw_entity(self, entity, previous=None, alpha=1.0):
+        """
+        Draw a grid entity (anything with row, col, image and draw(win)) and mark its tile dirty.
+
+        Entities whose image is in the atlas are batched; any other entity (e.g.
+        a player without a sprite) draws itself right away.
+
+        Args:
+            entity: The entity to draw.
+            previous (tuple): (row, col) the entity stood on before the last logic
+                              step; with alpha, the sprite is drawn part of the
+                              way between that tile and the current one.
+            alpha (float): 0 draws at previous, 1 at the current tile (see FixedStep.alpha).
+        """
+        x, y = entity.col * TILE_SIZE, entity.row * TILE_SIZE
+        if previous is not None and alpha < 1.0:
+            # Only slide between neighboring tiles; anything else (a respawn) jumps
+            row, col = previous
+            if abs(row - entity.row) + abs(col - entity.col) == 1:
+                x = round(col * TILE_SIZE + (x - col * TILE_SIZE) * alpha)
+                y = round(row * TILE_SIZE + (y - row * TILE_SIZE) * alpha)
+
+        area = self.atlas.area(entity.image) if entity.image is not None else None
+        if area is not None:
+            self.batch.add(self.atlas.surface, (x, y), area)
+        else:
+            # Entities outside the atlas draw themselves, always on their tile
+            x, y = entity.col * TILE_SIZE, entity.row * TILE_SIZE
+            self.batch.flush(self.win)  # Keep the drawing order
+            entity.draw(self.win)
+        self._mark(pygame.Rect(x, y, TILE_SIZE, TILE_SIZE))
+
+    def draw_swarm(self, swarm):
+        """
+        Draw a GhostSwarm from the atlas and mark every ghost's tile dirty.
+        """
+        area = self.atlas.area(swarm.image)
+        if area is None:
+            self.batch.flush(self.win)
+            for rect in swarm.draw(self.win):
+                self._mark(rect)
+            return
+        source = self.atlas.surface
+        for x, y in swarm.pixel_positions():
+            self.batch.add(source, (x, y), area)
+            self._mark(pygame.Rect(x, y, TILE_SIZE, TILE_SIZE))
+
+    def blit(self, surface, position):
+        """
+        Draw a surface (e.g. rendered text) and mark the area it covers dirty.
+        """
+        self.batch.add(surface, position)
+        self._mark(surface.get_rect(topleft=position).clip(self.bounds))
+
+    def end_frame(self):
+        """
+        Draw the batched sprites and text, then push this frame's changes to the screen.
+        """
+        self.batch.flush(self.win)
+        if self.full_redraw:
+            pygame.display.update()
+            self.full_redraw = False
+        else:
+            pygame.display.update(self.dirty_rects)
+
+    def _mark(self, rect):
+        self.previous_rects.append(rect)
+        self.dirty_rects.append(rect)
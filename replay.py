@@ -0,0 +1,276 @@
+import struct
+import time
+
+from level import pack_rows, unpack_grid
+from player import Player
+from ghost import Ghost
+from simulation import Simulation, TICKS_PER_SECOND, ESCAPED, CAUGHT
+
+# ---- On-disk format -------------------------------------------------------------
+#
+# Header (little endian, 45 bytes):
+#   magic               4 bytes  b"GCRP"
+#   version             uint16   FORMAT_VERSION
+#   rows, cols          uint32   Level size
+#   player row, col     uint32   Player start cell
+#   ghost row, col      uint32   Ghost start cell
+#   ghost move delay    uint16
+#   player move delay   uint16
+#   total time          uint32   Seconds on the timer
+#   ticks per second    uint16
+#   ticks               uint32   Number of recorded ticks
+#   outcome             uint8    Index into OUTCOMES
+#
+# Then the level, packed like a level file body (one wall bit per cell, rows
+# padded to whole bytes), so a replay plays back without the original level.
+#
+# Then the inputs, run-length encoded: for every run of identical ticks one
+# byte with the direction bits followed by the run length as a LEB128 varint.
+# Keys are held for many ticks at a time, so a 30 second match (900 ticks)
+# usually takes well under a hundred bytes.
+
+MAGIC = b"GCRP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHIIIIIIHHIHIB")
+
+# Outcome stored in the header (None: the recording stopped before the game ended)
+OUTCOMES = (None, ESCAPED, CAUGHT)
+
+
+def encode_runs(inputs):
+    """
+    Run-length encode one byte per tick into (value, varint length) pairs.
+
+    Args:
+        inputs (bytes): Direction bits of every tick.
+
+    Returns:
+        bytes: The encoded runs.
+    """
+    encoded = bytearray()
+    index = 0
+    count = len(inputs)
+    while index < count:
+        value = inputs[index]
+        end = index + 1
+        while end < count and inputs[end] == value:
+            end += 1
+        encoded.append(value)
+        length = end - index
+        while length >= 0x80:  # LEB128: 7 bits per byte, high bit means "more follows"
+            encoded.append(length & 0x7F | 0x80)
+            length >>= 7
+        encoded.append(length)
+        index = end
+    return bytes(encoded)
+
+
+def decode_runs(data, offset=0):
+    """
+    Expand runs written by encode_runs back into one byte per tick.
+
+    Returns:
+        bytearray: Direction bits of every tick.
+    """
+    inputs = bytearray()
+    index = offset
+    while index < len(data):
+        value = data[index]
+        length = shift = 0
+        while True:
+            index += 1
+            byte = data[index]
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        index += 1
+        inputs += bytes([value]) * length
+    return inputs
+
+
+class ReplayMismatch(Exception):
+    # Raised when a replay plays back to a different result than was recorded
+    pass
+
+
+class Replay:
+    def __init__(self, grid, player_start, ghost_start, ghost_move_delay=5, player_move_delay=2,
+                 total_time=5, ticks_per_second=TICKS_PER_SECOND, inputs=None, outcome=None):
+        """
+        Everything needed to play a match again tick for tick: the starting state
+        and the direction bits pressed on every tick.
+
+        The game logic has no randomness and no clock (see Simulation), so feeding
+        the same inputs into a Simulation with the same starting state gives the
+        same match. Playback runs headless, as fast as the CPU allows.
+
+        Args:
+            grid (Grid): The level the match was played on.
+            player_start (tuple): (row, col) the player started on.
+            ghost_start (tuple): (row, col) the ghost started on.
+            ghost_move_delay (int): Simulation setting of the match.
+            player_move_delay (int): Simulation setting of the match.
+            total_time (int): Simulation setting of the match.
+            ticks_per_second (int): Simulation setting of the match.
+            inputs (bytearray): Direction bits per tick recorded so far.
+            outcome (str): ESCAPED, CAUGHT or None if the game had not ended.
+        """
+        self.grid = grid
+        self.player_start = tuple(player_start)
+        self.ghost_start = tuple(ghost_start)
+        self.ghost_move_delay = ghost_move_delay
+        self.player_move_delay = player_move_delay
+        self.total_time = total_time
+        self.ticks_per_second = ticks_per_second
+        self.inputs = inputs if inputs is not None else bytearray()
+        self.outcome = outcome
+
+    @classmethod
+    def start(cls, simulation):
+        """
+        Begin recording a simulation. Call before its first step().
+        """
+        if simulation.tick:
+            raise ValueError("Recording must start before the first tick")
+        return cls(simulation.grid,
+                   (simulation.player.row, simulation.player.col),
+                   (simulation.ghost.row, simulation.ghost.col),
+                   ghost_move_delay=simulation.ghost_move_delay,
+                   player_move_delay=simulation.player_move_delay,
+                   total_time=simulation.total_time,
+                   ticks_per_second=simulation.ticks_per_second)
+
+    def record(self, pressed, outcome=None):
+        """
+        Append one tick: the bits passed to Simulation.step and what it returned.
+        """
+        self.inputs.append(pressed)
+        if outcome is not None:
+            self.outcome = outcome
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def simulation(self):
+        """
+        Return a new headless Simulation in the recorded starting state.
+        """
+        grid = self.grid
+        return Simulation(
+            player=Player(*self.player_start, image_path=None, grid=grid),
+            ghost=Ghost(*self.ghost_start, image_path=None, grid=grid),
+            ghost_move_delay=self.ghost_move_delay,
+            player_move_delay=self.player_move_delay,
+            total_time=self.total_time,
+            ticks_per_second=self.ticks_per_second,
+            grid=grid,
+        )
+
+    def play(self, verify=True):
+        """
+        Run the recorded inputs through a fresh Simulation.
+
+        Args:
+            verify (bool): Raise ReplayMismatch if the match does not end the way
+                           (and on the tick) it did when it was recorded.
+
+        Returns:
+            Simulation: The simulation after the last recorded tick.
+        """
+        simulation = self.simulation()
+        step = simulation.step
+        outcome = None
+        for pressed in self.inputs:
+            result = step(pressed)
+            if result is not None:
+                outcome = result
+                ended_at = simulation.tick
+
+        if verify:
+            if outcome != self.outcome:
+                raise ReplayMismatch(f"Replay ended {outcome!r}, recorded {self.outcome!r}")
+            if outcome is not None and ended_at != len(self.inputs):
+                raise ReplayMismatch(f"Replay ended on tick {ended_at}, recorded {len(self.inputs)}")
+        return simulation
+
+    def to_bytes(self):
+        """
+        Return the replay in the binary replay format.
+        """
+        grid = self.grid
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, grid.rows, grid.cols,
+                             *self.player_start, *self.ghost_start,
+                             self.ghost_move_delay, self.player_move_delay,
+                             self.total_time, self.ticks_per_second,
+                             len(self.inputs), OUTCOMES.index(self.outcome))
+        return header + pack_rows(grid) + encode_runs(self.inputs)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Read a replay written by to_bytes().
+        """
+        if len(data) < HEADER.size:
+            raise ValueError("Not a replay (too short)")
+        (magic, version, rows, cols, player_row, player_col, ghost_row, ghost_col,
+         ghost_move_delay, player_move_delay, total_time, ticks_per_second,
+         ticks, outcome) = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a replay (bad magic {magic!r})")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Replay format version {version}, expected {FORMAT_VERSION}")
+
+        level_size = rows * ((cols + 7) // 8)
+        grid = unpack_grid(rows, cols, data, HEADER.size)
+        inputs = decode_runs(data, HEADER.size + level_size)
+        if len(inputs) != ticks:
+            raise ValueError(f"Replay holds {len(inputs)} ticks, header says {ticks}")
+        return cls(grid, (player_row, player_col), (ghost_row, ghost_col),
+                   ghost_move_delay=ghost_move_delay, player_move_delay=player_move_delay,
+                   total_time=total_time, ticks_per_second=ticks_per_second,
+                   inputs=inputs, outcome=OUTCOMES[outcome])
+
+    def save(self, path):
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+
+def load_replay(path):
+    """
+    Read a replay file written by Replay.save().
+    """
+    with open(path, "rb") as file:
+        return Replay.from_bytes(file.read())
+
+
+def main(argv=None):
+    """
+    Play a replay file back headless and report how fast the tick pipeline ran.
+
+    Usage:
+        python replay.py session.gcrp
+        python replay.py session.gcrp --repeat 100   # Longer run for timing
+    """
+    import argparse  # Only the command line needs it; keeps the import cheap for the game
+
+    parser = argparse.ArgumentParser(description="Play back a recorded match headless")
+    parser.add_argument("path", help="Replay file written with --record")
+    parser.add_argument("--repeat", type=int, default=1, help="Play the replay this many times")
+    args = parser.parse_args(argv)
+
+    replay = load_replay(args.path)
+    start_time = time.perf_counter()
+    for _ in range(args.repeat):
+        replay.play()
+    seconds = time.perf_counter() - start_time
+
+    ticks = len(replay) * args.repeat
+    real_time = ticks / replay.ticks_per_second
+    print(f"{args.path}: {replay.grid.rows}x{replay.grid.cols}, {len(replay)} ticks, outcome {replay.outcome}")
+    print(f"played {args.repeat}x in {seconds:.3f}s: {ticks / seconds:.0f} ticks/s, "
+          f"{real_time / seconds:.0f}x real time")
+
+
+if __name__ == "__main__":
+    main()
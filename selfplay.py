@@ -0,0 +1,368 @@
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from flowfield import _distance_field_ids
+from ghost import Ghost
+from grid import Grid
+from maze import get_grid
+from pathfinding import a_star
+from player import Player
+from simulation import Simulation, MOVES, CAUGHT
+
+# Scripted player policies, by name (see make_policy)
+POLICIES = ("greedy", "random")
+
+# Random spawns are at least this many steps apart (Manhattan), so no match is over on tick one
+MIN_SEPARATION = 5
+
+# Random draws spawn() tries before settling for the farthest pair it saw
+SPAWN_ATTEMPTS = 1000
+
+# Matches sent to a worker at a time; large enough that pickling the result is noise
+CHUNK_SIZE = 250
+
+# Distance fields GreedyFlee keeps before starting over (one per ghost cell seen)
+MAX_FIELDS = 4096
+
+# Ghost paths ExactPaths keeps before starting over
+MAX_PATHS = 100_000
+
+
+class ExactPaths:
+    def __init__(self, max_paths=MAX_PATHS):
+        """
+        Memo of a_star results for the ghosts of many matches on one level.
+
+        Matches on the same level ask for the same (ghost, player) pairs again and
+        again. Unlike PathCache this only answers exact repeats, so the ghost gets
+        the very path a_star returns and plays exactly like in the game.
+        Paths are shared between callers; Ghost.update only reads them.
+
+        Args:
+            max_paths (int): Paths kept before the memo is emptied.
+        """
+        self.max_paths = max_paths
+        self.paths = {}  # (start, goal) -> path
+
+    def __call__(self, start, goal, grid):
+        key = (start, goal)
+        path = self.paths.get(key)
+        if path is None:
+            if len(self.paths) >= self.max_paths:
+                self.paths.clear()
+            path = self.paths[key] = a_star(start, goal, grid)
+        return path
+
+
+class GreedyFlee:
+    def __init__(self, grid, max_fields=MAX_FIELDS):
+        """
+        Player policy that always steps to the neighbor furthest (in maze steps) from the ghost.
+
+        Distances come from a BFS distance field rooted at the ghost's cell. The
+        ghost only moves every few ticks and revisits the same cells, so the fields
+        are cached per ghost cell and most ticks are a four-neighbor lookup.
+
+        Args:
+            grid (Grid): The level the matches are played on.
+            max_fields (int): Cached fields kept before the cache is emptied.
+        """
+        self.grid = grid
+        self.max_fields = max_fields
+        self.fields = {}  # Ghost cell id -> array('i') of distances to it
+        # Direction bits with their cell id offsets; MOVES and Grid.offsets share the order
+        self.steps = tuple((bit, offset) for (bit, dr, dc), offset in zip(MOVES, grid.offsets))
+
+    def __call__(self, simulation):
+        grid = self.grid
+        ghost = simulation.ghost
+        player = simulation.player
+
+        ghost_id = grid.cell_id(ghost.row, ghost.col)
+        field = self.fields.get(ghost_id)
+        if field is None:
+            if len(self.fields) >= self.max_fields:
+                self.fields.clear()
+            field = self.fields[ghost_id] = _distance_field_ids(ghost_id, grid)
+
+        # Stay put unless a neighbor is further away; walls are UNREACHABLE (-1) and never win
+        cell_id = grid.cell_id(player.row, player.col)
+        best_distance = field[cell_id]
+        best_bits = 0
+        for bit, offset in self.steps:
+            distance = field[cell_id + offset]
+            if distance > best_distance:
+                best_distance, best_bits = distance, bit
+        return best_bits
+
+
+class RandomWalk:
+    def __init__(self, rng, turn_chance=0.1):
+        """
+        Player policy that holds a random arrow key and switches to another now and then.
+
+        Args:
+            rng (random.Random): Source of the key choices (one per match for reproducibility).
+            turn_chance (float): Chance per tick of picking a new key.
+        """
+        self.rng = rng
+        self.turn_chance = turn_chance
+        self.bits = [bit for bit, dr, dc in MOVES]
+        self.held = rng.choice(self.bits)
+
+    def __call__(self, simulation):
+        if self.rng.random() < self.turn_chance:
+            self.held = self.rng.choice(self.bits)
+        return self.held
+
+
+def make_policy(name, grid, rng):
+    """
+    Create a player policy by name ("greedy" or "random").
+
+    Returns:
+        callable: policy(simulation) -> pressed bits, for Simulation.run().
+    """
+    if name == "greedy":
+        return GreedyFlee(grid)
+    if name == "random":
+        return RandomWalk(rng)
+    raise ValueError(f"Unknown policy {name!r}, expected one of {POLICIES}")
+
+
+def spawn(grid, open_ids, rng, min_separation=MIN_SEPARATION):
+    """
+    Pick random (player, ghost) start cells at least min_separation steps apart.
+
+    On levels too small or too cramped for that, the farthest pair found in
+    SPAWN_ATTEMPTS draws is used instead, so small levels never hang.
+    """
+    if len(open_ids) < 2:
+        raise ValueError("The level needs at least two open cells to spawn a player and a ghost")
+    # No two cells are further apart than opposite corners
+    min_separation = min(min_separation, grid.rows + grid.cols - 2)
+
+    best, best_distance = None, -1
+    for _ in range(SPAWN_ATTEMPTS):
+        player = grid.cell_pos(rng.choice(open_ids))
+        ghost = grid.cell_pos(rng.choice(open_ids))
+        distance = abs(player[0] - ghost[0]) + abs(player[1] - ghost[1])
+        if distance >= min_separation:
+            return player, ghost
+        if distance > best_distance:
+            best, best_distance = (player, ghost), distance
+    return best
+
+
+def run_matches(grid, setting, policy_name, seeds):
+    """
+    Play one match per seed in this process and add up the results.
+
+    Every match gets its own random.Random(seed) for the spawn cells and the
+    random policy, so a seed plays out the same no matter how matches are
+    split over workers.
+
+    Args:
+        grid (Grid): The level.
+        setting (tuple): (ghost_move_delay, player_move_delay, total_time).
+        policy_name (str): One of POLICIES.
+        seeds (iterable): One seed per match.
+
+    Returns:
+        dict: matches, escapes, captures, capture_ticks (sum over captures) and
+              ticks (sum over all matches).
+    """
+    ghost_move_delay, player_move_delay, total_time = setting
+    open_ids = grid.open_ids()
+    totals = {"matches": 0, "escapes": 0, "captures": 0, "capture_ticks": 0, "ticks": 0}
+    greedy = GreedyFlee(grid) if policy_name == "greedy" else None  # Shared so its fields are reused
+    search = ExactPaths()  # Ghost searches repeat across matches; shared for the same reason
+
+    for seed in seeds:
+        rng = random.Random(seed)
+        player_start, ghost_start = spawn(grid, open_ids, rng)
+        simulation = Simulation(
+            player=Player(*player_start, image_path=None, grid=grid),
+            ghost=Ghost(*ghost_start, image_path=None, grid=grid, search=search),
+            ghost_move_delay=ghost_move_delay,
+            player_move_delay=player_move_delay,
+            total_time=total_time,
+            grid=grid,
+        )
+        outcome = simulation.run(greedy or make_policy(policy_name, grid, rng))
+
+        totals["matches"] += 1
+        totals["ticks"] += simulation.tick
+        if outcome == CAUGHT:
+            totals["captures"] += 1
+            totals["capture_ticks"] += simulation.tick
+        else:
+            totals["escapes"] += 1
+    return totals
+
+
+# Level the worker process plays on, copied in once by the pool initializer
+_worker_grid = None
+
+
+def _init_worker(rows, cols, cells):
+    #Runs once in every worker process: rebuild the level from its cell bytes.
+    global _worker_grid
+    _worker_grid = Grid(rows, cols, cells=bytearray(cells))
+
+
+def _run_chunk(setting, policy_name, seeds):
+    #Runs in a worker: play a chunk of matches and report how long it took.
+    start_time = time.perf_counter()
+    totals = run_matches(_worker_grid, setting, policy_name, seeds)
+    totals["seconds"] = time.perf_counter() - start_time
+    return totals
+
+
+def sweep(settings, policies=POLICIES, matches=1000, grid=None, workers=None,
+          chunk_size=CHUNK_SIZE, seed=0):
+    """
+    Play matches for every combination of setting and policy on a process pool.
+
+    Every combination uses the same seeds (seed .. seed + matches - 1), so all
+    settings are compared on the same spawns and the same random key presses.
+
+    Args:
+        settings (iterable): (ghost_move_delay, player_move_delay, total_time) tuples.
+        policies (iterable): Policy names from POLICIES.
+        matches (int): Matches per (setting, policy).
+        grid (Grid): The level (defaults to the current level).
+        workers (int): Worker processes (defaults to the CPU count); 0 plays
+                       everything in this process.
+        chunk_size (int): Matches per task sent to a worker.
+        seed (int): First match seed.
+
+    Returns:
+        dict: "results": one row per (setting, policy) with matches, escape_rate,
+              mean_ticks_to_capture and mean_ticks; plus "matches", "seconds"
+              (wall time), "cpu_seconds" (time spent playing, summed over
+              workers), "workers", "matches_per_second" and
+              "matches_per_core_second" (matches / cpu_seconds).
+    """
+    if grid is None:
+        grid = get_grid()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    jobs = [(setting, policy) for setting in settings for policy in policies]
+    chunks = [range(start, min(seed + matches, start + chunk_size))
+              for start in range(seed, seed + matches, chunk_size)]
+
+    start_time = time.perf_counter()
+    if workers == 0:
+        results = []
+        for setting, policy in jobs:
+            parts = []
+            for seeds in chunks:
+                chunk_start = time.perf_counter()
+                totals = run_matches(grid, setting, policy, seeds)
+                totals["seconds"] = time.perf_counter() - chunk_start
+                parts.append(totals)
+            results.append(parts)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(grid.rows, grid.cols, bytes(grid.cells))) as executor:
+            futures = [[executor.submit(_run_chunk, setting, policy, seeds) for seeds in chunks]
+                       for setting, policy in jobs]
+            results = [[future.result() for future in parts] for parts in futures]
+    seconds = time.perf_counter() - start_time
+
+    rows = []
+    cpu_seconds = 0.0
+    for (setting, policy), parts in zip(jobs, results):
+        totals = {key: sum(part[key] for part in parts) for key in parts[0]}
+        cpu_seconds += totals["seconds"]
+        ghost_move_delay, player_move_delay, total_time = setting
+        rows.append({
+            "ghost_move_delay": ghost_move_delay,
+            "player_move_delay": player_move_delay,
+            "total_time": total_time,
+            "policy": policy,
+            "matches": totals["matches"],
+            "escape_rate": totals["escapes"] / totals["matches"],
+            "mean_ticks_to_capture": totals["capture_ticks"] / totals["captures"] if totals["captures"] else None,
+            "mean_ticks": totals["ticks"] / totals["matches"],
+        })
+
+    played = matches * len(jobs)
+    return {
+        "results": rows,
+        "matches": played,
+        "seconds": seconds,
+        "cpu_seconds": cpu_seconds,
+        "workers": workers,
+        "matches_per_second": played / seconds,
+        "matches_per_core_second": played / cpu_seconds,
+    }
+
+
+def export_csv(report, path):
+    """
+    Write the per-setting rows of a sweep() report as CSV.
+    """
+    import csv
+
+    rows = report["results"]
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    """
+    Sweep game settings with scripted players and print escape rates.
+
+    Usage:
+        python selfplay.py                                   # defaults of the real game
+        python selfplay.py --ghost-delay 3 4 5 6 --time 5 10 --matches 5000 --output sweep.csv
+    """
+    import argparse  # Only the command line needs it
+
+    import level
+    from maze import set_grid
+
+    parser = argparse.ArgumentParser(description="Headless self-play for balancing the game settings")
+    parser.add_argument("--ghost-delay", type=int, nargs="+", default=[5], help="ghost_move_delay values")
+    parser.add_argument("--player-delay", type=int, nargs="+", default=[2], help="player_move_delay values")
+    parser.add_argument("--time", type=int, nargs="+", default=[5], help="total_time values (seconds)")
+    parser.add_argument("--policy", nargs="+", choices=POLICIES, default=list(POLICIES), help="Player policies")
+    parser.add_argument("--matches", type=int, default=1000, help="Matches per setting and policy")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count, 0: no pool)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Matches per worker task")
+    parser.add_argument("--seed", type=int, default=0, help="First match seed")
+    parser.add_argument("--level", help="Play on a level file saved with level.Level.save()")
+    parser.add_argument("--output", metavar="PATH", help="Also write the results as CSV")
+    args = parser.parse_args(argv)
+
+    if args.level:
+        with level.load_level(args.level) as loaded:
+            set_grid(loaded.grid)
+
+    settings = list(itertools.product(args.ghost_delay, args.player_delay, args.time))
+    report = sweep(settings, args.policy, matches=args.matches, workers=args.workers,
+                   chunk_size=args.chunk_size, seed=args.seed)
+
+    print(f"{'ghost':>5} {'player':>6} {'time':>4}  {'policy':<7} {'escape':>7} {'capture tick':>12}")
+    for row in report["results"]:
+        capture = row["mean_ticks_to_capture"]
+        print(f"{row['ghost_move_delay']:>5} {row['player_move_delay']:>6} {row['total_time']:>4}  "
+              f"{row['policy']:<7} {row['escape_rate']:>7.1%} "
+              f"{'-' if capture is None else f'{capture:.1f}':>12}")
+    print(f"{report['matches']} matches in {report['seconds']:.2f}s on {report['workers']} worker(s): "
+          f"{report['matches_per_second']:.0f} matches/s, "
+          f"{report['matches_per_core_second']:.0f} matches/s per core")
+
+    if args.output:
+        export_csv(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+from maze import get_grid, spawn_points
+from player import Player
+from ghost import Ghost
+
+# Input for one tick is a small bit set of the pressed direction keys.
+# If several are pressed, the first one in MOVES wins (same order the arrow keys were checked in)
+UP = 1
+DOWN = 2
+LEFT = 4
+RIGHT = 8
+MOVES = ((UP, -1, 0), (DOWN, 1, 0), (LEFT, 0, -1), (RIGHT, 0, 1))
+
+# Outcomes returned by Simulation.step on the tick the game ends
+ESCAPED = "escaped"  # The timer ran out before the ghost caught the player
+CAUGHT = "caught"  # The ghost reached the player's tile
+
+# Logic ticks per simulated second (the game runs these at a fixed rate, whatever the frame rate)
+TICKS_PER_SECOND = 30
+
+
+class Simulation:
+    def __init__(self, player=None, ghost=None, ghost_move_delay=5, player_move_delay=2,
+                 total_time=5, ticks_per_second=TICKS_PER_SECOND, swarm=None, grid=None):
+        """
+        Headless game logic that advances one explicit tick at a time.
+
+        Owns the player, the ghost, the movement delays, the collision check and
+        the countdown timer. Nothing here touches pygame or the wall clock, so a
+        match can run as fast as the CPU allows; the pygame frontend only feeds
+        in key states and draws the result.
+
+        Args:
+            player (Player): Player to control; defaults to a sprite-less player on the
+                             level's player spawn point.
+            ghost (Ghost): Ghost chasing the player; defaults to a sprite-less ghost
+                           on the level's ghost spawn point.
+            ghost_move_delay (int): The ghost moves on every n-th tick.
+            player_move_delay (int): Minimum number of ticks between two player moves.
+            total_time (int): Seconds the player has to survive.
+            ticks_per_second (int): Ticks that make up one second of the timer.
+            swarm (GhostSwarm): Optional horde of extra ghosts that move on the same
+                                ticks as the ghost and also catch the player.
+            grid (Grid): Level for the default player and ghost (defaults to the current level).
+        """
+        if grid is None:
+            grid = get_grid()
+        self.grid = grid
+
+        player_start, ghost_start = spawn_points(grid)
+        self.player = player if player is not None else Player(*player_start, image_path=None, grid=grid)
+        self.ghost = ghost if ghost is not None else Ghost(*ghost_start, image_path=None, grid=grid)
+        self.swarm = swarm
+
+        self.ghost_move_delay = ghost_move_delay
+        self.player_move_delay = player_move_delay
+        self.total_time = total_time
+        self.ticks_per_second = ticks_per_second
+
+        self.tick = 0  # Number of ticks simulated so far
+        self.last_player_move_tick = 0
+        self.time_left = total_time  # Whole seconds left on the timer
+        self.game_over = False
+        self.escaped = False  # True if the player survived until the timer ran out
+
+    def step(self, pressed=0):
+        """
+        Advance the game by one tick.
+
+        Args:
+            pressed (int): Bit set of UP, DOWN, LEFT, RIGHT for the keys held this tick.
+
+        Returns:
+            str: ESCAPED or CAUGHT on the tick the game ends, otherwise None.
+        """
+        self.tick += 1
+        outcome = None
+
+        # Remaining time, counted in ticks instead of wall-clock milliseconds
+        seconds_passed = self.tick // self.ticks_per_second
+        self.time_left = max(0, self.total_time - seconds_passed)
+
+        # Game over if time runs out
+        if self.time_left == 0 and not self.game_over:
+            self.game_over = True
+            self.escaped = True
+            outcome = ESCAPED
+
+        if self.game_over:
+            return outcome
+
+        # Slow down player movement
+        if pressed and self.tick - self.last_player_move_tick >= self.player_move_delay:
+            for bit, dr, dc in MOVES:
+                if pressed & bit:
+                    self.player.move(dr, dc)
+                    self.last_player_move_tick = self.tick
+                    break
+
+        # Slow down ghost movement
+        if self.tick % self.ghost_move_delay == 0:
+            self.ghost.update(self.player)
+            if self.swarm is not None:
+                self.swarm.update(self.player)
+
+        if (self.ghost.row == self.player.row and self.ghost.col == self.player.col
+                or self.swarm is not None and self.swarm.collides(self.player)):
+            self.game_over = True
+            self.escaped = False
+            outcome = CAUGHT
+
+        return outcome
+
+    def run(self, policy, max_ticks=None):
+        """
+        Step until the game is over (or max_ticks is reached).
+
+        Args:
+            policy (callable): Called as policy(simulation) before every tick;
+                               returns the pressed bits for that tick.
+            max_ticks (int): Optional limit on the number of ticks to run.
+
+        Returns:
+            str: The outcome (ESCAPED or CAUGHT), or None if max_ticks was hit first.
+        """
+        step = self.step
+        while not self.game_over:
+            if max_ticks is not None and self.tick >= max_ticks:
+                return None
+            outcome = step(policy(self))
+            if outcome is not None:
+                return outcome
+        return CAUGHT if not self.escaped else ESCAPED
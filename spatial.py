@@ -0,0 +1,320 @@
+from array import array
+
+from maze import get_grid
+
+# NumPy is optional and slow to import; only the batch queries need it, so it
+# is imported on the first batch query (see _numpy)
+np = None
+
+# Distance larger than any Manhattan distance on a level
+FAR = 2 ** 30
+
+# Direction indexes, in the same order as Grid.offsets
+UP, DOWN, LEFT, RIGHT = range(4)
+
+
+class Visibility:
+    def __init__(self, grid=None):
+        """
+        Line-of-sight queries along maze rows and columns, answered by table lookups.
+
+        Corridors are straight runs of open cells between two walls. For every cell
+        the tables store the id of the last open cell of its run in each direction
+        (up, down, left, right). Two cells see each other when they are in the same
+        horizontal run or the same vertical run, so a query compares two numbers
+        instead of walking the cells between them.
+
+        Walls store their own id, so a wall is never in the same run as an open cell.
+
+        After walls change through grid.set_cell(), sync() patches only the runs
+        through the edited cells.
+
+        Args:
+            grid (Grid): The maze (defaults to the current level).
+        """
+        if grid is None:
+            grid = get_grid()
+        self.grid = grid
+        self.version = grid.version  # Grid version the tables were built from
+
+        cells = grid.cells
+        stride = grid.stride
+        size = grid.size
+        ids = range(size)
+
+        # Run ends per direction, indexed by cell id; start as "every cell is its own run"
+        self.up = array("i", ids)
+        self.down = array("i", ids)
+        self.left = array("i", ids)
+        self.right = array("i", ids)
+
+        # Forward passes: a cell's run reaches as far up/left as its open neighbor's does
+        up, left = self.up, self.left
+        for cell_id in range(stride, size):
+            if cells[cell_id]:
+                continue
+            if not cells[cell_id - stride]:
+                up[cell_id] = up[cell_id - stride]
+            if not cells[cell_id - 1]:
+                left[cell_id] = left[cell_id - 1]
+
+        # Backward passes for down/right; the border keeps both passes in bounds
+        down, right = self.down, self.right
+        for cell_id in range(size - stride - 1, -1, -1):
+            if cells[cell_id]:
+                continue
+            if not cells[cell_id + stride]:
+                down[cell_id] = down[cell_id + stride]
+            if not cells[cell_id + 1]:
+                right[cell_id] = right[cell_id + 1]
+
+        # Run ends in Grid.offsets order, for ahead()
+        self.ends = (self.up, self.down, self.left, self.right)
+        self._views = None  # NumPy views of left/up, made on the first batch query
+
+    def sync(self):
+        """
+        Bring the tables up to date with wall edits since they were built.
+
+        An edited cell only changes the horizontal and the vertical run through
+        it, so those two stretches (up to the next walls) are recomputed; the
+        rest of the tables stay as they are. Unknown edits rebuild everything.
+        """
+        grid = self.grid
+        changed = grid.changed_since(self.version)
+        if changed is None:
+            self.__init__(grid)
+            return
+        self.version = grid.version
+        for cell_id in set(changed):
+            self._rebuild_runs(cell_id, 1, self.left, self.right)
+            self._rebuild_runs(cell_id, grid.stride, self.up, self.down)
+
+    def _rebuild_runs(self, cell_id, step, first, last):
+        #Recompute the run ends between the walls around cell_id along one axis.
+        #step is 1 for rows (first/last = left/right), stride for columns (up/down).
+        cells = self.grid.cells
+        low = cell_id - step
+        while not cells[low]:
+            low -= step
+        high = cell_id + step
+        while not cells[high]:
+            high += step
+
+        # Same passes as the full build, over the stretch between the two walls
+        # (walls, and open cells right after a wall, start their own run)
+        for current in range(low + step, high, step):
+            if cells[current] or cells[current - step]:
+                first[current] = current
+            else:
+                first[current] = first[current - step]
+        for current in range(high - step, low, -step):
+            if cells[current] or cells[current + step]:
+                last[current] = current
+            else:
+                last[current] = last[current + step]
+
+    # ---- Single queries ----------------------------------------------------------
+
+    def sees(self, a, b):
+        """
+        Return True if there is a straight, wall-free line between two (row, col) cells.
+        """
+        grid = self.grid
+        return self.sees_ids(grid.cell_id(*a), grid.cell_id(*b))
+
+    def sees_ids(self, a_id, b_id):
+        # Same horizontal run or same vertical run (run ends encode the row/column too)
+        return self.left[a_id] == self.left[b_id] or self.up[a_id] == self.up[b_id]
+
+    def ahead(self, cell, direction, steps):
+        """
+        Return the cell up to steps cells from cell in a direction, stopping at walls.
+
+        Useful for ambushing: the cell a few steps ahead of where the player is
+        heading, without walking the corridor.
+
+        Args:
+            cell (tuple): (row, col) to start from.
+            direction (int): UP, DOWN, LEFT or RIGHT.
+            steps (int): How far ahead to look.
+
+        Returns:
+            tuple: (row, col) of the cell reached (cell itself if a wall is in the way).
+        """
+        grid = self.grid
+        return grid.cell_pos(self.ahead_id(grid.cell_id(*cell), direction, steps))
+
+    def ahead_id(self, cell_id, direction, steps):
+        offset = self.grid.offsets[direction]
+        reachable = (self.ends[direction][cell_id] - cell_id) // offset  # Open cells before the wall
+        return cell_id + min(steps, reachable) * offset
+
+    # ---- Batch queries (NumPy) -------------------------------------------------
+
+    def _arrays(self):
+        _numpy()
+        if self._views is None:
+            # array('i') exposes the buffer protocol, so these are zero-copy views
+            self._views = (np.frombuffer(self.left, dtype=np.intc), np.frombuffer(self.up, dtype=np.intc))
+        return self._views
+
+    def sees_many(self, a_ids, b_ids):
+        """
+        Line of sight for many pairs at once: a_ids[i] against b_ids[i].
+
+        Args:
+            a_ids: Cell ids (sequence or NumPy array).
+            b_ids: Cell ids of the same length.
+
+        Returns:
+            numpy.ndarray: Boolean array, True where the pair sees each other.
+        """
+        left, up = self._arrays()
+        a_ids = np.asarray(a_ids, dtype=np.intp)
+        b_ids = np.asarray(b_ids, dtype=np.intp)
+        return (left[a_ids] == left[b_ids]) | (up[a_ids] == up[b_ids])
+
+    def sees_matrix(self, a_ids, b_ids):
+        """
+        Line of sight between every a and every b.
+
+        Returns:
+            numpy.ndarray: (len(a_ids), len(b_ids)) boolean matrix, e.g. which
+                           ghosts (rows) see which players (columns).
+        """
+        left, up = self._arrays()
+        a_ids = np.asarray(a_ids, dtype=np.intp)
+        b_ids = np.asarray(b_ids, dtype=np.intp)
+        return ((left[a_ids][:, None] == left[b_ids][None, :])
+                | (up[a_ids][:, None] == up[b_ids][None, :]))
+
+
+def _numpy():
+    #Import NumPy into the module on first use.
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("Batch visibility queries require NumPy (pip install numpy)") from None
+        np = numpy
+    return np
+
+
+class BucketGrid:
+    def __init__(self, grid=None, bucket_size=8):
+        """
+        Uniform grid of buckets for finding agents near a cell.
+
+        The level is split into bucket_size x bucket_size squares and every agent
+        is listed in the square it stands on. A nearest-agent query looks at the
+        query's own square first and then rings of squares around it, and stops
+        as soon as no square further out can hold anything closer, so it only
+        touches the agents nearby instead of every agent on the level.
+
+        Agents are any objects with 'row' and 'col' attributes (players, ghosts).
+        Call update() after an agent moves.
+
+        Args:
+            grid (Grid): The maze the agents move in (defaults to the current level).
+            bucket_size (int): Side of one bucket in cells; about one agent per
+                               bucket keeps both the rings and the buckets small.
+        """
+        if grid is None:
+            grid = get_grid()
+        self.grid = grid
+        self.bucket_size = bucket_size
+        self.bucket_rows = (grid.rows + bucket_size - 1) // bucket_size
+        self.bucket_cols = (grid.cols + bucket_size - 1) // bucket_size
+        self.buckets = [[] for _ in range(self.bucket_rows * self.bucket_cols)]
+        self.where = {}  # Agent -> index of the bucket it is listed in
+
+    def __len__(self):
+        return len(self.where)
+
+    def _bucket(self, row, col):
+        size = self.bucket_size
+        return (row // size) * self.bucket_cols + col // size
+
+    def add(self, agent):
+        index = self._bucket(agent.row, agent.col)
+        self.buckets[index].append(agent)
+        self.where[agent] = index
+
+    def remove(self, agent):
+        self.buckets[self.where.pop(agent)].remove(agent)
+
+    def update(self, agent):
+        """
+        Move the agent to the bucket of its current cell (cheap if it did not change bucket).
+        """
+        index = self._bucket(agent.row, agent.col)
+        old = self.where[agent]
+        if index != old:
+            self.buckets[old].remove(agent)
+            self.buckets[index].append(agent)
+            self.where[agent] = index
+
+    def _ring(self, bucket_row, bucket_col, ring):
+        #Yield the bucket indexes at Chebyshev distance ring from a bucket, clipped to the level.
+        cols = self.bucket_cols
+        top, bottom = bucket_row - ring, bucket_row + ring
+        first_col, last_col = max(0, bucket_col - ring), min(cols - 1, bucket_col + ring)
+        for row in (top, bottom) if ring else (top,):
+            if 0 <= row < self.bucket_rows:
+                for col in range(first_col, last_col + 1):
+                    yield row * cols + col
+        for row in range(max(0, top + 1), min(self.bucket_rows, bottom)):
+            for col in (bucket_col - ring, bucket_col + ring):
+                if 0 <= col < cols:
+                    yield row * cols + col
+
+    def nearest(self, row, col, exclude=None, max_distance=None):
+        """
+        Find the agent with the smallest Manhattan distance to a cell.
+
+        Args:
+            row (int): Row of the query cell.
+            col (int): Column of the query cell.
+            exclude: An agent to skip (e.g. the one asking).
+            max_distance (int): Ignore agents further away than this.
+
+        Returns:
+            tuple: (agent, distance), or (None, None) if no agent qualifies.
+        """
+        size = self.bucket_size
+        buckets = self.buckets
+        bucket_row, bucket_col = row // size, col // size
+        best = None
+        best_distance = FAR if max_distance is None else max_distance + 1
+
+        for ring in range(max(self.bucket_rows, self.bucket_cols)):
+            # Every cell in this ring is at least this far from the query cell
+            if ring and (ring - 1) * size + 1 >= best_distance:
+                break
+            for index in self._ring(bucket_row, bucket_col, ring):
+                for agent in buckets[index]:
+                    distance = abs(agent.row - row) + abs(agent.col - col)
+                    if distance < best_distance and agent is not exclude:
+                        best, best_distance = agent, distance
+
+        if best is None:
+            return None, None
+        return best, best_distance
+
+    def within(self, row, col, radius):
+        """
+        Return every agent within a Manhattan distance of radius from a cell.
+        """
+        size = self.bucket_size
+        first_row, last_row = max(0, (row - radius) // size), min(self.bucket_rows - 1, (row + radius) // size)
+        first_col, last_col = max(0, (col - radius) // size), min(self.bucket_cols - 1, (col + radius) // size)
+        found = []
+        for bucket_row in range(first_row, last_row + 1):
+            start = bucket_row * self.bucket_cols
+            for index in range(start + first_col, start + last_col + 1):
+                for agent in self.buckets[index]:
+                    if abs(agent.row - row) + abs(agent.col - col) <= radius:
+                        found.append(agent)
+        return found
@@ -0,0 +1,134 @@
+import pygame
+import assets
+from maze import TILE_SIZE, WALL_COLOR
+
+# Widest atlas row in pixels; sprites wrap onto a new row after this
+ATLAS_WIDTH = 1024
+
+
+class SpriteAtlas:
+    def __init__(self, sprites, max_width=ATLAS_WIDTH):
+        """
+        Pack several sprites into one surface.
+
+        Every draw from the atlas is the same source surface with a different
+        area, so a whole frame of sprites can go to the window in one
+        Surface.blits call (see SpriteBatch) instead of one blit call each.
+
+        Sprites are placed left to right in rows (tallest first) and copied
+        pixel for pixel, transparency included.
+
+        Args:
+            sprites (dict): name -> pygame.Surface.
+            max_width (int): Widest row in pixels.
+        """
+        # Shelf packing: fill a row, then start the next one below the tallest sprite in it
+        order = sorted(sprites, key=lambda name: sprites[name].get_height(), reverse=True)
+        self.regions = {}  # name -> Rect of the sprite inside the atlas surface
+        x = y = shelf_height = width = 0
+        for name in order:
+            sprite_width, sprite_height = sprites[name].get_size()
+            if x and x + sprite_width > max_width:
+                x, y, shelf_height = 0, y + shelf_height, 0
+            self.regions[name] = pygame.Rect(x, y, sprite_width, sprite_height)
+            x += sprite_width
+            width = max(width, x)
+            shelf_height = max(shelf_height, sprite_height)
+
+        self.surface = pygame.Surface((max(1, width), max(1, y + shelf_height)), pygame.SRCALPHA)
+        for name, rect in self.regions.items():
+            # MAX blending onto the transparent atlas copies the pixels and alpha as they are
+            self.surface.blit(sprites[name], rect, special_flags=pygame.BLEND_RGBA_MAX)
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert_alpha()
+
+        # Original surface -> its area, so entities can be looked up by their image
+        self.areas = {sprites[name]: rect for name, rect in self.regions.items()}
+
+    def area(self, image):
+        # Area of a packed image inside the atlas, or None if it is not in the atlas
+        return self.areas.get(image)
+
+
+def build_game_atlas():
+    """
+    Pack the game's tile sprites (player, ghost and the wall tile) into one atlas.
+
+    The player and ghost come from the asset cache, so entities created later
+    get the very same Surface objects and are found in the atlas by their image.
+
+    Returns:
+        SpriteAtlas: Atlas with the regions "player", "ghost" and "wall".
+    """
+    # Plain colored wall for now; a themed tile image can replace it here
+    wall = pygame.Surface((TILE_SIZE, TILE_SIZE))
+    wall.fill(WALL_COLOR)
+    return SpriteAtlas({
+        "player": assets.load_image("public/player.png", (TILE_SIZE, TILE_SIZE)),
+        "ghost": assets.load_image("public/ghost.png", (TILE_SIZE, TILE_SIZE)),
+        "wall": wall,
+    })
+
+
+class SpriteBatch:
+    def __init__(self):
+        """
+        Collect one frame's draws and send them to a surface in one Surface.blits call.
+
+        Draws keep their order, so later ones still cover earlier ones.
+        """
+        self.items = []  # (source surface, position, area or None)
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, source, position, area=None):
+        self.items.append((source, position, area))
+
+    def flush(self, target):
+        """
+        Draw everything collected so far onto target and start an empty batch.
+
+        Returns:
+            list: The rectangle each draw covered, in order.
+        """
+        if not self.items:
+            return []
+        rects = target.blits(self.items)
+        self.items = []
+        return rects
+
+
+class Label:
+    def __init__(self, template, color, size, font_name="Arial"):
+        """
+        A line of text with one changing value, e.g. "Time Left: {}s".
+
+        The text is rendered again only when the value changes; every other
+        frame render() returns the surface from last time without formatting
+        the string or looking it up in the text cache.
+
+        Args:
+            template (str): Text with one {} for the value.
+            color (tuple): RGB text color.
+            size (int): Font size.
+            font_name (str): System font name.
+        """
+        self.template = template
+        self.color = color
+        self.size = size
+        self.font_name = font_name
+        self.value = None
+        self.surface = None
+        self.renders = 0  # How often the text was actually rendered
+
+    def render(self, value):
+        """
+        Return the text surface for value, rendering it only if value changed.
+        """
+        if self.surface is None or value != self.value:
+            self.value = value
+            font = assets.get_font(self.font_name, self.size)
+            self.surface = font.render(self.template.format(value), True, self.color)
+            self.renders += 1
+        return self.surface
@@ -0,0 +1,165 @@
+import random
+
+from maze import TILE_SIZE, get_grid
+from flowfield import FlowField
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only the swarm needs it
+    np = None
+
+# Distance used for walls and unreachable cells so argmin never picks them
+FAR = 2 ** 30
+
+GHOST_COLOR = (255, 0, 0)  # Red circle drawn for each ghost when the swarm has no sprite
+
+
+class GhostSwarm:
+    def __init__(self, positions, grid=None, image_path="public/ghost.png"):
+        """
+        Many ghosts stored as one NumPy array of cell ids and moved together.
+
+        All ghosts share one flow field: a single BFS from the target's cell gives
+        every cell's distance to the target, and one vectorized step moves every
+        ghost to its closest neighbor. There is no per-ghost Python object, search
+        or sprite copy.
+
+        Args:
+            positions (list): (row, col) start cell of every ghost.
+            grid (Grid): The maze the ghosts move in (defaults to the current level).
+            image_path (str): Ghost sprite shared by the whole swarm, or None for a
+                              headless swarm.
+        """
+        if np is None:
+            raise ImportError("GhostSwarm requires NumPy (pip install numpy)")
+
+        if grid is None:
+            grid = get_grid()
+        self.grid = grid
+        self.ids = np.array([grid.cell_id(row, col) for row, col in positions], dtype=np.intp)
+        self.offsets = np.array(grid.offsets, dtype=np.intp)
+
+        # One BFS per target cell, shared by every ghost
+        self.flow_field = FlowField(grid)
+        self.goal_id = None
+        self.distances = None  # NumPy view of the field with FAR for walls/unreachable
+
+        self.image = None
+        if image_path is not None:
+            import assets
+
+            # One scaled sprite for the whole swarm (shared with single ghosts too)
+            self.image = assets.load_image(image_path, (TILE_SIZE, TILE_SIZE))
+
+    @classmethod
+    def scatter(cls, count, grid=None, seed=None, avoid=(), **kwargs):
+        """
+        Create a swarm of count ghosts on random walkable cells.
+
+        Args:
+            count (int): Number of ghosts.
+            grid (Grid): The maze the ghosts move in (defaults to the current level).
+            seed (int): Optional seed so the same level always spawns the same way.
+            avoid (iterable): (row, col) cells no ghost may start on (e.g. the player).
+            **kwargs: Passed on to GhostSwarm().
+        """
+        if grid is None:
+            grid = get_grid()
+        blocked = {grid.cell_id(row, col) for row, col in avoid}
+        choices = [cell_id for cell_id in grid.open_ids() if cell_id not in blocked]
+        picked = random.Random(seed).choices(choices, k=count)
+        return cls([grid.cell_pos(cell_id) for cell_id in picked], grid=grid, **kwargs)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def positions(self):
+        # (row, col) of every ghost; meant for debugging and tests, not hot loops
+        return [self.grid.cell_pos(cell_id) for cell_id in self.ids.tolist()]
+
+    def update(self, target):
+        """
+        Move every ghost one step toward the target.
+
+        Args:
+            target: An object with 'row' and 'col' attributes (e.g. the player).
+        """
+        goal_id = self.grid.cell_id(target.row, target.col)
+        # A new target cell, or walls changed and the field patched its distances
+        if goal_id != self.goal_id or self.flow_field.version != self.grid.version:
+            self.goal_id = goal_id
+            self.flow_field.update((target.row, target.col))
+            # array('i') exposes the buffer protocol, so this is a zero-copy view
+            distances = np.frombuffer(self.flow_field.distances, dtype=np.intc)
+            self.distances = np.where(distances < 0, FAR, distances)
+
+        distances = self.distances
+        ids = self.ids
+
+        # (ghosts, 4) matrix of neighbor ids, up, down, left, right
+        candidates = ids[:, None] + self.offsets
+        candidate_distances = distances[candidates]
+
+        # argmin returns the first minimum, so ties break up, down, left, right
+        # exactly like the single-ghost flow field
+        best = candidate_distances.argmin(axis=1)
+        rows = np.arange(len(ids))
+        moves = candidate_distances[rows, best] < distances[ids]
+        self.ids = np.where(moves, candidates[rows, best], ids)
+
+    def collides(self, target):
+        """
+        Return True if any ghost is on the target's cell.
+        """
+        return bool((self.ids == self.grid.cell_id(target.row, target.col)).any())
+
+    def caught_mask(self, targets):
+        """
+        Return a (ghosts, targets) boolean matrix: True where a ghost is on a target's cell.
+        """
+        target_ids = np.array([self.grid.cell_id(t.row, t.col) for t in targets], dtype=np.intp)
+        return self.ids[:, None] == target_ids[None, :]
+
+    def pixel_positions(self):
+        """
+        Return the top-left pixel of every ghost's tile as a list of (x, y).
+        """
+        stride = self.grid.stride
+        # Pixel positions for all ghosts at once; -1 undoes the wall border
+        xs = (self.ids % stride - 1) * TILE_SIZE
+        ys = (self.ids // stride - 1) * TILE_SIZE
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    def draw(self, win):
+        """
+        Draw every ghost with one Surface.blits call.
+
+        A swarm without a sprite (image_path=None) draws a red circle per ghost instead.
+
+        Returns:
+            list: The rectangles that were drawn (for dirty-rect rendering).
+        """
+        image = self.image
+        if image is None:
+            return draw_circles(win, self.pixel_positions())
+        return win.blits([(image, position) for position in self.pixel_positions()])
+
+
+def draw_circles(win, positions):
+    """
+    Draw the fallback ghost circle on every tile, for crowds without a sprite.
+
+    Args:
+        win (pygame.Surface): The surface to draw on.
+        positions (list): Top-left pixel (x, y) of each tile.
+
+    Returns:
+        list: The rectangles that were drawn.
+    """
+    import pygame
+
+    circle = pygame.draw.circle
+    half = TILE_SIZE // 2
+    radius = TILE_SIZE // 3
+    return [circle(win, GHOST_COLOR, (x + half, y + half), radius) for x, y in positions]
@@ -1,127 +1,1147 @@
-# import time
-# import tracemalloc
-# import psutil
-# import os
-# from pathfinding import a_star
-# from maze import ROWS, COLS
-#
-# def measure_computation_time(start, goal, iterations=100):
-#     """
-#     Measures the average execution time of the A* pathfinding algorithm over multiple iterations.
-#
-#     Args:
-#         start (tuple): Coordinates of the starting node in the grid (row, col).
-#         goal (tuple): Coordinates of the goal node in the grid (row, col).
-#         iterations (int): Number of repetitions for averaging to mitigate timing variability.
-#
-#     Returns:
-#         float: Average computation time per run in milliseconds.
-#         list: Path returned from the last A* execution (sequence of grid nodes).
-#     """
-#
-#     total_time = 0
-#     for _ in range(iterations):
-#         start_time = time.perf_counter()  # High-resolution timer to capture precise elapsed time
-#         path = a_star(start, goal)         # Execute A* algorithm for path calculation
-#         end_time = time.perf_counter()    # End timer immediately after path is found
-#         total_time += (end_time - start_time)  # Aggregate cumulative duration for all runs
-#
-#     avg_time_ms = (total_time / iterations) * 1000  # Convert average time from seconds to milliseconds
-#     return avg_time_ms, path
-#
-#
-# def check_path_optimality(path, start, goal):
-#     """
-#     Assesses path optimality by comparing the A*-computed path length to the theoretical shortest distance.
-#
-#     The metric used is the Manhattan distance, which represents the minimum possible path length
-#     on a grid without obstacles, considering only horizontal and vertical moves.
-#
-#     Args:
-#         path (list): Ordered list of nodes representing the computed path.
-#         start (tuple): Start node coordinates.
-#         goal (tuple): Goal node coordinates.
-#
-#     Returns:
-#         bool: True if the path length matches the Manhattan distance plus one (including start node),
-#               indicating an optimal path; False otherwise.
-#     """
-#     if not path:
-#         return False  # No path found indicates failure or unsolvability, hence non-optimal
-#
-#     # Manhattan distance calculation: sum of absolute differences of row and column indices
-#     expected_length = abs(start[0] - goal[0]) + abs(start[1] - goal[1]) + 1
-#     # Path length includes all nodes traversed, so optimal if equal to expected minimal distance + start node
-#     return len(path) == expected_length
-#
-#
-# def measure_resource_utilization(start, goal):
-#     """
-#     Profiles system resource consumption during a single execution of the A* pathfinding algorithm.
-#
-#     Utilizes Python's 'tracemalloc' to trace memory allocations and peak memory footprint,
-#     and 'psutil' to capture CPU usage statistics specifically for the current Python process.
-#
-#     Args:
-#         start (tuple): Starting node coordinates.
-#         goal (tuple): Goal node coordinates.
-#
-#     Returns:
-#         float: Percentage of CPU utilization attributed to the A* execution.
-#         float: Current memory usage in kilobytes at the time of measurement.
-#         float: Peak memory usage in kilobytes during the pathfinding run.
-#         list: The computed path from start to goal.
-#     """
-#     tracemalloc.start()                     # Initiate memory tracking to monitor allocations during runtime
-#     process = psutil.Process(os.getpid())  # Obtain process object for accurate CPU usage measurement
-#
-#     cpu_before = process.cpu_percent(interval=None)  # Record CPU usage baseline before pathfinding begins
-#
-#     path = a_star(start, goal)              # Run A* pathfinding algorithm (compute shortest path)
-#
-#     cpu_after = process.cpu_percent(interval=0.1)   # Sample CPU usage after a short interval post-execution
-#
-#     current_mem, peak_mem = tracemalloc.get_traced_memory()  # Retrieve current and peak memory allocation snapshots
-#
-#     tracemalloc.stop()                      # Terminate memory tracking to conserve resources
-#
-#     # Calculate approximate CPU utilization by subtracting baseline from post-execution sample
-#     cpu_usage = cpu_after - cpu_before
-#
-#     # Convert bytes to kilobytes (KB) for easier interpretation of memory usage metrics
-#     mem_usage_kb = current_mem / 1024
-#     peak_mem_kb = peak_mem / 1024
-#
-#     return cpu_usage, mem_usage_kb, peak_mem_kb, path
-#
-#
-# def get_start_goal(rows, cols):
-#         # Generic fallback: start near top-left, goal near bottom-right, avoiding edges
-#         return (1, 1), (rows - 2, cols - 2)
-#
-#
-# def run_tests():
-#     """
-#     Coordinates execution of the A* performance and resource profiling tests,
-#     displaying detailed outputs for computational efficiency and pathfinding quality.
-#
-#     Tests are contextualized to the current maze dimensions provided by global settings.
-#     """
-#     start, goal = get_start_goal(ROWS, COLS)
-#
-#     print(f"Running A* performance tests on maze size {ROWS}x{COLS}...\n")
-#
-#     avg_time, path = measure_computation_time(start, goal)
-#     print(f"Average computation time over 100 runs: {avg_time:.3f} ms")
-#
-#     optimal = check_path_optimality(path, start, goal)
-#     print(f"Path optimality test: {'PASS' if optimal else 'FAIL'}")
-#
-#     cpu, mem_current, mem_peak, _ = measure_resource_utilization(start, goal)
-#     print(f"CPU usage during pathfinding: {cpu:.2f}%")
-#     print(f"Memory usage (current): {mem_current:.2f} KB")
-#     print(f"Memory usage (peak): {mem_peak:.2f} KB")
-#
-#
-# if __name__ == "__main__":
-#     run_tests()
+"""
+Performance benchmarks for Ghost Chase.
+
+Run from any directory (paths below are relative to the repository root):
+
+    python test/performance_test.py                      # run everything, print a report
+    python test/performance_test.py --quick              # small mazes only
+    python test/performance_test.py --output results.json
+    python test/performance_test.py --save-baseline      # store results as the baseline
+    python test/performance_test.py --baseline test/benchmark_baseline.json --threshold 0.25
+
+Every benchmark produces a dict of metrics. Metrics ending in "_ms" are
+"lower is better" and metrics ending in "_per_second" are "higher is better";
+those are the ones compared against the baseline. The script exits with
+status 1 if any of them regressed by more than the threshold.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+# Allow running this file directly from any directory: the game modules are
+# imported from ROOT, and main() moves there so asset paths (public/...) resolve
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import level
+from hierarchy import HierarchicalPlanner
+from pathfinding import PathCache, a_star, _a_star_ids, _bidirectional_ids, _jump_point_search_ids
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+DEFAULT_SIZES = (20, 50, 100, 200, 500, 1000)
+QUICK_SIZES = (20, 50, 100)
+
+# name -> benchmark function, filled in by the @benchmark decorator
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    # Register a benchmark function under a name that can be picked with --only
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+
+# ---- Maze and query helpers -------------------------------------------------
+
+def generate_maze(rows, cols, seed=0, loop_ratio=0.1):
+    """
+    Generate a benchmark maze: a recursive-backtracker level with extra loops.
+
+    A perfect maze has exactly one route between two cells, which makes every
+    search trivially "optimal". Opening loop_ratio of the remaining inner walls
+    adds loops, so the optimality check against BFS actually means something.
+
+    Returns:
+        Grid: The generated maze (the same one for the same arguments).
+    """
+    return level.generate(rows, cols, seed=seed, algorithm="backtracker", loop_ratio=loop_ratio).grid
+
+
+def random_queries(grid, count, seed=0):
+    """
+    Pick count random (start, goal) pairs of walkable cells.
+    """
+    rng = random.Random(seed)
+    open_ids = grid.open_ids()
+    return [(grid.cell_pos(rng.choice(open_ids)), grid.cell_pos(rng.choice(open_ids)))
+            for _ in range(count)]
+
+
+def bfs_distance(grid, start, goal):
+    """
+    Reference shortest path length (in steps) by plain breadth-first search.
+
+    Returns:
+        int: Number of steps from start to goal, or -1 if unreachable.
+    """
+    start_id, goal_id = grid.cell_id(*start), grid.cell_id(*goal)
+    distances = {start_id: 0}
+    frontier = [start_id]
+    for current in frontier:
+        if current == goal_id:
+            return distances[current]
+        for neighbor in grid.neighbor_ids(current):
+            if neighbor not in distances:
+                distances[neighbor] = distances[current] + 1
+                frontier.append(neighbor)
+    return -1
+
+
+def is_valid_path(grid, path, start, goal):
+    """
+    Check that a path runs from start to goal in single steps over walkable cells.
+
+    An empty path counts as valid (it means "unreachable").
+    """
+    if not path:
+        return True
+    if path[0] != start or path[-1] != goal:
+        return False
+    for (row_a, col_a), (row_b, col_b) in zip(path, path[1:]):
+        if abs(row_a - row_b) + abs(col_a - col_b) != 1 or grid.is_wall(row_b, col_b):
+            return False
+    return True
+
+
+def check_path(grid, path, start, goal):
+    """
+    Check that a path is valid and as short as the BFS reference.
+
+    Unlike a Manhattan distance check, this stays correct when walls force detours.
+
+    Returns:
+        bool: True if the path is optimal (or both agree the goal is unreachable).
+    """
+    expected = bfs_distance(grid, start, goal)
+    if not path:
+        return expected == -1
+    return is_valid_path(grid, path, start, goal) and len(path) - 1 == expected
+
+
+def summarize(samples):
+    """
+    Turn a list of durations in seconds into mean/p50/p95/max milliseconds.
+    """
+    ordered = sorted(samples)
+    count = len(ordered)
+    return {
+        "mean_ms": sum(ordered) / count * 1000,
+        "p50_ms": ordered[count // 2] * 1000,
+        "p95_ms": ordered[min(count - 1, int(count * 0.95))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+# Optimality tolerances the HPA* benchmark runs with
+HPA_TOLERANCES = (0.0, 0.5)
+# Mean latency per HPA* query asked for on 1000x1000 levels
+HPA_TARGET_MS = 1.0
+
+
+def query_count(size):
+    # Fewer queries on huge mazes; one 1000x1000 query can take seconds
+    return max(3, 4000 // size)
+
+
+# ---- Benchmarks ---------------------------------------------------------------
+
+@benchmark("a_star")
+def bench_a_star(sizes, verify=True):
+    """
+    Time a_star on generated mazes of every size with random start/goal pairs,
+    and check each path against the BFS reference.
+    """
+    results = {}
+    for size in sizes:
+        grid = generate_maze(size, size, seed=size)
+        queries = random_queries(grid, query_count(size), seed=size)
+        a_star(*queries[0], grid)  # Build the neighbor table outside the timed loop
+
+        samples = []
+        optimal = 0
+        for start, goal in queries:
+            start_time = time.perf_counter()
+            path = a_star(start, goal, grid)
+            samples.append(time.perf_counter() - start_time)
+            if verify and check_path(grid, path, start, goal):
+                optimal += 1
+
+        metrics = summarize(samples)
+        metrics["queries"] = len(queries)
+        if verify:
+            metrics["optimal"] = optimal
+            if optimal != len(queries):
+                raise AssertionError(f"a_star returned {len(queries) - optimal} non-optimal paths on {size}x{size}")
+        results[f"{size}x{size}"] = metrics
+    return results
+
+
+@benchmark("a_star_memory")
+def bench_a_star_memory(sizes, verify=True):
+    """
+    Peak memory allocated by one a_star query across each generated maze.
+    """
+    results = {}
+    for size in sizes:
+        grid = generate_maze(size, size, seed=size)
+        open_ids = grid.open_ids()
+        start, goal = grid.cell_pos(open_ids[0]), grid.cell_pos(open_ids[-1])  # Opposite corners
+        a_star(start, goal, grid)  # Neighbor table is built once per grid; leave it out
+
+        tracemalloc.start()
+        a_star(start, goal, grid)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[f"{size}x{size}"] = {"peak_kb": peak / 1024}
+    return results
+
+
+@benchmark("hpa")
+def bench_hpa(sizes, verify=True):
+    """
+    Build an HPA* planner for each generated maze and time first-hop queries at
+    every tolerance in HPA_TOLERANCES, next to a_star on the same pairs. With
+    verify, every fully refined path must be valid; its length is reported
+    relative to the BFS reference. meets_target says whether the mean query
+    stays under HPA_TARGET_MS.
+    """
+    results = {}
+    for size in sizes:
+        grid = generate_maze(size, size, seed=size)
+        queries = random_queries(grid, query_count(size), seed=size)
+
+        start_time = time.perf_counter()
+        planner = HierarchicalPlanner(grid)
+        build_seconds = time.perf_counter() - start_time
+
+        a_star_seconds = 0.0
+        for start, goal in queries:
+            start_time = time.perf_counter()
+            a_star(start, goal, grid)
+            a_star_seconds += time.perf_counter() - start_time
+        expected = [bfs_distance(grid, start, goal) for start, goal in queries] if verify else None
+
+        for tolerance in HPA_TOLERANCES:
+            planner.tolerance = tolerance
+            planner.queries = planner.expansions = planner.direct_expansions = 0
+            samples = []
+            for start, goal in queries:
+                start_time = time.perf_counter()
+                planner.plan(start, goal)
+                samples.append(time.perf_counter() - start_time)
+            metrics = summarize(samples)
+            metrics["build_ms"] = build_seconds * 1000
+            metrics["a_star_mean_ms"] = a_star_seconds / len(queries) * 1000
+            metrics["expansions_per_query"] = planner.stats()["expansions_per_query"]
+            metrics["direct_expansions_per_query"] = planner.direct_expansions / len(queries)
+            metrics["meets_target"] = metrics["mean_ms"] < HPA_TARGET_MS
+
+            if verify:
+                ratios = []
+                for (start, goal), distance in zip(queries, expected):
+                    path = planner.plan(start, goal, full=True)
+                    if not is_valid_path(grid, path, start, goal) or (not path) != (distance == -1):
+                        raise AssertionError(f"HPA* returned an invalid path on {size}x{size}")
+                    if distance > 0:
+                        ratios.append((len(path) - 1) / distance)
+                if ratios:
+                    metrics["mean_length_ratio"] = sum(ratios) / len(ratios)
+                    metrics["max_length_ratio"] = max(ratios)
+            results[f"{size}x{size} tolerance={tolerance}"] = metrics
+    return results
+
+
+def long_queries(grid, count, seed=0):
+    """
+    Pick count (start, goal) pairs at least half the maze apart (Manhattan), the
+    first one being the two spawn corners: the ghost chasing across the level.
+    """
+    from maze import spawn_points
+
+    rng = random.Random(seed)
+    open_ids = grid.open_ids()
+    queries = [spawn_points(grid)]
+    while len(queries) < count:
+        start, goal = grid.cell_pos(rng.choice(open_ids)), grid.cell_pos(rng.choice(open_ids))
+        if abs(start[0] - goal[0]) + abs(start[1] - goal[1]) >= (grid.rows + grid.cols) // 2:
+            queries.append((start, goal))
+    return queries
+
+
+@benchmark("bidirectional")
+def bench_bidirectional(sizes, verify=True):
+    """
+    Long-distance queries with a_star, bidirectional A* and bidirectional BFS:
+    time per query and cells expanded, with every path checked against BFS.
+    """
+    searches = (
+        ("a_star", lambda start, goal, grid, stats: _a_star_ids(start, goal, grid, stats=stats)),
+        ("bidir_a_star", lambda start, goal, grid, stats: _bidirectional_ids(start, goal, grid, stats=stats)),
+        ("bidir_bfs", lambda start, goal, grid, stats: _bidirectional_ids(start, goal, grid, False, stats)),
+    )
+    results = {}
+    for size in sizes:
+        grid = generate_maze(size, size, seed=size)
+        queries = long_queries(grid, query_count(size), seed=size)
+        a_star(*queries[0], grid)  # Build the neighbor table outside the timed loop
+
+        metrics = {}
+        for name, search in searches:
+            samples = []
+            expanded = 0
+            for start, goal in queries:
+                stats = {}
+                start_time = time.perf_counter()
+                ids, count = search(grid.cell_id(*start), grid.cell_id(*goal), grid, stats)
+                samples.append(time.perf_counter() - start_time)
+                expanded += stats["expanded"]
+                if verify and not check_path(grid, [grid.cell_pos(cell_id) for cell_id in ids], start, goal):
+                    raise AssertionError(f"{name} returned a non-optimal path on {size}x{size}")
+            metrics[f"{name}_mean_ms"] = sum(samples) / len(samples) * 1000
+            metrics[f"{name}_expanded"] = expanded / len(queries)
+        metrics["queries"] = len(queries)
+        metrics["expanded_ratio"] = metrics["bidir_a_star_expanded"] / metrics["a_star_expanded"]
+        results[f"{size}x{size}"] = metrics
+    return results
+
+
+@benchmark("jps")
+def bench_jps(sizes, verify=True):
+    """
+    Compare a_star with jump_point_search on room-heavy levels: wall-clock time
+    and cells (or jump points) taken off the frontier, on the same queries.
+    """
+    results = {}
+    for size in sizes:
+        grid = level.generate(size, size, seed=size, algorithm="rooms").grid
+        queries = [(grid.cell_id(*start), grid.cell_id(*goal))
+                   for start, goal in random_queries(grid, query_count(size), seed=size)]
+        _a_star_ids(*queries[0], grid)  # Build the neighbor table outside the timed loop
+
+        metrics = {}
+        lengths = {}
+        for name, search in (("a_star", _a_star_ids), ("jps", _jump_point_search_ids)):
+            samples = []
+            expanded_total = 0
+            lengths[name] = []
+            for start, goal in queries:
+                start_time = time.perf_counter()
+                path, expanded = search(start, goal, grid)
+                samples.append(time.perf_counter() - start_time)
+                expanded_total += expanded
+                lengths[name].append(len(path))
+            metrics[f"{name}_mean_ms"] = summarize(samples)["mean_ms"]
+            metrics[f"{name}_expanded"] = expanded_total / len(queries)
+
+        if verify and lengths["a_star"] != lengths["jps"]:
+            raise AssertionError(f"jump_point_search and a_star path lengths differ on {size}x{size}")
+        results[f"{size}x{size}"] = metrics
+    return results
+
+
+@benchmark("level_io")
+def bench_level_io(sizes, verify=True):
+    """
+    Save each generated maze in the binary level format, then time opening it
+    (mmap + header only) and unpacking it into a Grid.
+    """
+    import tempfile
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            generated = level.generate(size, size, seed=size)
+            path = os.path.join(directory, f"{size}.lvl")
+            generated.save(path)
+
+            start_time = time.perf_counter()
+            loaded = level.load_level(path)
+            open_seconds = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            grid = loaded.grid
+            unpack_seconds = time.perf_counter() - start_time
+            loaded.close()
+
+            if verify and grid.cells != generated.grid.cells:
+                raise AssertionError(f"Level {size}x{size} changed after a save/load round trip")
+            results[f"{size}x{size}"] = {
+                "file_kb": os.path.getsize(path) / 1024,
+                "open_ms": open_seconds * 1000,
+                "unpack_ms": unpack_seconds * 1000,
+            }
+    return results
+
+
+@benchmark("render")
+def bench_render(sizes, verify=True, frames=60):
+    """
+    Time draw_maze (every tile, the old per-frame cost) against one frame of the
+    dirty-rect renderer, on SDL's dummy video driver.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from maze import TILE_SIZE, draw_maze, build_maze_surface
+
+    pygame.display.init()
+    results = {}
+    try:
+        # Surfaces grow with size * TILE_SIZE pixels; keep them to a sane size
+        for size in [size for size in sizes if size <= 50]:
+            grid = generate_maze(size, size, seed=size)
+            win = pygame.display.set_mode((size * TILE_SIZE, size * TILE_SIZE))
+
+            samples = []
+            for _ in range(frames):
+                start_time = time.perf_counter()
+                draw_maze(win, grid)
+                pygame.display.update()
+                samples.append(time.perf_counter() - start_time)
+            full = summarize(samples)
+
+            background = build_maze_surface(grid=grid)
+            tile = pygame.Rect(TILE_SIZE, TILE_SIZE, TILE_SIZE, TILE_SIZE)
+            samples = []
+            for _ in range(frames):
+                start_time = time.perf_counter()
+                win.blit(background, tile, tile)
+                pygame.display.update([tile])
+                samples.append(time.perf_counter() - start_time)
+            cached = summarize(samples)
+
+            results[f"{size}x{size}"] = {"draw_maze_ms": full["mean_ms"], "dirty_frame_ms": cached["mean_ms"]}
+    finally:
+        pygame.display.quit()
+    return results
+
+
+@benchmark("sprites")
+def bench_sprites(sizes, verify=True, frames=60, counts=(2, 100, 1000)):
+    """
+    Entities drawn with one blit call each versus one Surface.blits call from
+    the sprite atlas; the maze built from rectangles versus atlas wall tiles;
+    and the timer text through the text cache versus a Label.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from maze import TILE_SIZE, build_maze_surface
+    from ghost import Ghost
+    from sprites import Label, SpriteBatch, build_game_atlas
+    import assets
+
+    pygame.display.init()
+    pygame.font.init()
+    results = {}
+    try:
+        grid = generate_maze(50, 50, seed=50)
+        win = pygame.display.set_mode((50 * TILE_SIZE, 50 * TILE_SIZE))
+        atlas = build_game_atlas()
+        open_cells = [grid.cell_pos(cell_id) for cell_id in grid.open_ids()]
+        rng = random.Random(0)
+
+        for count in counts:
+            ghosts = [Ghost(*rng.choice(open_cells), grid=grid) for _ in range(count)]
+            start_time = time.perf_counter()
+            for _ in range(frames):
+                for ghost in ghosts:
+                    ghost.draw(win)
+            single = time.perf_counter() - start_time
+
+            batch = SpriteBatch()
+            start_time = time.perf_counter()
+            for _ in range(frames):
+                for ghost in ghosts:
+                    batch.add(atlas.surface, (ghost.col * TILE_SIZE, ghost.row * TILE_SIZE), atlas.area(ghost.image))
+                batch.flush(win)
+            batched = time.perf_counter() - start_time
+            results[f"{count}_entities"] = {"blit_ms": single / frames * 1000, "batch_ms": batched / frames * 1000}
+
+        for size in [size for size in sizes if size <= 50]:
+            grid = generate_maze(size, size, seed=size)
+            metrics = {}
+            for name, tiles in (("rects", None), ("atlas", atlas)):
+                start_time = time.perf_counter()
+                surface = build_maze_surface(grid=grid, atlas=tiles)
+                metrics[f"{name}_build_ms"] = (time.perf_counter() - start_time) * 1000
+                if verify:
+                    pixels = metrics.setdefault("pixels", pygame.image.tostring(surface, "RGB"))
+                    if pixels != pygame.image.tostring(surface, "RGB"):
+                        raise AssertionError(f"Atlas maze differs from the rectangle maze on {size}x{size}")
+            metrics.pop("pixels", None)
+            results[f"maze_{size}x{size}"] = metrics
+
+        # Timer text for one 30 second game: the value changes once a second
+        ticks = 30 * 30
+        start_time = time.perf_counter()
+        for tick in range(ticks):
+            assets.render_text(f"Time Left: {30 - tick // 30}s", (255, 255, 0), 24)
+        cached = time.perf_counter() - start_time
+        label = Label("Time Left: {}s", (255, 255, 0), 24)
+        start_time = time.perf_counter()
+        for tick in range(ticks):
+            label.render(30 - tick // 30)
+        labelled = time.perf_counter() - start_time
+        results["timer_text"] = {"text_cache_us": cached / ticks * 1e6, "label_us": labelled / ticks * 1e6,
+                                 "label_renders": label.renders}
+    finally:
+        pygame.display.quit()
+    return results
+
+
+@benchmark("ticks")
+def bench_ticks(sizes, verify=True, matches=200):
+    """
+    Whole-game throughput: headless Simulation ticks per second on the game's maze
+    with a random-walk player.
+    """
+    from simulation import Simulation, MOVES
+
+    rng = random.Random(0)
+    bits = [bit for bit, dr, dc in MOVES]
+    total_ticks = 0
+    start_time = time.perf_counter()
+    for _ in range(matches):
+        simulation = Simulation()
+        simulation.run(lambda sim: rng.choice(bits))
+        total_ticks += simulation.tick
+    seconds = time.perf_counter() - start_time
+    return {"game": {"ticks": total_ticks, "ticks_per_second": total_ticks / seconds}}
+
+
+def traced_bytes(build):
+    """
+    Return (result of build(), bytes it allocated and still holds).
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+@benchmark("entity_memory")
+def bench_entity_memory(sizes, verify=True, agents=10_000, legacy_agents=1000):
+    """
+    Memory held per chasing agent, measured with tracemalloc: the old layout (a
+    class with a __dict__ and the whole path as a list of (row, col) tuples),
+    the __slots__ Ghost keeping only the next hop (or its whole route as
+    array('i') cell ids in sight mode), and one slot of an AgentTable.
+
+    Every agent holds one of a few real long paths across the maze. The old
+    layout is measured on fewer agents; its bytes per entity do not depend on
+    the count.
+    """
+    from array import array
+    from entities import AgentTable
+    from ghost import Ghost
+
+    class LegacyGhost:
+        # The entity layout before __slots__ and id routes
+        def __init__(self, row, col, grid, path):
+            self.row, self.col = row, col
+            self.grid = grid
+            self.flow_field = self.planner = self.hierarchy = self.sight = None
+            self.search = a_star
+            self.image = None
+            self.path = path
+
+    results = {}
+    for size in [size for size in sizes if size <= 200]:
+        grid = generate_maze(size, size, seed=size)
+        routes = []
+        for start, goal in long_queries(grid, 16, seed=size):
+            path, expanded = _a_star_ids(grid.cell_id(*start), grid.cell_id(*goal), grid)
+            routes.append(path)
+        cell_pos = grid.cell_pos
+
+        def legacy():
+            # Like a_star's results: every ghost gets its own list of new tuples
+            return [LegacyGhost(*cell_pos(route[0]), grid, [cell_pos(cell_id) for cell_id in route])
+                    for route in (routes[i % len(routes)] for i in range(legacy_agents))]
+
+        def ghosts(full_route):
+            made = []
+            for i in range(agents):
+                route = routes[i % len(routes)]
+                ghost = Ghost(*cell_pos(route[0]), image_path=None, grid=grid)
+                ghost.route = array("i", route if full_route else route[:2])
+                made.append(ghost)
+            return made
+
+        def table():
+            agent_table = AgentTable(grid, image_path=None)
+            for i in range(agents):
+                route = routes[i % len(routes)]
+                slot = agent_table.add(*cell_pos(route[0]))
+                agent_table.hops[slot] = route[1]
+            return agent_table
+
+        made, legacy_bytes = traced_bytes(legacy)
+        made, next_hop_bytes = traced_bytes(lambda: ghosts(False))
+        if verify and any(ghost.path != [cell_pos(cell_id) for cell_id in ghost.route] for ghost in made[:16]):
+            raise AssertionError("Ghost.path does not match its route")
+        made, route_bytes = traced_bytes(lambda: ghosts(True))
+        made, table_bytes = traced_bytes(table)
+        if verify and len(made) != agents:
+            raise AssertionError(f"AgentTable holds {len(made)} agents, expected {agents}")
+        made = None
+
+        results[f"{size}x{size}"] = {
+            "path_length": sum(len(route) for route in routes) / len(routes),
+            "legacy_bytes_per_entity": legacy_bytes / legacy_agents,
+            "slots_route_bytes_per_entity": route_bytes / agents,
+            "slots_next_hop_bytes_per_entity": next_hop_bytes / agents,
+            "table_bytes_per_entity": table_bytes / agents,
+            "legacy_mb_10k": legacy_bytes / legacy_agents * 10_000 / 2 ** 20,
+            "table_mb_10k": table_bytes / agents * 10_000 / 2 ** 20,
+        }
+    return results
+
+
+@benchmark("fixed_step")
+def bench_fixed_step(sizes, verify=True, seconds=10):
+    """
+    Logic steps per second of game time under FixedStep at several frame rates,
+    including uneven frames and a renderer too slow for the frame rate (with
+    adaptive frame skipping). The step rate must stay at TICKS_PER_SECOND.
+    """
+    from frames import FixedStep
+    from simulation import TICKS_PER_SECOND
+
+    rng = random.Random(0)
+    # name -> (frame rate aimed for, seconds each frame takes)
+    timelines = {
+        "20fps": (20, [1 / 20] * (20 * seconds)),
+        "30fps": (30, [1 / 30] * (30 * seconds)),
+        "60fps": (60, [1 / 60] * (60 * seconds)),
+        "144fps": (144, [1 / 144] * (144 * seconds)),
+        # 60 fps on average, but each frame takes anywhere from 2 to 31 ms
+        "60fps_jitter": (60, [rng.uniform(0.002, 0.031) for _ in range(60 * seconds)]),
+        # Aiming for 60 fps, but drawing takes 40 ms; frames that skip drawing take 5 ms
+        "slow_render": (60, None),
+    }
+
+    results = {}
+    for name, (frame_rate, frame_times) in timelines.items():
+        scheduler = FixedStep(TICKS_PER_SECOND, adaptive=True, frame_rate=frame_rate)
+        now = 0.0
+        scheduler.advance(now)
+        if frame_times is None:
+            while now < seconds:
+                scheduler.advance(now)
+                now += 0.040 if scheduler.should_render() else 0.005
+        else:
+            for frame_time in frame_times:
+                now += frame_time
+                scheduler.advance(now)
+                scheduler.should_render()
+        # Every second of frames must become logic steps, dropped backlog or the remainder
+        elapsed = scheduler.last
+        game_seconds = scheduler.steps / TICKS_PER_SECOND
+        if verify and abs(game_seconds + scheduler.dropped + scheduler.accumulator - elapsed) > 1e-6:
+            raise AssertionError(f"{name}: {game_seconds:.3f}s of logic for {elapsed:.3f}s of frames")
+        results[name] = {
+            "steps_per_game_second": scheduler.steps / elapsed,
+            "drawn_fraction": 1 - scheduler.frames_skipped / scheduler.frames,
+            "dropped_seconds": scheduler.dropped,
+        }
+    return results
+
+
+@benchmark("path_cache")
+def bench_path_cache(sizes, verify=True, matches=10):
+    """
+    Ghost path searches during headless matches with a random-walk player, with
+    plain a_star and with a PathCache in front of it. Reports time per search,
+    the cache hit rate and how much memory the cache holds at the end.
+    """
+    from ghost import Ghost
+    from maze import spawn_points
+    from simulation import Simulation, MOVES
+
+    bits = [bit for bit, dr, dc in MOVES]
+    results = {}
+    for size in [size for size in sizes if size <= 200]:
+        grid = generate_maze(size, size, seed=size)
+        player_start, ghost_start = spawn_points(grid)
+        cache = PathCache(grid)
+        metrics = {}
+        for name, search in (("a_star", a_star), ("cached", cache.find_path)):
+            calls = [0, 0.0]
+
+            def timed_search(start, goal, grid, search=search, calls=calls):
+                start_time = time.perf_counter()
+                path = search(start, goal, grid)
+                calls[1] += time.perf_counter() - start_time
+                calls[0] += 1
+                if verify and not is_valid_path(grid, path, start, goal):
+                    raise AssertionError(f"{name} returned an invalid path on {size}x{size}")
+                return path
+
+            rng = random.Random(size)  # Same player moves for both runs
+            for _ in range(matches):
+                ghost = Ghost(*ghost_start, image_path=None, grid=grid, search=timed_search)
+                simulation = Simulation(ghost=ghost, grid=grid, total_time=30)
+                simulation.run(lambda sim: rng.choice(bits))
+            metrics[f"{name}_searches"] = calls[0]
+            metrics[f"{name}_mean_ms"] = calls[1] / calls[0] * 1000
+
+        stats = cache.stats()
+        metrics["hit_rate"] = stats["hit_rate"]
+        metrics["cache_kb"] = (stats["path_bytes"] + stats["index_bytes"]) / 1024
+        results[f"{size}x{size}"] = metrics
+    return results
+
+
+@benchmark("replay")
+def bench_replay(sizes, verify=True, matches=50):
+    """
+    Record headless matches with a random-walk player, save them in the replay
+    format and time playing them back. The same replays give a fixed workload
+    for the whole tick pipeline across versions.
+    """
+    from replay import Replay
+    from simulation import Simulation, MOVES
+
+    rng = random.Random(0)
+    bits = [0] + [bit for bit, dr, dc in MOVES]
+    replays = []
+    for _ in range(matches):
+        simulation = Simulation(total_time=30)
+        replay = Replay.start(simulation)
+        held = 0
+        while not simulation.game_over:
+            if rng.random() < 0.1:
+                held = rng.choice(bits)  # Keys are held for a while, like a real player
+            replay.record(held, simulation.step(held))
+        replays.append(Replay.from_bytes(replay.to_bytes()))
+
+    ticks = sum(len(replay) for replay in replays)
+    file_bytes = sum(len(replay.to_bytes()) for replay in replays)
+    start_time = time.perf_counter()
+    for replay in replays:
+        replay.play(verify=verify)
+    seconds = time.perf_counter() - start_time
+    return {"game": {"ticks": ticks, "bytes_per_replay": file_bytes / matches,
+                     "ticks_per_second": ticks / seconds, "x_real_time": ticks / 30 / seconds}}
+
+
+@benchmark("selfplay")
+def bench_selfplay(sizes, verify=True, matches=500):
+    """
+    Self-play throughput on the built-in level with the game's settings, in this
+    process and on a pool with one worker per CPU. Both runs play the same seeds,
+    so their escape rates must match.
+    """
+    from selfplay import sweep
+
+    results = {}
+    for name, workers in (("serial", 0), ("pool", os.cpu_count() or 1)):
+        report = sweep([(5, 2, 5)], matches=matches, workers=workers)
+        metrics = {"workers": workers, "matches": report["matches"],
+                   "matches_per_second": report["matches_per_second"],
+                   "matches_per_core_second": report["matches_per_core_second"]}
+        for row in report["results"]:
+            metrics[f"{row['policy']}_escape_rate"] = row["escape_rate"]
+        results[name] = metrics
+    rates = [key for key in results["serial"] if key.endswith("_escape_rate")]
+    if verify and any(results["serial"][key] != results["pool"][key] for key in rates):
+        raise AssertionError("Self-play results depend on the number of workers")
+    return results
+
+
+@benchmark("profiler")
+def bench_profiler(sizes, verify=True, laps=200_000):
+    """
+    Cost of one Profiler.mark() + lap() pair, disabled and enabled.
+
+    The game loop makes about ten of these calls per frame.
+    """
+    from profiler import Profiler
+
+    results = {}
+    for name, enabled in (("disabled", False), ("enabled", True)):
+        profile = Profiler(enabled=enabled)
+        start_time = time.perf_counter()
+        for _ in range(laps):
+            start = profile.mark()
+            profile.lap("phase", start)
+        seconds = time.perf_counter() - start_time
+        results[name] = {"lap_ns": seconds / laps * 1e9}
+    return results
+
+
+def corridor_cells(grid):
+    """
+    Return the ids of open cells between two open cells in a straight line (door spots).
+    """
+    cells = grid.cells
+    stride = grid.stride
+    return [cell_id for cell_id in grid.open_ids()
+            if len(grid.neighbor_ids(cell_id)) == 2
+            and ((not cells[cell_id - 1] and not cells[cell_id + 1])
+                 or (not cells[cell_id - stride] and not cells[cell_id + stride]))]
+
+
+@benchmark("dynamic_walls")
+def bench_dynamic_walls(sizes, verify=True, doors=20, cached_paths=200):
+    """
+    Close and reopen doors (corridor cells) on each maze and bring every cache
+    up to date after each toggle: neighbor table, a flow field toward the far
+    corner, the line-of-sight tables and a PathCache. Compared with rebuilding
+    the table, field and line of sight from scratch. With verify, everything
+    must match a fresh build afterwards.
+    """
+    from flowfield import FlowField, _distance_field_ids
+    from pathfinding import build_neighbor_table, get_neighbor_table
+    from spatial import Visibility
+
+    results = {}
+    for size in sizes:
+        grid = generate_maze(size, size, seed=size)
+        start, goal = long_queries(grid, 1)[0]
+
+        start_time = time.perf_counter()
+        build_neighbor_table(grid)
+        _distance_field_ids(grid.cell_id(*goal), grid)
+        Visibility(grid)
+        rebuild_seconds = time.perf_counter() - start_time
+
+        get_neighbor_table(grid)
+        field = FlowField(grid)
+        field.update(goal)
+        sight = Visibility(grid)
+        cache = PathCache(grid)
+        for query_start, query_goal in random_queries(grid, cached_paths, seed=size):
+            cache.find_path(query_start, query_goal)
+
+        rng = random.Random(size)
+        spots = rng.sample(corridor_cells(grid), min(doors, len(corridor_cells(grid))))
+        toggle_times = []
+        for cell_id in spots:
+            for _ in range(2):  # Close the door, then open it again
+                start_time = time.perf_counter()
+                grid.toggle(*grid.cell_pos(cell_id))
+                get_neighbor_table(grid)
+                field.sync()
+                sight.sync()
+                cache.sync()
+                toggle_times.append(time.perf_counter() - start_time)
+
+        if verify:
+            if get_neighbor_table(grid) != build_neighbor_table(grid):
+                raise AssertionError(f"Neighbor table differs from a rebuild on {size}x{size}")
+            if field.distances != _distance_field_ids(grid.cell_id(*goal), grid):
+                raise AssertionError(f"Repaired distances differ from a new BFS on {size}x{size}")
+            fresh = Visibility(grid)
+            if (sight.up, sight.down, sight.left, sight.right) != (fresh.up, fresh.down, fresh.left, fresh.right):
+                raise AssertionError(f"Line-of-sight tables differ from a rebuild on {size}x{size}")
+
+        toggle_times.sort()
+        results[f"{size}x{size}"] = {
+            "toggles": len(toggle_times),
+            "toggle_ms": sum(toggle_times) / len(toggle_times) * 1000,
+            "toggle_p50_ms": toggle_times[len(toggle_times) // 2] * 1000,
+            "toggle_max_ms": toggle_times[-1] * 1000,
+            "rebuild_ms": rebuild_seconds * 1000,
+            "repaired_cells_per_toggle": field.repaired_cells / len(toggle_times),
+            "paths_dropped": cache.invalidations,
+            "paths_kept": len(cache.paths),
+        }
+    return results
+
+
+@benchmark("spatial")
+def bench_spatial(sizes, verify=True, queries=20_000, agents=200):
+    """
+    Line of sight by walking the cells between two agents versus the run tables
+    (one pair at a time and batched through NumPy), and nearest-agent lookups by
+    scanning every agent versus the bucket grid.
+
+    Runs on "rooms" levels, whose long open lines are where walking costs the most.
+    Every pair shares a row or a column; other pairs never need a walk at all.
+    """
+    from spatial import Visibility, BucketGrid
+
+    def walk_sees(grid, a, b):
+        # Reference: step through every cell between a and b
+        (row, col), (goal_row, goal_col) = a, b
+        if row != goal_row and col != goal_col:
+            return False
+        dr = (goal_row > row) - (goal_row < row)
+        dc = (goal_col > col) - (goal_col < col)
+        while (row, col) != (goal_row, goal_col):
+            row += dr
+            col += dc
+            if grid.is_wall(row, col):
+                return False
+        return True
+
+    class Agent:
+        def __init__(self, row, col):
+            self.row = row
+            self.col = col
+
+    results = {}
+    for size in sizes:
+        grid = level.generate(size, size, seed=size, algorithm="rooms").grid
+        start_time = time.perf_counter()
+        visibility = Visibility(grid)
+        metrics = {"build_ms": (time.perf_counter() - start_time) * 1000}
+
+        rng = random.Random(size)
+        open_cells = [grid.cell_pos(cell_id) for cell_id in grid.open_ids()]
+        pairs = []
+        while len(pairs) < queries:
+            a, b = rng.choice(open_cells), rng.choice(open_cells)
+            b = (a[0], b[1]) if rng.random() < 0.5 else (b[0], a[1])
+            if grid.is_open(*b):
+                pairs.append((a, b))
+        a_ids = [grid.cell_id(*a) for a, b in pairs]
+        b_ids = [grid.cell_id(*b) for a, b in pairs]
+
+        start_time = time.perf_counter()
+        expected = [walk_sees(grid, a, b) for a, b in pairs]
+        metrics["walk_us"] = (time.perf_counter() - start_time) / queries * 1e6
+
+        start_time = time.perf_counter()
+        found = [visibility.sees_ids(a_id, b_id) for a_id, b_id in zip(a_ids, b_ids)]
+        metrics["table_us"] = (time.perf_counter() - start_time) / queries * 1e6
+
+        visibility.sees_many(a_ids[:1], b_ids[:1])  # Make the NumPy views outside the timing
+        start_time = time.perf_counter()
+        batch = visibility.sees_many(a_ids, b_ids)
+        metrics["batch_us"] = (time.perf_counter() - start_time) / queries * 1e6
+        if verify and (found != expected or batch.tolist() != expected):
+            raise AssertionError(f"Visibility disagrees with walking the cells on {size}x{size}")
+
+        # Buckets sized for about one agent each
+        buckets = BucketGrid(grid, bucket_size=max(4, size // math.isqrt(agents)))
+        population = [Agent(*rng.choice(open_cells)) for _ in range(agents)]
+        for agent in population:
+            buckets.add(agent)
+        probes = [rng.choice(open_cells) for _ in range(queries // 10)]
+
+        start_time = time.perf_counter()
+        linear = [min(abs(agent.row - row) + abs(agent.col - col) for agent in population) for row, col in probes]
+        metrics["scan_nearest_us"] = (time.perf_counter() - start_time) / len(probes) * 1e6
+        start_time = time.perf_counter()
+        bucketed = [buckets.nearest(row, col)[1] for row, col in probes]
+        metrics["bucket_nearest_us"] = (time.perf_counter() - start_time) / len(probes) * 1e6
+        if verify and bucketed != linear:
+            raise AssertionError(f"BucketGrid.nearest disagrees with a full scan on {size}x{size}")
+        results[f"{size}x{size}"] = metrics
+    return results
+
+
+# Modules the headless tools import; none of them may pull in pygame
+HEADLESS_MODULES = ("pathfinding", "simulation", "replay", "hierarchy", "spatial")
+
+# Child process for the window timing: exits on the first display update
+FIRST_FRAME_PROBE = ("import os, sys; sys.path.insert(0, '.'); import pygame.display as display; "
+                     "display.update = display.flip = lambda *args: os._exit(0); "
+                     "import main; main.main([])")
+
+
+def import_times(module):
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        dict: {imported module: (depth, self us, cumulative us)}; depth 0 is module
+              itself, 1 the modules it imports directly, and so on.
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        times[name.strip()] = (depth, int(self_us), int(cumulative_us))
+    return times
+
+
+def run_seconds(args, runs, env=None):
+    # Median wall time of running a command several times
+    samples = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        subprocess.run(args, cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start_time)
+    return sorted(samples)[runs // 2]
+
+
+@benchmark("startup")
+def bench_startup(sizes, verify=True, runs=5):
+    """
+    Startup cost: an -X importtime report for the game and the headless modules,
+    and the wall time from launching the game to its first frame (dummy SDL drivers).
+
+    "slowest" lists the heaviest direct imports of each module with their
+    cumulative import time.
+    """
+    results = {}
+    for module in HEADLESS_MODULES + ("main",):
+        times = import_times(module)
+        direct = sorted((cumulative, name) for name, (depth, self_us, cumulative) in times.items() if depth == 1)
+        results[module] = {
+            "import_ms": times[module][2] / 1000,
+            "modules": len(times),
+            "pygame": "pygame" in times,
+            "slowest": ", ".join(f"{name} {cumulative / 1000:.1f}ms" for cumulative, name in direct[:-4:-1]),
+        }
+        if verify and module in HEADLESS_MODULES and "pygame" in times:
+            raise AssertionError(f"Importing {module} pulls in pygame")
+
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    results["window"] = {
+        "python_ms": run_seconds([sys.executable, "-c", "pass"], runs) * 1000,
+        "first_frame_ms": run_seconds([sys.executable, "-c", FIRST_FRAME_PROBE], runs, env) * 1000,
+    }
+    return results
+
+
+@benchmark("parallel_planner")
+def bench_parallel_planner(sizes, verify=True):
+    """
+    Batch path planning on worker processes (see planner_benchmark.py).
+    """
+    from planner_benchmark import run_benchmark
+
+    report = run_benchmark(size=min(200, max(sizes)))
+    metrics = {"serial_ms": report["serial_seconds"] * 1000}
+    for workers, seconds in report["workers"].items():
+        metrics[f"workers_{workers}_ms"] = seconds * 1000
+        metrics[f"workers_{workers}_speedup"] = report["speedup"][workers]
+    return {"batch": metrics}
+
+
+# ---- Baseline comparison --------------------------------------------------------
+
+def compare(results, baseline, threshold):
+    """
+    Compare results against a baseline.
+
+    Args:
+        results (dict): Output of run_benchmarks().
+        baseline (dict): Earlier output of run_benchmarks().
+        threshold (float): Allowed relative slowdown, e.g. 0.25 for 25%.
+
+    Returns:
+        list: One (benchmark, case, metric, baseline value, new value, change) tuple
+              per regression.
+    """
+    regressions = []
+    for name, cases in results["benchmarks"].items():
+        for case, metrics in cases.items():
+            old_metrics = baseline.get("benchmarks", {}).get(name, {}).get(case, {})
+            for metric, value in metrics.items():
+                old = old_metrics.get(metric)
+                if not old or not isinstance(value, (int, float)):
+                    continue
+                if metric.endswith("_ms"):
+                    change = value / old - 1  # Slower is positive
+                elif metric.endswith("_per_second"):
+                    change = old / value - 1 if value else float("inf")  # Less throughput is positive
+                else:
+                    continue
+                if change > threshold:
+                    regressions.append((name, case, metric, old, value, change))
+    return regressions
+
+
+def run_benchmarks(sizes, only=None, verify=True):
+    """
+    Run the selected benchmarks.
+
+    Returns:
+        dict: {"machine": ..., "benchmarks": {name: {case: {metric: value}}}}
+    """
+    results = {
+        "machine": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "sizes": list(sizes),
+        "benchmarks": {},
+    }
+    for name, function in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        print(f"Running {name}...", flush=True)
+        results["benchmarks"][name] = function(sizes, verify=verify)
+    return results
+
+
+def print_report(results):
+    for name, cases in results["benchmarks"].items():
+        print(f"\n{name}")
+        for case, metrics in cases.items():
+            values = ", ".join(f"{metric}={value:.3f}" if isinstance(value, float) else f"{metric}={value}"
+                               for metric, value in metrics.items())
+            print(f"  {case}: {values}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ghost Chase performance benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Maze sizes to benchmark (square)")
+    parser.add_argument("--quick", action="store_true", help=f"Only run sizes {QUICK_SIZES}")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Benchmarks to run")
+    parser.add_argument("--no-verify", action="store_true", help="Skip the BFS optimality check")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    # File arguments are relative to where the script was started, assets to ROOT
+    if args.output:
+        args.output = os.path.abspath(args.output)
+    args.baseline = os.path.abspath(args.baseline)
+    os.chdir(ROOT)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    results = run_benchmarks(sizes, only=args.only, verify=not args.no_verify)
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for name, case, metric, old, new, change in regressions:
+                print(f"  {name} {case} {metric}: {old:.3f} -> {new:.3f} (+{change:.0%})")
+            return 1
+        print(f"\nNo regressions over {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
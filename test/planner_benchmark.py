@@ -0,0 +1,86 @@
+import os
+import random
+import sys
+import time
+
+# Allow running this file directly from the repository root or from test/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from grid import Grid, OPEN
+from pathfinding import a_star
+from planner import ParallelPlanner
+
+
+def random_grid(rows, cols, wall_ratio=0.25, seed=0):
+    """
+    Build a grid with randomly placed walls (and a solid outer wall).
+
+    Args:
+        rows (int): Number of rows.
+        cols (int): Number of columns.
+        wall_ratio (float): Chance that an inner cell is a wall.
+        seed (int): Random seed, so every run benchmarks the same maze.
+
+    Returns:
+        Grid: The generated maze.
+    """
+    rng = random.Random(seed)
+    grid = Grid(rows, cols)
+    for row in range(1, rows - 1):
+        for col in range(1, cols - 1):
+            if rng.random() >= wall_ratio:
+                grid.cells[grid.cell_id(row, col)] = OPEN
+    return grid
+
+
+def random_queries(grid, count, seed=0):
+    """
+    Pick count random (start, goal) pairs of walkable cells.
+    """
+    rng = random.Random(seed)
+    cells = [grid.cell_pos(cell_id) for cell_id in grid.open_ids()]
+    return [(rng.choice(cells), rng.choice(cells)) for _ in range(count)]
+
+
+def run_benchmark(size=200, query_count=400):
+    """
+    Compare the serial a_star with the ParallelPlanner at 1..cpu_count workers.
+
+    Returns:
+        dict: Seconds per batch for the serial run and for every worker count,
+              plus the speedup of each worker count over one worker.
+    """
+    grid = random_grid(size, size)
+    queries = random_queries(grid, query_count)
+
+    start_time = time.perf_counter()
+    expected = [a_star(start, goal, grid) for start, goal in queries]
+    serial_seconds = time.perf_counter() - start_time
+
+    results = {"size": size, "queries": query_count, "serial_seconds": serial_seconds, "workers": {}}
+
+    worker_counts = sorted({1, 2, 4, 8, os.cpu_count() or 1})
+    for workers in [count for count in worker_counts if count <= (os.cpu_count() or 1)]:
+        with ParallelPlanner(grid, workers=workers) as planner:
+            planner.plan(queries[:workers])  # Warm up: start the workers, build neighbor tables
+
+            start_time = time.perf_counter()
+            paths = planner.plan(queries)
+            seconds = time.perf_counter() - start_time
+
+        # The parallel planner must agree with the serial search on every query
+        if paths != expected:
+            raise AssertionError(f"ParallelPlanner with {workers} workers returned different paths")
+        results["workers"][workers] = seconds
+
+    one_worker = results["workers"][1]
+    results["speedup"] = {workers: one_worker / seconds for workers, seconds in results["workers"].items()}
+    return results
+
+
+if __name__ == "__main__":
+    report = run_benchmark()
+    print(f"Parallel planner on a {report['size']}x{report['size']} maze, {report['queries']} queries")
+    print(f"Serial a_star: {report['serial_seconds'] * 1000:.1f} ms")
+    for workers, seconds in report["workers"].items():
+        print(f"{workers} worker(s): {seconds * 1000:.1f} ms (speedup {report['speedup'][workers]:.2f}x)")